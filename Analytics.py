@@ -22,7 +22,7 @@ Data analytics
 import Config
 import Stats
 import Game
-import ScoreBoard
+import SeasonLoader
 import BoxScore
 import ThrowMap
 
@@ -30,7 +30,7 @@ import importlib
 importlib.reload(Config)
 importlib.reload(Stats)
 importlib.reload(Game)
-importlib.reload(ScoreBoard)
+importlib.reload(SeasonLoader)
 importlib.reload(BoxScore)
 importlib.reload(ThrowMap)
 
@@ -39,6 +39,7 @@ from ipywidgets import widgets, HTML
 import plotly.express as px
 import plotly.graph_objects as go
 import pandas as pd
+from pandas.api.types import union_categoricals
 import glob
 import os
 import json
@@ -47,98 +48,40 @@ import json
 ###########################################################################################################################################################################
 # Returns the Pandas DataFrame containing all the events of the team players for the entire season and the players_info dictionary
 ###########################################################################################################################################################################
-def seasonEvents(output, folder='./data'):
-
-    # Conversion to int without errors
-    def toint(x):
-        try:
-            return int(x)
-        except:
-            return 999999
-    
-    allfiles = glob.glob('%s/*.game'%folder)
-    
-    allevents = []
-    
-    # Try to read phases from the team file
-    teamfiles = glob.glob('%s/*.team'%folder)
-    phases = []
-    if len(teamfiles) == 0:
-        print('No .team file found in %s folder'%folder)
+def seasonEvents(output, folder='./data', processes=None):
+
+    # Load the games in parallel worker processes
+    allevents, players_info = SeasonLoader.loadSeason(folder, processes=processes)
+    if allevents is None:
         return
-              
-    team_file = teamfiles[0]
-    with open(team_file) as f:
-        team_data = json.load(f)
-        if 'phases' in team_data:
-            phases = team_data['phases']
-
-    if len(phases) == 0:
-        phases = sorted(list(set([os.path.basename(x).split('-')[1] for x in allfiles if '-' in x and '.a-' in x])))
-    
-    sb = ScoreBoard.ScoreBoard(team_file, scale=0.4, output=output)
 
-    players_info = {}
+    return teamEvents(allevents), players_info
+
+
+###########################################################################################################################################################################
+# Returns the Pandas DataFrame containing the events of the team players from the list of the events DataFrames of the games
+###########################################################################################################################################################################
+def teamEvents(allevents):
     
-    # Cycle on all games
-    progressive = 1
-    for phase in phases:
-
-        # File of the phase
-        files = [x for x in allfiles if phase in x and os.path.basename(x).split('-')[1] == phase]
-
-        # Sort on increasing phase + round
-        rounds = [toint(os.path.basename(x).split('.')[0]) for x in files]
-        files  = [file for r, file in sorted(zip(rounds, files))]
-
-        for file in files:
-            sb.game.loadGame(file)
-            g = sb.game.game_data
-
-            pi = g['players_info']
-            for player_name in pi:
-                if player_name in players_info:
-                    players_info[player_name]['time_on_field'] += pi[player_name]['time_on_field']
-                    players_info[player_name]['plusminus']     += pi[player_name]['plusminus']
-                    if pi[player_name]['time_on_field'] > 0:
-                        players_info[player_name]['games'] += 1
-                else:
-                    players_info[player_name] = pi[player_name]
-                    if pi[player_name]['time_on_field'] > 0:
-                        players_info[player_name]['games'] = 1
-                    else:
-                        players_info[player_name]['games'] = 0
-                
-            # Append all events
-            df = sb.game.events_df
-            if df.shape[0] > 0:
-                name = file.replace('./data/','').replace('.game','')
-                elems = name.split('-')
-                ro = int(elems[0].replace('.a',''))
-                ph = elems[1]
-                op = elems[2]
-                df['game_number'] = progressive
-                df['round'] = ro
-                df['phase'] = ph
-                df['opponents'] = op
-                df['home'] = g['home']
-                if g['home']:
-                    df['win'] = g['status']['points1'] > g['status']['points2']
-                else:
-                    df['win'] = g['status']['points2'] > g['status']['points1']
-                allevents.append(df)
-                
-            progressive += 1
-
-    df = pd.concat(allevents)
+    df = concatEvents(allevents)
     df.reset_index(drop=True, inplace=True)
     
     df = df[df['team']==Config.TEAM]
     df = df[~df['player'].isin([Config.TEAM,''])]
 
-    return df, players_info
+    return df
 
 
+###########################################################################################################################################################################
+# Concatenation of the events DataFrames of many games keeping the categorical dtypes of the team and player columns (union of the categories). The DataFrames
+# of the games are not modified (the columns with the new categories are set on shallow copies)
+###########################################################################################################################################################################
+def concatEvents(allevents):
+
+    categories = { c: union_categoricals([df[c] for df in allevents], sort_categories=True).categories for c in ['team', 'player'] }
+    return pd.concat([df.assign(**{ c: df[c].cat.set_categories(cat) for c, cat in categories.items() }) for df in allevents])
+    
+    
 ###########################################################################################################################################################################
 # Returns a plotly figure with a scatter chart
 ###########################################################################################################################################################################
@@ -178,3 +121,32 @@ def scatterChart(players, x, y, players_info, descrx, descry, size_on_time=True,
                       margin=dict(l=70, r=20, b=30, t=70),
                       title=dict(text='<b>' + descrx + ' vs. ' + descry + '</b><br><span style="font-size: 15px;">' + comment + '</span>', font=dict(size=20, weight=700)))
     return fig
+
+
+###########################################################################################################################################################################
+# Returns a plotly figure with the heatmap of the percentage of the throws of the players in each zone of the court from a ShotIndex (filters as in ShotIndex.selection)
+###########################################################################################################################################################################
+def zonesChart(index, players=None, title='Percentuale di tiro per zona', **filters):
+
+    if players is None:
+        players = index.values['player']
+    zones = index.values['zone']
+    
+    made      = []
+    attempted = []
+    for player in players:
+        zdf = index.zoneStats(player=player, **filters)
+        made.append(zdf['made'].tolist())
+        attempted.append(zdf['attempted'].tolist())
+        
+    z    = [[100.0*m/a if a > 0 else None for m,a in zip(rm,ra)] for rm,ra in zip(made,attempted)]
+    text = [['%d/%d'%(m,a) if a > 0 else '' for m,a in zip(rm,ra)] for rm,ra in zip(made,attempted)]
+
+    fig = go.Figure(go.Heatmap(x=zones, y=players, z=z, text=text, texttemplate='%{text}', zmin=0, zmax=100,
+                               colorscale='RdYlGn', name='',
+                               hovertemplate='<b>%{y}</b><br>%{x}<br>Realizzati/tentati: %{text}<br>Percentuale: %{z:.1f}%'))
+
+    fig.update_layout(height=max(400, 40*len(players)+150), template='plotly_white', font_family='Arial', showlegend=False,
+                      margin=dict(l=70, r=20, b=30, t=70), yaxis=dict(autorange='reversed'),
+                      title=dict(text='<b>' + title + '</b>', font=dict(size=20, weight=700)))
+    return fig
@@ -140,7 +140,8 @@ def svg(df, game, team_logo_img=None, width=80, quarter=None, downloadMode=False
             s = on_field[player]
             seconds_on_field[player] += s
             
-            
+    # All the stats of the players calculated in a single pass on the events
+    st = Stats.table(df, game.players_info)
     
     height = 2.005*FORM_FACTOR*width    # 2 means that 1vw = 2vh in general screens
     
@@ -241,8 +242,8 @@ height="%f%s">''' % (svgwidth,svgheight, preserve, width, xunits, height, yunits
         svg += text(XRIGHT, YLUOGO+3*hRigaTestata, str(g['round']) + '.a Giornata', align='end')
         
         # Current score of the two teams
-        pt = Stats.points(df)
-        po = Stats.points(df, team=Config.OPPO)
+        pt = Stats.points(st)
+        po = Stats.points(st, team=Config.OPPO)
 
         if g['home']:
             svg += text(XSQUADRE, YSQUADRA1, game.team_data['name'].upper(), dim=dimSquadre, w=700)
@@ -382,22 +383,22 @@ height="%f%s">''' % (svgwidth,svgheight, preserve, width, xunits, height, yunits
     # Punti realizzati
     y = y1
     for player_name in game.players_by_number:
-        points = Stats.points(df, player_name)
+        points = Stats.points(st, player_name)
         if points > 0:
             svg += text(XPUNTI, y, str(points), align='middle', w=700)
         y += hRiga
-    t = Stats.points(df)
+    t = Stats.points(st)
     if t > 0: svg += text(XPUNTI, ysum, str(t), align='middle', color='white', w=700)
         
     # T2
     y = y1
     for player_name in game.players_by_number:
-        s,p = Stats.tperc(df, player_name, throw=2)
+        s,p = Stats.tperc(st, player_name, throw=2)
         if len(s) > 0:
             svg += text(X2P-0.7, y, s)
             svg += text(X2P_PERC+0.15, y, p, align='end')
         y += hRiga
-    s,p = Stats.tperc(df, throw=2)
+    s,p = Stats.tperc(st, throw=2)
     if len(s) > 0:
         svg += text(X2P-0.7, ysum, s, color='white')
         svg += text(X2P_PERC+0.15, ysum, p, align='end', color='white')
@@ -405,12 +406,12 @@ height="%f%s">''' % (svgwidth,svgheight, preserve, width, xunits, height, yunits
     # T3
     y = y1
     for player_name in game.players_by_number:
-        s,p = Stats.tperc(df, player_name, throw=3)
+        s,p = Stats.tperc(st, player_name, throw=3)
         if len(s) > 0:
             svg += text(X3P-0.7, y, s)
             svg += text(X3P_PERC+0.15, y, p, align='end')
         y += hRiga
-    s,p = Stats.tperc(df, throw=3)
+    s,p = Stats.tperc(st, throw=3)
     if len(s) > 0:
         svg += text(X3P-0.7, ysum, s, color='white')
         svg += text(X3P_PERC+0.15, ysum, p, align='end', color='white')
@@ -418,12 +419,12 @@ height="%f%s">''' % (svgwidth,svgheight, preserve, width, xunits, height, yunits
     # T2 + T3
     y = y1
     for player_name in game.players_by_number:
-        s,p = Stats.tperc(df, player_name, throw=0)
+        s,p = Stats.tperc(st, player_name, throw=0)
         if len(s) > 0:
             svg += text(XTOTTIRI-0.7, y, s)
             svg += text(XTOT_PERC+0.15, y, p, align='end')
         y += hRiga
-    s,p = Stats.tperc(df, throw=0)
+    s,p = Stats.tperc(st, throw=0)
     if len(s) > 0:
         svg += text(XTOTTIRI-0.7, ysum, s, color='white')
         svg += text(XTOT_PERC+0.15, ysum, p, align='end', color='white')
@@ -431,12 +432,12 @@ height="%f%s">''' % (svgwidth,svgheight, preserve, width, xunits, height, yunits
     # T1
     y = y1
     for player_name in game.players_by_number:
-        s,p = Stats.tperc(df, player_name, throw=1)
+        s,p = Stats.tperc(st, player_name, throw=1)
         if len(s) > 0:
             svg += text(X1P-0.7, y, s)
             svg += text(X1P_PERC+0.15, y, p, align='end')
         y += hRiga
-    s,p = Stats.tperc(df, throw=1)
+    s,p = Stats.tperc(st, throw=1)
     if len(s) > 0:
         svg += text(X1P-0.7, ysum, s, color='white')
         svg += text(X1P_PERC+0.15, ysum, p, align='end', color='white')
@@ -445,29 +446,29 @@ height="%f%s">''' % (svgwidth,svgheight, preserve, width, xunits, height, yunits
     # ASSIST
     y = y1
     for player_name in game.players_by_number:
-        v = Stats.countforplayer(df,player_name,'Ass')
+        v = Stats.countforplayer(st,player_name,'Ass')
         if v > 0:
             svg += text(XASSIST, y, str(v), align='middle')
         y += hRiga
-    t = Stats.countforteam(df,'Ass')
+    t = Stats.countforteam(st,'Ass')
     if t > 0: svg += text(XASSIST, ysum, str(t), align='middle', color='white')
         
         
     # RIMBALZI
     y = y1
     for player_name in game.players_by_number:
-        vo = Stats.countforplayer(df,player_name,'ROff')
+        vo = Stats.countforplayer(st,player_name,'ROff')
         if vo > 0: svg += text(XROFF, y, str(vo), align='middle')
         
-        vd = Stats.countforplayer(df,player_name,'RDif')
+        vd = Stats.countforplayer(st,player_name,'RDif')
         if vd > 0: svg += text(XRDIF, y, str(vd), align='middle')
         
         if (vd+vo) > 0: svg += text(XRTOT, y, str(vd+vo), align='middle')
         
         y += hRiga
-    to = Stats.countforteam(df,'ROff')
+    to = Stats.countforteam(st,'ROff')
     if to > 0: svg += text(XROFF, ysum, str(to), align='middle', color='white')
-    td = Stats.countforteam(df,'RDif')
+    td = Stats.countforteam(st,'RDif')
     if to > 0: svg += text(XRDIF, ysum, str(td), align='middle', color='white')
     if (to+td) > 0: svg += text(XRTOT, ysum, str(to+td), align='middle', color='white')
 
@@ -475,48 +476,48 @@ height="%f%s">''' % (svgwidth,svgheight, preserve, width, xunits, height, yunits
     # FALLI
     y = y1
     for player_name in game.players_by_number:
-        v = Stats.countforplayer(df,player_name,'FCom')
+        v = Stats.countforplayer(st,player_name,'FCom')
         if v > 0: svg += text(XFATTI, y, str(v), align='middle')
         
-        v = Stats.countforplayer(df,player_name,'FSub')
+        v = Stats.countforplayer(st,player_name,'FSub')
         if v > 0: svg += text(XSUBITI, y, str(v), align='middle')
         
         y += hRiga
-    t = Stats.countforteam(df,'FCom')
+    t = Stats.countforteam(st,'FCom')
     if t > 0: svg += text(XFATTI, ysum, str(t), align='middle', color='white')
-    t = Stats.countforteam(df,'FSub')
+    t = Stats.countforteam(st,'FSub')
     if t > 0: svg += text(XSUBITI, ysum, str(t), align='middle', color='white')
 
     
     # PALLE PERSE E RECUPERATE
     y = y1
     for player_name in game.players_by_number:
-        v = Stats.countforplayer(df,player_name,'PRec')
+        v = Stats.countforplayer(st,player_name,'PRec')
         if v > 0: svg += text(XPREC, y, str(v), align='middle')
         
-        v = Stats.countforplayer(df,player_name,'PPer')
+        v = Stats.countforplayer(st,player_name,'PPer')
         if v > 0: svg += text(XPPER, y, str(v), align='middle')
         
         y += hRiga
-    t = Stats.countforteam(df,'PRec')
+    t = Stats.countforteam(st,'PRec')
     if t > 0: svg += text(XPREC, ysum, str(t), align='middle', color='white')
-    t = Stats.countforteam(df,'PPer')
+    t = Stats.countforteam(st,'PPer')
     if t > 0: svg += text(XPPER, ysum, str(t), align='middle', color='white')
 
     
     # STOPPATE
     y = y1
     for player_name in game.players_by_number:
-        v = Stats.countforplayer(df,player_name,'SDat')
+        v = Stats.countforplayer(st,player_name,'SDat')
         if v > 0: svg += text(XSTOFA, y, str(v), align='middle')
         
-        v = Stats.countforplayer(df,player_name,'SSub')
+        v = Stats.countforplayer(st,player_name,'SSub')
         if v > 0: svg += text(XSTOSU, y, str(v), align='middle')
         
         y += hRiga
-    t = Stats.countforteam(df,'SDat')
+    t = Stats.countforteam(st,'SDat')
     if t > 0: svg += text(XSTOFA, ysum, str(t), align='middle', color='white')
-    t = Stats.countforteam(df,'SSub')
+    t = Stats.countforteam(st,'SSub')
     if t > 0: svg += text(XSTOSU, ysum, str(t), align='middle', color='white')    
     
     
@@ -524,10 +525,10 @@ height="%f%s">''' % (svgwidth,svgheight, preserve, width, xunits, height, yunits
     y = y1
     maxv = -1000
     for player_name in game.players_by_number:
-        v = Stats.value(df, player_name)
+        v = Stats.value(st, player_name)
         if v > maxv: maxv = v
     for player_name in game.players_by_number:
-        v = Stats.value(df, player_name)
+        v = Stats.value(st, player_name)
         if player_name in seconds_on_field.keys() and v != 0:
             if v == maxv:
                 color = '#008800'
@@ -537,7 +538,7 @@ height="%f%s">''' % (svgwidth,svgheight, preserve, width, xunits, height, yunits
                 w = 500
             svg += text(XVAL, y, str(v), align='middle', color=color, w=w)
         y += hRiga
-    t = Stats.value(df)
+    t = Stats.value(st)
     svg += text(XVAL, ysum, str(t), align='middle', color='white')
         
         
@@ -545,10 +546,10 @@ height="%f%s">''' % (svgwidth,svgheight, preserve, width, xunits, height, yunits
     y = y1
     maxv = -1000
     for player_name in game.players_by_number:
-        v = Stats.oer(df, player_name)
+        v = Stats.oer(st, player_name)
         if v > maxv: maxv = v
     for player_name in game.players_by_number:
-        v = Stats.oer(df, player_name)
+        v = Stats.oer(st, player_name)
         if player_name in seconds_on_field.keys() and v != 0:
             if v == maxv:
                 color = '#008800'
@@ -558,7 +559,7 @@ height="%f%s">''' % (svgwidth,svgheight, preserve, width, xunits, height, yunits
                 w = 500
             svg += text(XOER, y, '%.2f'%v, align='middle', color=color, w=w)
         y += hRiga
-    t = Stats.oer(df)
+    t = Stats.oer(st)
     if t > 0: svg += text(XOER, ysum, '%.2f'%t, align='middle', color='white')
         
         
@@ -566,10 +567,10 @@ height="%f%s">''' % (svgwidth,svgheight, preserve, width, xunits, height, yunits
     y = y1
     maxv = -1000
     for player_name in game.players_by_number:
-        v = Stats.vir(df, player_name, game.players_info)
+        v = Stats.vir(st, player_name, game.players_info)
         if v > maxv: maxv = v
     for player_name in game.players_by_number:
-        v = Stats.vir(df, player_name, game.players_info)
+        v = Stats.vir(st, player_name, game.players_info)
         if player_name in seconds_on_field.keys() and v != 0:
             if v == maxv:
                 color = '#008800'
@@ -579,7 +580,7 @@ height="%f%s">''' % (svgwidth,svgheight, preserve, width, xunits, height, yunits
                 w = 500
             svg += text(XVIR, y, '%.2f'%v, align='middle', color=color, w=w)
         y += hRiga
-    t = Stats.vir(df, players_info=game.players_info)
+    t = Stats.vir(st, players_info=game.players_info)
     if t > 0: svg += text(XVIR, ysum, '%.2f'%t, align='middle', color='white')
 
     
@@ -608,11 +609,11 @@ height="%f%s">''' % (svgwidth,svgheight, preserve, width, xunits, height, yunits
     y = y1
     maxv = -1000
     for player_name in game.players_by_number:
-        v = Stats.trueshooting(df, player_name)
+        v = Stats.trueshooting(st, player_name)
         if v > maxv: maxv = v
     for player_name in game.players_by_number:
         if player_name in seconds_on_field.keys():
-            t = Stats.trueshooting(df, player_name)
+            t = Stats.trueshooting(st, player_name)
             if t == maxv:
                 color = '#008800'
                 w = 700
@@ -622,7 +623,7 @@ height="%f%s">''' % (svgwidth,svgheight, preserve, width, xunits, height, yunits
             if t >= 0.0:
                 svg += text(XTRUE, y, '%.1f'%t, align='middle', color=color, w=w)
         y += hRiga
-    t = Stats.trueshooting(df)
+    t = Stats.trueshooting(st)
     if t >= 0: svg += text(XTRUE, ysum, '%.1f'%t, align='middle', color='white')
         
     
@@ -655,12 +656,12 @@ height="%f%s">''' % (svgwidth,svgheight, preserve, width, xunits, height, yunits
     for player_name in game.players_by_number:
         if player_name not in seconds_on_field.keys() or seconds_on_field[player_name]==0: pt.append('%s ne'%player_name)
         else:
-            ps = Stats.points(df, player_name)
+            ps = Stats.points(st, player_name)
             if ps > 0:  pt.append('%s %d'%(player_name, ps))
             else:       pt.append(player_name)
                 
     for player_name in game.opponents_by_number:
-        points = Stats.points(df, player_name, team=Config.OPPO)
+        points = Stats.points(st, player_name, team=Config.OPPO)
         
         # Recover opponent points from the game if greater than the numbers calculated from the events
         if player_name in game.game_data['opponents_info']:
@@ -712,6 +713,9 @@ def totalsvg(df, game, players_info, average=False, team_logo_img=None, width=80
     
     players_by_number = [x[0] for x in sorted([[x[1]['name'],x[1]['number']] for x in players_info.items() if x[1]['games'] > 0], key=lambda x: int(x[1]))]
     players_numbers   = [x[1] for x in sorted([[x[1]['name'],x[1]['number']] for x in players_info.items() if x[1]['games'] > 0], key=lambda x: int(x[1]))]
+
+    # All the stats of the players calculated in a single pass on the events
+    st = Stats.table(df, players_info)
         
     height = 2.005*FORM_FACTOR*width    # 2 means that 1vw = 2vh in general screens
     
@@ -873,8 +877,8 @@ height="%fvh">''' % (svgwidth,svgheight, preserve, width,height)
             svg += text(XRIGHT, YLUOGO+2*hRigaTestata, 'Dati complessivi totali', align='end')
         
         # Total points scored
-        pt = Stats.points(df)
-        po = Stats.points(df, team=Config.OPPO)
+        pt = Stats.points(st)
+        po = Stats.points(st, team=Config.OPPO)
 
         svg += text(XSQUADRE, YSQUADRA1+0.7*hRigaTestata, game.team_data['name'].upper(), dim=dimSquadre, w=700)
         svg += text(XSQUADRE, YSQUADRA2+0.7*hRigaTestata, 'Squadre avversarie',           dim=dimSquadre, w=700)
@@ -1008,7 +1012,7 @@ height="%fvh">''' % (svgwidth,svgheight, preserve, width,height)
     # Punti realizzati
     y = y1
     for player_name in players_by_number:
-        points = Stats.points(df, player_name)
+        points = Stats.points(st, player_name)
         if points > 0:
             if average:
                 points /= players_info[player_name]['games']
@@ -1016,7 +1020,7 @@ height="%fvh">''' % (svgwidth,svgheight, preserve, width,height)
             else:
                 svg += text(XPUNTI, y, str(points), align='middle', w=700)
         y += hRiga
-    t = Stats.points(df)
+    t = Stats.points(st)
     if t > 0:
         if average:
             t /= tot_games
@@ -1027,12 +1031,12 @@ height="%fvh">''' % (svgwidth,svgheight, preserve, width,height)
     # T2
     y = y1
     for player_name in players_by_number:
-        s,p = Stats.tperc(df, player_name, throw=2)
+        s,p = Stats.tperc(st, player_name, throw=2)
         if len(s) > 0:
             svg += text(X2P-0.7, y, s)
             svg += text(X2P_PERC+0.15, y, p, align='end')
         y += hRiga
-    s,p = Stats.tperc(df, throw=2)
+    s,p = Stats.tperc(st, throw=2)
     if len(s) > 0:
         svg += text(X2P-0.8, ysum, s, color='white', dim=0.23)
         svg += text(X2P_PERC+0.15, ysum, p, align='end', color='white', dim=0.23)
@@ -1040,12 +1044,12 @@ height="%fvh">''' % (svgwidth,svgheight, preserve, width,height)
     # T3
     y = y1
     for player_name in players_by_number:
-        s,p = Stats.tperc(df, player_name, throw=3)
+        s,p = Stats.tperc(st, player_name, throw=3)
         if len(s) > 0:
             svg += text(X3P-0.7, y, s)
             svg += text(X3P_PERC+0.15, y, p, align='end')
         y += hRiga
-    s,p = Stats.tperc(df, throw=3)
+    s,p = Stats.tperc(st, throw=3)
     if len(s) > 0:
         svg += text(X3P-0.85, ysum, s, color='white', dim=0.23)
         svg += text(X3P_PERC+0.15, ysum, p, align='end', color='white', dim=0.23)
@@ -1053,12 +1057,12 @@ height="%fvh">''' % (svgwidth,svgheight, preserve, width,height)
     # T2 + T3
     y = y1
     for player_name in players_by_number:
-        s,p = Stats.tperc(df, player_name, throw=0)
+        s,p = Stats.tperc(st, player_name, throw=0)
         if len(s) > 0:
             svg += text(XTOTTIRI-0.7, y, s)
             svg += text(XTOT_PERC+0.15, y, p, align='end')
         y += hRiga
-    s,p = Stats.tperc(df, throw=0)
+    s,p = Stats.tperc(st, throw=0)
     if len(s) > 0:
         svg += text(XTOTTIRI-0.8, ysum, s, color='white', dim=0.23)
         svg += text(XTOT_PERC+0.15, ysum, p, align='end', color='white', dim=0.23)
@@ -1066,12 +1070,12 @@ height="%fvh">''' % (svgwidth,svgheight, preserve, width,height)
     # T1
     y = y1
     for player_name in players_by_number:
-        s,p = Stats.tperc(df, player_name, throw=1)
+        s,p = Stats.tperc(st, player_name, throw=1)
         if len(s) > 0:
             svg += text(X1P-0.7, y, s)
             svg += text(X1P_PERC+0.15, y, p, align='end')
         y += hRiga
-    s,p = Stats.tperc(df, throw=1)
+    s,p = Stats.tperc(st, throw=1)
     if len(s) > 0:
         svg += text(X1P-0.85, ysum, s, color='white', dim=0.23)
         svg += text(X1P_PERC+0.15, ysum, p, align='end', color='white', dim=0.23)
@@ -1080,7 +1084,7 @@ height="%fvh">''' % (svgwidth,svgheight, preserve, width,height)
     # ASSIST
     y = y1
     for player_name in players_by_number:
-        v = Stats.countforplayer(df,player_name,'Ass')
+        v = Stats.countforplayer(st,player_name,'Ass')
         if v > 0:
             if average:
                 v /= players_info[player_name]['games']
@@ -1088,7 +1092,7 @@ height="%fvh">''' % (svgwidth,svgheight, preserve, width,height)
             else:
                 svg += text(XASSIST, y, str(v), align='middle')
         y += hRiga
-    t = Stats.countforteam(df,'Ass')
+    t = Stats.countforteam(st,'Ass')
     if t > 0:
         if average:
             t /= tot_games
@@ -1099,14 +1103,14 @@ height="%fvh">''' % (svgwidth,svgheight, preserve, width,height)
     # RIMBALZI
     y = y1
     for player_name in players_by_number:
-        vo = Stats.countforplayer(df,player_name,'ROff')
+        vo = Stats.countforplayer(st,player_name,'ROff')
         if vo > 0: 
             if average:
                 svg += text(XROFF, y, '%.1f'%(vo/players_info[player_name]['games']), align='middle')
             else:
                 svg += text(XROFF, y, str(vo), align='middle')
         
-        vd = Stats.countforplayer(df,player_name,'RDif')
+        vd = Stats.countforplayer(st,player_name,'RDif')
         if vd > 0:
             if average:
                 svg += text(XRDIF, y, '%.1f'%(vd/players_info[player_name]['games']), align='middle')
@@ -1121,14 +1125,14 @@ height="%fvh">''' % (svgwidth,svgheight, preserve, width,height)
                 svg += text(XRTOT, y, str(vd+vo), align='middle')
         
         y += hRiga
-    to = Stats.countforteam(df,'ROff')
+    to = Stats.countforteam(st,'ROff')
     if to > 0:
         if average:
             svg += text(XROFF, ysum, '%.1f'%(to/tot_games), align='middle', color='white', dim=0.23)
         else:
             svg += text(XROFF, ysum, str(to), align='middle', color='white', dim=0.23)
         
-    td = Stats.countforteam(df,'RDif')
+    td = Stats.countforteam(st,'RDif')
     if to > 0:
         if average:
             svg += text(XRDIF, ysum, '%.1f'%(td/tot_games), align='middle', color='white', dim=0.23)
@@ -1146,14 +1150,14 @@ height="%fvh">''' % (svgwidth,svgheight, preserve, width,height)
     # FALLI
     y = y1
     for player_name in players_by_number:
-        v = Stats.countforplayer(df,player_name,'FCom')
+        v = Stats.countforplayer(st,player_name,'FCom')
         if v > 0:
             if average:
                 svg += text(XFATTI, y, '%.1f'%(v/players_info[player_name]['games']), align='middle')
             else:
                 svg += text(XFATTI, y, str(v), align='middle')
         
-        v = Stats.countforplayer(df,player_name,'FSub')
+        v = Stats.countforplayer(st,player_name,'FSub')
         if v > 0:
             if average:
                 svg += text(XSUBITI, y, '%.1f'%(v/players_info[player_name]['games']), align='middle')
@@ -1162,14 +1166,14 @@ height="%fvh">''' % (svgwidth,svgheight, preserve, width,height)
         
         y += hRiga
     
-    t = Stats.countforteam(df,'FCom')
+    t = Stats.countforteam(st,'FCom')
     if t > 0:
         if average:
             svg += text(XFATTI-0.05, ysum, '%.1f'%(t/tot_games), align='middle', color='white', dim=0.23)
         else:
             svg += text(XFATTI-0.05, ysum, str(t), align='middle', color='white', dim=0.23)
     
-    t = Stats.countforteam(df,'FSub')
+    t = Stats.countforteam(st,'FSub')
     if t > 0:
         if average:
             svg += text(XSUBITI+0.02, ysum, '%.1f'%(t/tot_games), align='middle', color='white', dim=0.23)
@@ -1180,14 +1184,14 @@ height="%fvh">''' % (svgwidth,svgheight, preserve, width,height)
     # PALLE PERSE E RECUPERATE
     y = y1
     for player_name in players_by_number:
-        v = Stats.countforplayer(df,player_name,'PRec')
+        v = Stats.countforplayer(st,player_name,'PRec')
         if v > 0:
             if average:
                 svg += text(XPREC, y, '%.1f'%(v/players_info[player_name]['games']), align='middle')
             else:
                 svg += text(XPREC, y, str(v), align='middle')
         
-        v = Stats.countforplayer(df,player_name,'PPer')
+        v = Stats.countforplayer(st,player_name,'PPer')
         if v > 0:
             if average:
                 svg += text(XPPER, y, '%.1f'%(v/players_info[player_name]['games']), align='middle')
@@ -1196,14 +1200,14 @@ height="%fvh">''' % (svgwidth,svgheight, preserve, width,height)
         
         y += hRiga
     
-    t = Stats.countforteam(df,'PRec')
+    t = Stats.countforteam(st,'PRec')
     if t > 0:
         if average:
             svg += text(XPREC-0.05, ysum, '%.1f'%(t/tot_games), align='middle', color='white', dim=0.23)
         else:
             svg += text(XPREC-0.05, ysum, str(t), align='middle', color='white', dim=0.23)
         
-    t = Stats.countforteam(df,'PPer')
+    t = Stats.countforteam(st,'PPer')
     if t > 0:
         if average:
             svg += text(XPPER+0.02, ysum, '%.1f'%(t/tot_games), align='middle', color='white', dim=0.23)
@@ -1214,14 +1218,14 @@ height="%fvh">''' % (svgwidth,svgheight, preserve, width,height)
     # STOPPATE
     y = y1
     for player_name in players_by_number:
-        v = Stats.countforplayer(df,player_name,'SDat')
+        v = Stats.countforplayer(st,player_name,'SDat')
         if v > 0:
             if average:
                 svg += text(XSTOFA, y, '%.1f'%(v/players_info[player_name]['games']), align='middle')
             else:
                 svg += text(XSTOFA, y, str(v), align='middle')
         
-        v = Stats.countforplayer(df,player_name,'SSub')
+        v = Stats.countforplayer(st,player_name,'SSub')
         if v > 0:
             if average:
                 svg += text(XSTOSU+0.02, y, '%.1f'%(v/players_info[player_name]['games']), align='middle')
@@ -1230,14 +1234,14 @@ height="%fvh">''' % (svgwidth,svgheight, preserve, width,height)
         
         y += hRiga
     
-    t = Stats.countforteam(df,'SDat')
+    t = Stats.countforteam(st,'SDat')
     if t > 0:
         if average:
             svg += text(XSTOFA-0.02, ysum, '%.1f'%(t/tot_games), align='middle', color='white', dim=0.23)
         else:
             svg += text(XSTOFA-0.02, ysum, str(t), align='middle', color='white', dim=0.23)
         
-    t = Stats.countforteam(df,'SSub')
+    t = Stats.countforteam(st,'SSub')
     if t > 0:
         if average:
             svg += text(XSTOSU+0.02, ysum, '%.1f'%(t/tot_games), align='middle', color='white', dim=0.23)
@@ -1249,13 +1253,13 @@ height="%fvh">''' % (svgwidth,svgheight, preserve, width,height)
     y = y1
     for player_name in players_by_number:
         if players_info[player_name]['time_on_field'] > 0:
-            v = Stats.value(df, player_name)
+            v = Stats.value(st, player_name)
             if average:
                 svg += text(XVAL, y, '%.1f'%(v/players_info[player_name]['games']), align='middle')
             else:
                 svg += text(XVAL, y, str(v), align='middle')
         y += hRiga
-    t = Stats.value(df)
+    t = Stats.value(st)
     if average:
         svg += text(XVAL, ysum, '%.1f'%(t/tot_games), align='middle', color='white', dim=0.23)        
     else:
@@ -1265,18 +1269,18 @@ height="%fvh">''' % (svgwidth,svgheight, preserve, width,height)
     y = y1
     for player_name in players_by_number:
         if players_info[player_name]['time_on_field'] > 0:
-            svg += text(XOER, y, '%.2f'%Stats.oer(df, player_name), align='middle')
+            svg += text(XOER, y, '%.2f'%Stats.oer(st, player_name), align='middle')
         y += hRiga
-    t = Stats.oer(df)
+    t = Stats.oer(st)
     if t > 0: svg += text(XOER, ysum, '%.2f'%t, align='middle', color='white', dim=0.23)
         
     # Valutazione VIR
     y = y1
     for player_name in players_by_number:
         if players_info[player_name]['time_on_field'] > 0:
-            svg += text(XVIR, y, '%.2f'%Stats.vir(df, player_name, players_info), align='middle')
+            svg += text(XVIR, y, '%.2f'%Stats.vir(st, player_name, players_info), align='middle')
         y += hRiga
-    t = Stats.vir(df, players_info=players_info)
+    t = Stats.vir(st, players_info=players_info)
     if t > 0: svg += text(XVIR, ysum, '%.2f'%t, align='middle', color='white', dim=0.23)
 
     # Valutazione PlusMinus
@@ -1292,9 +1296,9 @@ height="%fvh">''' % (svgwidth,svgheight, preserve, width,height)
     y = y1
     for player_name in players_by_number:
         if players_info[player_name]['time_on_field'] > 0:
-            svg += text(XTRUE, y, '%.1f'%Stats.trueshooting(df, player_name), align='middle')
+            svg += text(XTRUE, y, '%.1f'%Stats.trueshooting(st, player_name), align='middle')
         y += hRiga
-    t = Stats.trueshooting(df)
+    t = Stats.trueshooting(st)
     if t > 0: svg += text(XTRUE, ysum, '%.1f'%t, align='middle', color='white', dim=0.23)
         
     
@@ -1327,10 +1331,11 @@ height="%fvh">''' % (svgwidth,svgheight, preserve, width,height)
 ###########################################################################################################################################################################
 def summary(df, game):
     home = game.game_data['home']
+    st = Stats.table(df)
     
     # Result
-    pt = Stats.points(df)
-    po = Stats.points(df, team=Config.OPPO)
+    pt = Stats.points(st)
+    po = Stats.points(st, team=Config.OPPO)
     if home:
         t1 = game.team_data['name'] + ' - ' + game.game_data['opponents'] + '  ' + str(pt) + '-' + str(po)
     else:
@@ -1345,7 +1350,7 @@ def summary(df, game):
     pt = []
     po = []
     for player_name in game.players_by_number:
-        points = Stats.points(df, player_name)
+        points = Stats.points(st, player_name)
         if game.players_info[player_name]['time_on_field'] <= 0.0:
             pt.append('%s ne'%player_name)
         else:
@@ -1353,7 +1358,7 @@ def summary(df, game):
             else:          pt.append(player_name)
         
     for player_name in game.opponents_by_number:
-        points = Stats.points(df, player_name, team=Config.OPPO)
+        points = Stats.points(st, player_name, team=Config.OPPO)
         
         # Recover opponent points from the game if greater than the numbers calculated from the events
         if player_name in game.game_data['opponents_info']:
@@ -1398,12 +1403,12 @@ def summary(df, game):
     ft = []
     fo = []
     for player_name in game.players_by_number:
-        f = Stats.fouls(df, player_name)
+        f = Stats.fouls(st, player_name)
         if f >= 5:                       
             ft.append(player_name)
         
     for player_name in game.opponents_by_number:
-        f = Stats.fouls(df, player_name, team=Config.OPPO)
+        f = Stats.fouls(st, player_name, team=Config.OPPO)
         if f >= 5:                       
             fo.append(player_name)
     
@@ -1430,8 +1435,10 @@ def summary(df, game):
 ###########################################################################################################################################################################
 # Returns the points chart as a Plotly Figure
 ###########################################################################################################################################################################
-def pointsChart(df, game, height_in_pixels=600, template='plotly_dark'):
+def pointsChart(df, game, height_in_pixels=600, template='plotly_dark', gameover=None):   # gameover=None reads the status from the overall board of the game
 
+    if gameover is None: gameover = game.board.tb.gameover
+    
     d = datetime.datetime.today()
 
     def seconds2datetime(seconds):
@@ -1610,31 +1617,31 @@ def pointsChart(df, game, height_in_pixels=600, template='plotly_dark'):
         fig.add_vline(x=x, line_width=2, line_dash="dash", line_color=line_color)
         if len(ppq) > 2: fig.add_annotation(x=xt, y=pmax, text=ppq[2], showarrow=False)
         
-    if mmax >= 40 or game.board.tb.gameover:
+    if mmax >= 40 or gameover:
         xt = datetime.datetime(d.year, d.month, d.day, 0, 35, 0)
         x  = datetime.datetime(d.year, d.month, d.day, 0, 40, 0)
         fig.add_vline(x=x, line_width=2, line_dash="dash", line_color=line_color)
         if len(ppq) > 3: fig.add_annotation(x=xt, y=pmax, text=ppq[3], showarrow=False)
         
-    if mmax >= 45 or game.board.tb.gameover:
+    if mmax >= 45 or gameover:
         xt = datetime.datetime(d.year, d.month, d.day, 0, 42, 30)
         x  = datetime.datetime(d.year, d.month, d.day, 0, 45, 0)
         fig.add_vline(x=x, line_width=2, line_dash="dash", line_color=line_color)
         if len(ppq) > 4: fig.add_annotation(x=xt, y=pmax, text=ppq[4], showarrow=False)
         
-    if mmax >= 50 or game.board.tb.gameover:
+    if mmax >= 50 or gameover:
         xt = datetime.datetime(d.year, d.month, d.day, 0, 47, 30)
         x  = datetime.datetime(d.year, d.month, d.day, 0, 50, 0)
         fig.add_vline(x=x, line_width=2, line_dash="dash", line_color=line_color)
         if len(ppq) > 5: fig.add_annotation(x=xt, y=pmax, text=ppq[5], showarrow=False)
         
-    if mmax >= 55 or game.board.tb.gameover:
+    if mmax >= 55 or gameover:
         xt = datetime.datetime(d.year, d.month, d.day, 0, 52, 30)
         x  = datetime.datetime(d.year, d.month, d.day, 0, 55, 0)
         fig.add_vline(x=x, line_width=2, line_dash="dash", line_color=line_color)
         if len(ppq) > 6: fig.add_annotation(x=xt, y=pmax, text=ppq[6], showarrow=False)
         
-    if mmax >= 60 or game.board.tb.gameover:
+    if mmax >= 60 or gameover:
         xt = datetime.datetime(d.year, d.month, d.day, 0, 57, 30)
         x  = datetime.datetime(d.year, d.month, d.day, 1,  0, 0)
         fig.add_vline(x=x, line_width=2, line_dash="dash", line_color=line_color)
@@ -0,0 +1,156 @@
+"""Catalog of the games of a data folder"""
+# Author(s): Davide.De-Marchi@ec.europa.eu
+# Copyright © European Union 2024-2025
+# 
+# Licensed under the EUPL, Version 1.2 or as soon they will be approved by 
+# the European Commission subsequent versions of the EUPL (the "Licence");
+# 
+# You may not use this work except in compliance with the Licence.
+# 
+# You may obtain a copy of the Licence at:
+# https://joinup.ec.europa.eu/collection/eupl/eupl-text-eupl-12
+
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the Licence is distributed on an "AS IS"
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either
+# express or implied.
+# 
+# See the Licence for the specific language governing permissions and
+# limitations under the Licence.
+import os
+import json
+
+# local imports
+import GameFile
+
+
+# Name of the catalog file written in the data folder
+CATALOG_FILE = 'catalog.json'
+
+# Version of the catalog file (entries of catalogs with a different version are discarded)
+CATALOG_VERSION = 3
+
+# Keys of the game_data copied in the entries of the catalog
+GAME_KEYS = ['date', 'time', 'season', 'championship', 'phase', 'round', 'home', 'opponents', 'abbreviation', 'location', 'status']
+
+
+# Conversion to int without errors
+def toint(x):
+    try:
+        return int(x)
+    except:
+        return 999999
+    
+
+###########################################################################################################################################################################
+# Catalog: persistent index of the games of a data folder stored in <folder>/catalog.json. For each game file it contains the round and the phase parsed from
+# the name of the file, the main metadata of the game, its final status and the number of events, as they are after the replay of the journal of the game.
+# Only the entries of the files whose fingerprint (mtime and size of the game file and of its journal) changed are refreshed by reading the game file, so the
+# list of the games of a season (and their scores) is available without parsing all the files
+###########################################################################################################################################################################
+class Catalog():
+
+    def __init__(self, folder='./data'):   # Folder containing the game files
+        self.folder  = folder
+        self.file    = os.path.join(folder, CATALOG_FILE)
+        self.entries = {}                     # Name of the game file (without folder) --> dict of the metadata
+        
+        if os.path.isfile(self.file):
+            try:
+                with open(self.file, encoding='utf-8') as f:
+                    data = json.load(f)
+                if data.get('version') == CATALOG_VERSION:
+                    self.entries = data['games']
+            except:
+                self.entries = {}
+                
+        self.refresh()
+        
+        
+    # Update the entries of the files added or modified and remove those of the files deleted. Returns True if the catalog was changed
+    def refresh(self):
+        changed = False
+        names = set()
+        for file in GameFile.gameFiles(self.folder):
+            name = os.path.basename(file)
+            names.add(name)
+            
+            fingerprint = GameFile.fingerprint(file)
+            entry = self.entries.get(name)
+            if entry is None or entry['fingerprint'] != fingerprint:
+                self.entries[name] = self.readEntry(file, fingerprint)
+                changed = True
+                
+        for name in list(self.entries.keys()):
+            if name not in names:
+                del self.entries[name]
+                changed = True
+                
+        if changed:
+            self.save()
+        return changed
+    
+    
+    # Returns the entry of the catalog for a game file
+    def readEntry(self, file, fingerprint=None):
+        if fingerprint is None: fingerprint = GameFile.fingerprint(file)
+        name = os.path.basename(file)
+        entry = { 'fingerprint': fingerprint, 'name': GameFile.gameName(file) }
+        
+        # Round and phase as parsed from the file name (i.e. '1.a-Andata-OPPONENTS.game')
+        entry['file_round'] = toint(name.split('.')[0])
+        entry['file_phase'] = name.split('-')[1] if '-' in name else ''
+        
+        try:
+            game_data = GameFile.readGame(file)
+            
+            # Records of the journal written after the last snapshot of the game
+            seq = game_data.get('journal_seq', 0)
+            records = GameFile.Journal(file, seq).read(seq)
+            GameFile.Journal.replayState(records, game_data)
+        except:
+            entry['error'] = True
+            return entry
+        
+        for key in GAME_KEYS:
+            if key in game_data:
+                entry[key] = game_data[key]
+                
+        # Number of events (the journal records only the removals of existing events)
+        events = game_data.get('events')
+        if isinstance(events, dict): entry['events'] = len(events.get('rows', []))
+        elif events is not None:     entry['events'] = len(events)
+        else:                        entry['events'] = 0
+        entry['events'] += sum([1 if r['op'] == 'add' else -1 for r in records if r['op'] in ['add', 'removelast', 'remove']])
+        return entry
+    
+    
+    # Write the catalog file
+    def save(self):
+        GameFile.writeAtomic(self.file, GameFile.dumps({ 'version': CATALOG_VERSION, 'games': self.entries }))
+        
+        
+    # Returns the path of a game file given its name
+    def path(self, name):
+        return '%s/%s'%(self.folder, name)
+    
+    
+    # Returns the phases of the games as found in the file names (sorted alphabetically)
+    def phases(self):
+        return sorted(list(set([e['file_phase'] for name, e in self.entries.items() if '-' in name and '.a-' in name])))
+    
+    
+    # Returns the list of the paths of the game files of a phase (or of all the games if phase is None), sorted on increasing round
+    def files(self, phase=None):
+        return [self.path(name) for name, e in self.games(phase)]
+    
+    
+    # Returns the list of the (name, entry) of the games of a phase (or of all the games if phase is None), sorted on increasing round
+    def games(self, phase=None):
+        items = [(e['file_round'], self.path(name), name, e) for name, e in self.entries.items() if phase is None or e['file_phase'] == phase]
+        return [(name, e) for r, path, name, e in sorted(items, key=lambda x: (x[0], x[1]))]
+        
+        
+    # Returns the entry of a game file (or None if the file is not in the catalog)
+    def entry(self, file):
+        return self.entries.get(os.path.basename(file))
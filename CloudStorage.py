@@ -28,6 +28,9 @@ import json
 import uuid
 import os
 
+# local imports
+import GameFile
+
 
 ###########################################################################################################################################################################
 # CloudStorage
@@ -104,7 +107,7 @@ class CloudStorage():
                 contents = metadata['contents']
                 self.folderpath = folderpath
                 for c in contents:
-                    if not c['isfolder'] and 'name' in c and 'id' in c and c['name'][-5:] == '.game':
+                    if not c['isfolder'] and 'name' in c and 'id' in c and GameFile.isGameFile(c['name']):
                         self.gamefiles_names.append(c['name'])
                         self.gamefiles_ids.append(int(c['id'][1:]))
                     elif not c['isfolder'] and 'name' in c and 'id' in c and c['name'][-5:] == '.team':
@@ -113,21 +116,27 @@ class CloudStorage():
         
         
 
-    # Read a file from the cloud storage
-    def read(self, fileid, filename):
+    # Read the bytes of a file from the cloud storage (compressed game files are returned as they are stored)
+    def readBytes(self, fileid, filename):
         buffer = self.pc.getzip(fileids=[fileid])
         z = zipfile.ZipFile(io.BytesIO(buffer))
-        foo = z.read(filename)
-        data = json.loads( foo.decode() )
+        return z.read(filename)
+    
+    
+    # Read a file from the cloud storage (game files are decompressed according to their extension)
+    def read(self, fileid, filename):
+        foo = self.readBytes(fileid, filename)
+        data = GameFile.loads(foo, filename)
         return data
     
     
-    # Read data for a game: returns a dictionary
-    def readGame(self, gamefilename):
+    # Read data for a game: returns a dictionary, or the bytes of the file as they are stored (no decompression) if decode is False
+    def readGame(self, gamefilename, decode=True):
         if gamefilename in self.gamefiles_names:
             pos = self.gamefiles_names.index(gamefilename)
-            game = self.read(fileid=self.gamefiles_ids[pos], filename=gamefilename)
-            return game
+            if decode:
+                return self.read(fileid=self.gamefiles_ids[pos], filename=gamefilename)
+            return self.readBytes(fileid=self.gamefiles_ids[pos], filename=gamefilename)
         
         if self.pc is None:
             print('Not connected!')
@@ -147,7 +156,8 @@ class CloudStorage():
             print('Team file %s not found'%self.teamfile_name)
         
 
-    # Write data for a game
+    # Write data for a game: gamedata is a dictionary (written in compact JSON, compressed according to the extension of the file) or the bytes of a game file
+    # read with readGame(decode=False) or from a local file (uploaded as they are, without recompression)
     def writeGame(self, gamefilename, gamedata):
         if self.pc is None:
             print('Not connected!')
@@ -158,8 +168,12 @@ class CloudStorage():
             filepath = '/tmp/' + gamefilename
 
             try:
-                with open(filepath, 'w', encoding='utf-8') as f:
-                    json.dump(gamedata, f, ensure_ascii=False, indent=4)
+                if isinstance(gamedata, bytes):
+                    data = gamedata
+                else:
+                    data = GameFile.compress(GameFile.dumps(gamedata).encode('utf-8'), gamefilename)
+                with open(filepath, 'wb') as f:
+                    f.write(data)
 
                 self.pc.uploadfile(files=[filepath], path=self.folderpath, nopartial='1')
                 
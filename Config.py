@@ -184,3 +184,16 @@ EVENTS = [
     {'id': 19, 'name': EVENT_NAME[19], 'value': EVENT_VALUE[19], 'team': EVENT_TEAM[19], 'row': 2, 'description': EVENT_DESCRIPTION[19] },
     {'id': 20, 'name': EVENT_NAME[20], 'value': EVENT_VALUE[20], 'team': EVENT_TEAM[20], 'row': 0, 'description': EVENT_DESCRIPTION[20] },
 ]
+
+
+###########################################################################################################################################################################
+# Saving of the games
+###########################################################################################################################################################################
+
+# If True the events and the status of the game are appended to a journal file (<game_file>.journal) and the full .game file is rewritten only at the end
+# of each quarter, at game over or on explicit save. If False the full .game file is rewritten every time the clock is stopped
+JOURNAL = True
+
+# Extension of the files of the new games: '.game' (plain JSON), '.game.gz' (gzip) or '.game.zst' (zstandard, if installed). Existing games are always saved
+# in the format of the file they were loaded from
+GAME_EXTENSION = '.game'
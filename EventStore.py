@@ -0,0 +1,280 @@
+"""Columnar store of the events of a game"""
+# Author(s): Davide.De-Marchi@ec.europa.eu
+# Copyright © European Union 2024-2025
+# 
+# Licensed under the EUPL, Version 1.2 or as soon they will be approved by 
+# the European Commission subsequent versions of the EUPL (the "Licence");
+# 
+# You may not use this work except in compliance with the Licence.
+# 
+# You may obtain a copy of the Licence at:
+# https://joinup.ec.europa.eu/collection/eupl/eupl-text-eupl-12
+
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the Licence is distributed on an "AS IS"
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either
+# express or implied.
+# 
+# See the Licence for the specific language governing permissions and
+# limitations under the Licence.
+import pandas as pd
+import numpy as np
+import itertools
+
+# local imports
+import Config
+
+
+# Columns of the events DataFrame
+COLUMNS = ['team', 'player', 'event', 'event_name', 'event_description', 'quarter', 'seconds', 'x', 'y', 'time']
+
+# Columns stored in the arrays and their dtype (team and player are stored as integer codes, event_name and event_description are derived from the event code)
+STORED = ['team', 'player', 'event', 'quarter', 'seconds', 'x', 'y', 'time']
+DTYPES = {
+    'team':    np.int32,
+    'player':  np.int32,
+    'event':   np.int64,
+    'quarter': np.int64,
+    'seconds': np.float64,
+    'x':       np.float64,
+    'y':       np.float64,
+    'time':    object
+}
+
+# Columns stored as codes of a list of categories
+CATEGORICAL = ['team', 'player']
+
+# Categories of the event_name and event_description columns (the event code is the index in the lists)
+EVENT_NAMES        = [Config.EVENT_NAME[x]        for x in sorted(Config.EVENT_NAME.keys())]
+EVENT_DESCRIPTIONS = [Config.EVENT_DESCRIPTION[x] for x in sorted(Config.EVENT_DESCRIPTION.keys())]
+
+# Initial capacity of the arrays (doubled every time it is reached)
+INITIAL_CAPACITY = 512
+
+# Source of the versions of the stores: the versions are unique among all the stores, so that a version identifies a set of events also across the loads of games
+_versions = itertools.count(1)
+
+
+###########################################################################################################################################################################
+# EventStore: the events of a game are stored in preallocated numpy arrays (one for each column) that double their capacity when full, so that appending an
+# event costs O(1) amortized instead of the O(n) copy of the pandas enlargement with df.loc[evid]. For each (team, player, event) a stack of the positions of
+# the events is kept, so that the last event of a player can be removed in O(1). Removed events are marked as dead and compacted when the DataFrame is requested.
+# The DataFrame has categorical team, player, event_name and event_description columns and integer event codes
+###########################################################################################################################################################################
+class EventStore():
+
+    def __init__(self, events_df=None):   # Events DataFrame to initialize the store from
+        self.load(events_df)
+
+
+    # Load the events from a DataFrame (or clear the store if events_df is None)
+    def load(self, events_df=None):
+        if events_df is None or events_df.shape[0] == 0:
+            n = 0
+        else:
+            n = events_df.shape[0]
+
+        self.capacity   = max(INITIAL_CAPACITY, 2*n)
+        self.arrays     = { c: np.empty(self.capacity, dtype=DTYPES[c]) for c in STORED }
+        self.ids        = np.empty(self.capacity, dtype=np.int64)
+        self.alive      = np.ones(self.capacity, dtype=bool)
+        self.categories = { c: [] for c in CATEGORICAL }   # List of the values of the team and player columns
+        self.codes      = { c: {} for c in CATEGORICAL }   # Value --> code for the team and player columns
+
+        if n > 0:
+            for c in STORED:
+                if c in CATEGORICAL:
+                    codes, uniques = pd.factorize(events_df[c])
+                    self.categories[c] = list(uniques)
+                    self.codes[c] = { x: i for i, x in enumerate(self.categories[c]) }
+                    self.arrays[c][:n] = codes
+                elif c in events_df.columns:
+                    self.arrays[c][:n] = events_df[c].to_numpy()
+                elif c == 'time':
+                    self.arrays[c][:n] = ''
+                else:
+                    self.arrays[c][:n] = 0
+            self.ids[:n] = events_df.index.to_numpy()
+
+        self.n    = n       # Number of rows used in the arrays (dead rows included)
+        self.dead = 0       # Number of rows removed and not yet compacted
+        self.version = next(_versions)  # Changed at every change of the events
+        self._df = None     # DataFrame cached for the current version
+        self._viewed = 0    # Number of rows shared with the last DataFrame returned
+
+        self._buildStacks()
+
+
+    # Number of events stored
+    def __len__(self):
+        return self.n - self.dead
+
+
+    # Returns the code of a value of a categorical column (adding it to the categories if not already present)
+    def _code(self, column, value):
+        codes = self.codes[column]
+        if value not in codes:
+            codes[value] = len(self.categories[column])
+            self.categories[column].append(value)
+        return codes[value]
+
+
+    # Returns the key of the stacks for a position
+    def _key(self, pos):
+        return (int(self.arrays['team'][pos]), int(self.arrays['player'][pos]), int(self.arrays['event'][pos]))
+
+
+    # Build the stacks of positions for each (team, player, event)
+    def _buildStacks(self):
+        self.stacks = {}
+        for pos in range(self.n):
+            if self.alive[pos]:
+                self.stacks.setdefault(self._key(pos), []).append(pos)
+
+
+    # Double the capacity of the arrays (also used to avoid writing on rows shared with a DataFrame already returned)
+    def _grow(self, capacity=None):
+        if capacity is None: capacity = 2*self.capacity
+        for c in STORED:
+            a = np.empty(capacity, dtype=DTYPES[c])
+            a[:self.n] = self.arrays[c][:self.n]
+            self.arrays[c] = a
+        ids = np.empty(capacity, dtype=np.int64)
+        ids[:self.n] = self.ids[:self.n]
+        self.ids = ids
+        alive = np.ones(capacity, dtype=bool)
+        alive[:self.n] = self.alive[:self.n]
+        self.alive = alive
+        self.capacity = capacity
+        self._viewed = 0
+
+
+    # Append an event given the list of values of the STORED columns. Returns the index of the event in the DataFrame
+    def append(self, values):
+        if self.n >= self.capacity:
+            self._grow()
+        elif self.n < self._viewed:
+            self._grow(self.capacity)
+
+        if self.n > 0: evid = int(self.ids[self.n-1]) + 1
+        else:          evid = 0
+
+        pos = self.n
+        for c, value in zip(STORED, values):
+            if c in CATEGORICAL:
+                value = self._code(c, value)
+            self.arrays[c][pos] = value
+        self.ids[pos]   = evid
+        self.alive[pos] = True
+        self.n += 1
+
+        self.stacks.setdefault(self._key(pos), []).append(pos)
+        self._changed()
+        return evid
+
+
+    # Remove the last event for a team/player/event_id. Returns the dict of the values of the event removed (or None if no event was found)
+    def removeLast(self, team, player_name, event_id):
+        stack = self.stacks.get((self.codes['team'].get(team), self.codes['player'].get(player_name), int(event_id)))
+        if not stack:
+            return None
+
+        pos = stack.pop()
+        row = self.row(pos)
+        self._kill(pos)
+        return row
+
+
+    # Remove an event given its index in the DataFrame. Returns the dict of the values of the event removed (or None if no event was found)
+    def remove(self, evid):
+        pos = int(np.searchsorted(self.ids[:self.n], evid))
+        if pos >= self.n or self.ids[pos] != evid or not self.alive[pos]:
+            return None
+
+        row = self.row(pos)
+        self.stacks[self._key(pos)].remove(pos)
+        self._kill(pos)
+        return row
+
+
+    # Returns the dict of the values of the event in a position
+    def row(self, pos):
+        row = { c: self.arrays[c][pos] for c in STORED }
+        for c in CATEGORICAL:
+            row[c] = self.categories[c][row[c]]
+        row['event_name']        = EVENT_NAMES[row['event']]
+        row['event_description'] = EVENT_DESCRIPTIONS[row['event']]
+        return row
+
+
+    # Mark a row as dead and truncate the dead rows at the end of the arrays
+    def _kill(self, pos):
+        self.alive[pos] = False
+        self.dead += 1
+        while self.n > 0 and not self.alive[self.n-1]:
+            self.n -= 1
+            self.dead -= 1
+            self.alive[self.n] = True
+        self._changed()
+
+
+    # Called at every change of the events
+    def _changed(self):
+        self.version = next(_versions)
+        self._df = None
+
+
+    # Remove the dead rows from the arrays
+    def _compact(self):
+        mask = self.alive[:self.n]
+        n = int(mask.sum())
+        capacity = max(INITIAL_CAPACITY, 2*n)
+        for c in STORED:
+            a = np.empty(capacity, dtype=DTYPES[c])
+            a[:n] = self.arrays[c][:self.n][mask]
+            self.arrays[c] = a
+        ids = np.empty(capacity, dtype=np.int64)
+        ids[:n] = self.ids[:self.n][mask]
+        self.ids      = ids
+        self.alive    = np.ones(capacity, dtype=bool)
+        self.capacity = capacity
+        self.n        = n
+        self.dead     = 0
+        self._viewed  = 0
+        self._buildStacks()
+
+
+    # Renumber the events from 0 (as they are indexed when loaded from a file)
+    def renumber(self):
+        if self.dead > 0:
+            self._compact()
+        else:
+            self._grow(self.capacity)
+        self.ids[:self.n] = np.arange(self.n)
+        self._changed()
+
+
+    # Returns the events as a pandas DataFrame. The DataFrame is built without copying the numeric arrays and it is cached until the next change of the events
+    @property
+    def df(self):
+        if self._df is None:
+            if self.dead > 0:
+                self._compact()
+
+            n = self.n
+            a = self.arrays
+            self._df = pd.DataFrame({
+                'team':              pd.Categorical.from_codes(a['team'][:n],   categories=self.categories['team']),
+                'player':            pd.Categorical.from_codes(a['player'][:n], categories=self.categories['player']),
+                'event':             a['event'][:n],
+                'event_name':        pd.Categorical.from_codes(a['event'][:n],  categories=EVENT_NAMES),
+                'event_description': pd.Categorical.from_codes(a['event'][:n],  categories=EVENT_DESCRIPTIONS),
+                'quarter':           a['quarter'][:n],
+                'seconds':           a['seconds'][:n],
+                'x':                 a['x'][:n],
+                'y':                 a['y'][:n],
+                'time':              a['time'][:n]
+            }, index=pd.Index(self.ids[:n]), copy=False)
+            self._viewed = n
+
+        return self._df
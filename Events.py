@@ -82,15 +82,6 @@ class Events(widgets.VBox):
 </style>
 '''))
             
-        # List of player events
-        if self.game.events_df is None:
-            self.df = pd.DataFrame(columns=['team', 'player', 'event', 'event_name', 'event_description', 'quarter', 'seconds', 'x', 'y', 'time'])
-             
-            # Add reference to events dataframe to the players instance
-            self.game.events_df = self.df
-        else:
-            self.df = self.game.events_df
-        
         self.createControls()
         
         if self.board.tb.gameover:
@@ -459,7 +450,7 @@ class Events(widgets.VBox):
         if self.board.quarter > 4: startseconds = 300.0
         df = self.df[(self.df['team']==Config.TEAM)&(self.df['quarter']==self.board.quarter)&(self.df['seconds']==startseconds)&(self.df['event']=='Entr')]
         for evid in df.index:
-            self.df.drop(evid, inplace=True)
+            self.game.removeEvent(evid)
         
         # Add 'Entr' event for the players on the field
         for player_name in self.game.on_field:
@@ -476,8 +467,6 @@ class Events(widgets.VBox):
             
     # Called when a game is loaded
     def on_game_loaded(self):
-        self.df = self.game.events_df
-
         self.board.player_selected = None
         self.on_player_selected()
         
@@ -485,22 +474,14 @@ class Events(widgets.VBox):
         
         
         
-    # Add an event to the pandas dataframe of events
+    # Add an event to the store of events
     def storeEvent(self, player_name, event_id, x=0, y=0, team=Config.TEAM):
-        if self.df.shape[0] > 0:
-            evid = max(self.df.index) + 1
-        else:
-            evid = 0
-
         if player_name is None:
             player_name = Config.TEAM
 
-        if not 'time' in self.df.columns:
-            self.df["time"] = ""
-            
         d = datetime.datetime.today()
             
-        self.df.loc[evid] = [team, player_name, event_id, Config.EVENT_NAME[event_id], Config.EVENT_DESCRIPTION[event_id], self.board.quarter, self.board.seconds, x, y, d.strftime('%Y-%m-%d %H:%M:%S')]
+        self.game.addEvent([team, player_name, event_id, self.board.quarter, self.board.seconds, x, y, d.strftime('%Y-%m-%d %H:%M:%S')])
         self.update(event_id)
         
         self.board.throwmap.updateThrows(self.df, self.board.player_selected, background=True)
@@ -511,12 +492,10 @@ class Events(widgets.VBox):
                 self.game.playerDisplayInfo(player_name)
 
         
-    # Remove last event for a team/player/event_id from the pandas dataframe of events
+    # Remove last event for a team/player/event_id from the store of events
     def removeLastEvent(self, player_name, event_id, team=Config.TEAM):
-        df = self.df[(self.df['team']==team)&(self.df['player']==player_name)&(self.df['event']==event_id)]
-        if df.shape[0] > 0:
-            evid = list(df.index)[-1]
-            self.df.drop(evid, inplace=True)
+        row = self.game.removeLastEvent(team, player_name, event_id)
+        if row is not None:
             self.update(event_id)
 
             self.board.throwmap.updateThrows(self.df, self.board.player_selected, background=True)
@@ -532,7 +511,6 @@ class Events(widgets.VBox):
         player_name, event_id, points = argument
         self.board.add_team_points(points)
         self.storeEvent(player_name, event_id, x=x, y=y)
-        self.board.throwmap.updateThrows(self.df, player_name)
         
     
     # Add an event
@@ -721,19 +699,19 @@ class Events(widgets.VBox):
     
     # Returns the list of the opponents player names that have at least one foul
     def opponentsWithFouls(self):
-        return list(self.df[(self.df['team']==Config.OPPO)&(self.df['event']==13)]['player'].unique())
+        return self.game.counters.players(13, team=Config.OPPO)
         
     # Returns the list of the opponents player names that have at least one free throw scored
     def opponentsWith1Point(self):
-        return list(self.df[(self.df['team']==Config.OPPO)&(self.df['event']==0)]['player'].unique())
+        return self.game.counters.players(0, team=Config.OPPO)
         
     # Returns the list of the opponents player names that have at least one 2 point throw scored
     def opponentsWith2Point(self):
-        return list(self.df[(self.df['team']==Config.OPPO)&(self.df['event']==2)]['player'].unique())
+        return self.game.counters.players(2, team=Config.OPPO)
     
     # Returns the list of the opponents player names that have at least one 3 point throw scored
     def opponentsWith3Point(self):
-        return list(self.df[(self.df['team']==Config.OPPO)&(self.df['event']==4)]['player'].unique())
+        return self.game.counters.players(4, team=Config.OPPO)
     
     
     # Add a time-out event for Team
@@ -756,22 +734,19 @@ class Events(widgets.VBox):
             plus  = self.plus_buttons[event_id]
             minus = self.minus_buttons[event_id]
 
-            player = self.board.player_selected
-            if player is None:
-                df = self.df[(self.df['team']==Config.TEAM)&(self.df['event']==event_id)]
-            else:
-                df = self.df[(self.df['team']==Config.TEAM)&(self.df['player']==player)&(self.df['event']==event_id)]
+            # Number of events read from the running counters of the game
+            n = self.game.counters.count(event_id, self.board.player_selected, team=Config.TEAM)
 
             if self.board.tb.gameover:
                 plus.disabled = True
             else:
                 plus.disabled = False
 
-            if df.shape[0] == 0:
+            if n == 0:
                 html.children = ['']
                 minus.disabled = True
             else:
-                html.children  = [str(df.shape[0])]
+                html.children  = [str(n)]
                 
                 if self.board.tb.gameover:
                     minus.disabled = True
@@ -783,6 +758,11 @@ class Events(widgets.VBox):
     # Properties
     ###########################################################################################################################################################################
         
+    # Pandas DataFrame of the events (view on the store of events of the game)
+    @property
+    def df(self):
+        return self.game.events_df
+    
     @property
     def scale(self):
         return self.board.scale
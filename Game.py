@@ -20,23 +20,20 @@
 from ipywidgets import widgets, HTML, Layout
 import ipyvuetify as v
 from PIL import Image
-import pandas as pd
-import json
-import datetime
 
 # vois imports
 from vois import colors, download
 from vois.vuetify import settings, dialogGeneric, selectMultiple
 
 # local imports
-import Config
-import Stats
+import GameModel
+import GameFile
 
 
 ###########################################################################################################################################################################
 # Game class
 ###########################################################################################################################################################################
-class Game():
+class Game(GameModel.GameModel):
     
     def __init__(self,
                  board,        # Instance of ScoreBoard class
@@ -44,48 +41,24 @@ class Game():
                  game_file):   # Path of the input Game file
         
         self.board = board     # Reference to the overall board
-        self.events_df = None  # Pandas DataFrame storing the events
         
-        self.team_logo_img = None
+        # Read team data and load the game from the game_file
+        super().__init__(team_file, game_file)
         
-        # Read team data
-        with open(team_file) as f:
-            self.team_data = json.load(f)
-            self.players_info = self.team_data['players']
-
-            if 'logo' in self.team_data:
-                self.team_logo_img = Image.open('./images/%s'%self.team_data['logo'])
-            
-            # Add 'time_on_field' to all players (if not already present)
-            for name,player in self.players_info.items():
-                if 'time_on_field' not in player:
-                    player['time_on_field'] = 0.0
-            
-            # Add 'plusminus' to all players (if not already present)
-            for name,player in self.players_info.items():
-                if 'plusminus' not in player:
-                    player['plusminus'] = 0
-                    
-            # Players sorted alphabetically by name
-            self.players_by_name = sorted(self.players_info.keys())
-
-            # Players sorted by number
-            self.players_by_number = [x[0] for x in sorted([[x[1]['name'],x[1]['number']] for x in self.players_info.items()], key=lambda x: int(x[1]))]
-            self.players_numbers   = [x[1] for x in sorted([[x[1]['name'],x[1]['number']] for x in self.players_info.items()], key=lambda x: int(x[1]))]
-            
-            # Cached players images
-            self.players_images = {}
-            for player_name in self.players_by_number:
-                try:
-                    img = Image.open('./images/%s.jpg'%player_name)
-                except:
-                    img = Image.open('./images/Unknown.jpg')
-                iw,ih = img.size
-                img = img.crop((0, 0, iw, iw))
-                self.players_images[player_name] = colors.image2Base64(img)
-
-        # Load the game from the game_file
-        self.loadGame(game_file)
+        # Logo of the team
+        if 'logo' in self.team_data:
+            self.team_logo_img = Image.open('./images/%s'%self.team_data['logo'])
+        
+        # Cached players images
+        self.players_images = {}
+        for player_name in [x['name'] for x in self.team_data['players'].values()]:
+            try:
+                img = Image.open('./images/%s.jpg'%player_name)
+            except:
+                img = Image.open('./images/Unknown.jpg')
+            iw,ih = img.size
+            img = img.crop((0, 0, iw, iw))
+            self.players_images[player_name] = colors.image2Base64(img)
         
         # Pre-create 30 cards for playersList and opponentsList calls (5onfield + 12players + 12opponents)
         w = '100px'
@@ -94,131 +67,10 @@ class Game():
             self.cards.append(v.Card(tile=True, color='#222222', children=[], outlined=False, elevation=0, width=w, height=w, class_='noselect d-flex flex-column', style_='overflow: hidden; border-width: 6px; border-color: yellow;'))
         
 
-    # Load a game from file
+    # Load a game from file and initialize the names of the teams on the overall board
     def loadGame(self, game_file):
-        
-        # Read game data
-        self.game_data = {}
-        self.game_file = game_file
-        if self.game_file is None:
-            self.game_data = {
-                                "date": datetime.datetime.today().strftime('%d/%m/%Y'),
-                                "time": "18:00",
-                                "season": "",
-                                "championship": "",
-                                "phase": "",
-                                "round": 1,
-                                "home": True,
-                                "opponents": "",
-                                "abbreviation": "",
-                                "referee1": "",
-                                "referee2": "",
-                                "location": "",
-                                "trainer": "",
-                                "opponents_info": {},
-                                "unavailable_players": [],
-                                "status": {
-                                    "quarter": 1,
-                                    "seconds": 600.0,
-                                    "gameover": True,
-                                    "points1": 0,
-                                    "points2": 0,
-                                    "fouls1": 0,
-                                    "fouls2": 0,
-                                    "timeouts1": 0,
-                                    "timeouts2": 0
-                                },
-                                "events": []
-                            }
-        else:
-            with open(self.game_file) as f:
-                self.game_data = json.load(f)
-                
-            # Fill missing info
-            if "opponents_info" not in self.game_data:
-                self.game_data["opponents_info"] = {}
-                
-            if "players_info" not in self.game_data:
-                self.game_data["players_info"] = self.team_data['players']
-
-            if "status" not in self.game_data:
-                self.game_data["status"] = {
-                    "quarter": 1,
-                    "seconds": 600.0,
-                    "gameover": False,
-                    "points1": 0,
-                    "points2": 0,
-                    "fouls1": 0,
-                    "fouls2": 0,
-                    "timeouts1": 0,
-                    "timeouts2": 0
-                }
-                
-            if "events" not in self.game_data:
-                self.game_data["events"] = []
-                
-            # Remove unavailable players
-            if 'unavailable_players' not in self.game_data:
-                self.game_data['unavailable_players'] = []
-
-        self.opponents_info = self.game_data['opponents_info']
-
-        # Add players_info to game_data (if not already present)
-        if 'players_info' in self.game_data:
-            self.players_info = self.game_data['players_info']
-        else:
-            self.game_data['players_info'] = self.players_info
-
-        # Players sorted alphabetically by name
-        self.players_by_name = sorted(self.players_info.keys())
-
-        # Players sorted by number
-        self.players_by_number = [x[0] for x in sorted([[x[1]['name'],x[1]['number']] for x in self.players_info.items()], key=lambda x: int(x[1]))]
-        self.players_numbers   = [x[1] for x in sorted([[x[1]['name'],x[1]['number']] for x in self.players_info.items()], key=lambda x: int(x[1]))]
-        self.removeUnavailablePlayers()
-
-        # Add 'fouls' and 'points' to opponents players (if not already present)
-        for name,player in self.opponents_info.items():
-            if 'fouls' not in player:
-                player['fouls'] = 0
-            if 'points' not in player:
-                player['points'] = 0
-
-        # Opponents sorted alphabetically by name
-        self.opponents_by_name = sorted(self.opponents_info.keys())
-
-        # Opponents sorted by number
-        self.opponents_by_number = [x[0] for x in sorted([[x[1]['name'],x[1]['number']] for x in self.opponents_info.items()], key=lambda x: int(x[1]))]
-
-        # Read events from the game
-        if 'events' in self.game_data:
-            self.events_df = pd.DataFrame.from_records(self.game_data['events'])
-            if len(self.events_df.columns) == 0:
-                self.events_df = pd.DataFrame(columns=['team', 'player', 'event', 'event_name', 'event_description', 'quarter', 'seconds', 'x', 'y', 'time'])
-        else:
-            self.events_df = pd.DataFrame(columns=['team', 'player', 'event', 'event_name', 'event_description', 'quarter', 'seconds', 'x', 'y', 'time'])
-                
-                
-        # Initialize other members of the overall board
-        if 'home' not in self.game_data:
-            self.game_data['home'] = True
-            
-        if self.game_data['home']:
-            self.board.team1_name = self.team_data['name']
-            self.board.team1_abbr = self.team_data['abbreviation']
-            self.board.team2_name = self.game_data['opponents']
-            self.board.team2_abbr = self.game_data['abbreviation']
-        else:
-            self.board.team1_name = self.game_data['opponents']
-            self.board.team1_abbr = self.game_data['abbreviation']
-            self.board.team2_name = self.team_data['name']
-            self.board.team2_abbr = self.team_data['abbreviation']
-
-        if 'on_field' in self.game_data:
-            self.on_field = self.game_data['on_field']
-        else:
-            self.on_field = ['']*5
-            self.game_data['on_field'] = self.on_field
+        super().loadGame(game_file)
+        self.board.team1_name, self.board.team1_abbr, self.board.team2_name, self.board.team2_abbr = self.teams()
             
     
     # Set the status of the overall board (quarter, seconds, points, fouls, timeouts, ...)
@@ -248,95 +100,10 @@ class Game():
                 self.board.tb.restarted = False
         
         
-    ###########################################################################################################################################################################
-    # Display info on top of throwmap background: points per quarter. Returns an array of strings
-    ###########################################################################################################################################################################
-    def pointsPerQuarter(self, showTotals=False):
-        
-        def qpoints(quarter):
-            if quarter <= 4: name = 'Q%d'%quarter
-            else:            name = 'S%d'%(quarter-4)
-        
-            df = self.events_df[self.events_df['quarter']==quarter]
-            dfteam = df[df['team']==Config.TEAM]
-            dfoppo = df[df['team']==Config.OPPO]
-            
-            T1ok = Stats.count(dfteam,'T1ok')
-            T2ok = Stats.count(dfteam,'T2ok')
-            T3ok = Stats.count(dfteam,'T3ok')
-            pTeam = T1ok + T2ok*2 + T3ok*3
-            
-            T1ok = Stats.count(dfoppo,'T1ok')
-            T2ok = Stats.count(dfoppo,'T2ok')
-            T3ok = Stats.count(dfoppo,'T3ok')
-            pOppo = T1ok + T2ok*2 + T3ok*3
-            
-            if showTotals and quarter > 1:
-                df = self.events_df[self.events_df['quarter']<=quarter]
-                dfteam = df[df['team']==Config.TEAM]
-                dfoppo = df[df['team']==Config.OPPO]
-
-                T1ok = Stats.count(dfteam,'T1ok')
-                T2ok = Stats.count(dfteam,'T2ok')
-                T3ok = Stats.count(dfteam,'T3ok')
-                pTeamTotal = T1ok + T2ok*2 + T3ok*3
-
-                T1ok = Stats.count(dfoppo,'T1ok')
-                T2ok = Stats.count(dfoppo,'T2ok')
-                T3ok = Stats.count(dfoppo,'T3ok')
-                pOppoTotal = T1ok + T2ok*2 + T3ok*3
-                
-                if self.game_data['home']:
-                    return '%s: %d - %d (%d - %d)'%(name,pTeam,pOppo,pTeamTotal,pOppoTotal)
-                else:
-                    return '%s: %d - %d (%d - %d)'%(name,pOppo,pTeam,pOppoTotal,pTeamTotal)
-            else:
-                if self.game_data['home']:
-                    return '%s: %d - %d'%(name,pTeam,pOppo)
-                else:
-                    return '%s: %d - %d'%(name,pOppo,pTeam)
-                    
-        
-        quarters = list(self.events_df['quarter'].unique())
-        return [qpoints(x) for x in quarters]
-        
-        
     ###########################################################################################################################################################################
     # Display info on top of player image
     ###########################################################################################################################################################################
 
-    # Returns a string displaying the field time of the player
-    def playerFieldTime(self, player_name):
-        if player_name in self.players_info:
-            seconds = self.players_info[player_name]['time_on_field']
-            return '  T: %d\'%02d"'%(seconds//60, int(seconds%60))
-        else:
-            return '  T: 0\'0"'
-        
-    # Returns a string displaying the points scored by a player
-    def playerPointScored(self, player_name):
-        return '  P: %d'%Stats.points(self.events_df, player_name)
-        
-    # Returns a string displaying the evaluation of a player
-    def playerValue(self, player_name):
-        return '  VAL: %d'%Stats.value(self.events_df, player_name)
-    
-    # Returns a string displaying the OER of a player
-    def playerOER(self, player_name):
-        return '  OER: %.2f'%Stats.oer(self.events_df, player_name)
-    
-    # Returns a string displaying the VIR of a player
-    def playerVIR(self, player_name):
-        return '  VIR: %.2f'%Stats.vir(self.events_df, player_name, self.players_info)
-    
-    # Returns a string displaying the plusminus of a player
-    def playerPlusMinus(self, player_name):
-        return '  +/-: %d'%Stats.plusminus(player_name, self.players_info)
-    
-    # Returns a string displaying the True Shooting Percentage of a player
-    def playerTrueShooting(self, player_name):
-        return '  TS: %.0f%%'%Stats.trueshooting(self.events_df, player_name)
-    
     # Retrieve string for the current additional info on a player image
     def playerInfo(self, player_name):
         if self.board.showOverImage == 'T':
@@ -375,47 +142,31 @@ class Game():
     ###########################################################################################################################################################################
     # Save game to file
     ###########################################################################################################################################################################
-    def saveGame(self, game_file=None, downloadGame=False):
-        
-        if isinstance(game_file, str):
-            self.game_file = game_file
+    
+    # Update the game status read from the overall board
+    def updateStatus(self):
+        super().updateStatus({
+            'quarter':   self.board.quarter,
+            'seconds':   self.board.tb.seconds,
+            'gameover':  self.board.tb.gameover,
+            'points1':   self.board.pb1.points,
+            'points2':   self.board.pb2.points,
+            'fouls1':    self.board.fb1.fouls,
+            'fouls2':    self.board.fb2.fouls,
+            'timeouts1': self.board.timeouts1,
+            'timeouts2': self.board.timeouts2
+        })
             
-        if isinstance(self.game_file, str):
-            txt = ''
-            with open(self.game_file, 'w') as file:
-
-                # Save game status read from the overall board
-                self.game_data['status'] = {
-                    'quarter':   self.board.quarter,
-                    'seconds':   self.board.tb.seconds,
-                    'gameover':  self.board.tb.gameover,
-                    'points1':   self.board.pb1.points,
-                    'points2':   self.board.pb2.points,
-                    'fouls1':    self.board.fb1.fouls,
-                    'fouls2':    self.board.fb2.fouls,
-                    'timeouts1': self.board.timeouts1,
-                    'timeouts2': self.board.timeouts2
-                }
-
-                # Save opponents_info
-                self.game_data['opponents_info'] = self.opponents_info
-                
-                if self.events_df is not None:
-                    sss = self.events_df.to_json(orient='records', lines=True).split('\n')
-                    self.game_data['events'] = [json.loads(x) for x in sss if len(x) > 4]
-                else:
-                    del self.game_data['events']
-
-                txt = json.dumps(self.game_data, indent=4, sort_keys=False)
-                file.write(txt)
-                
-            if downloadGame:
-                download.output.clear_output()
-                with download.output:
-                    download.downloadText(txt, fileName=self.game_file.replace('./data/','').replace('.game','.txt'))
-                download.output.clear_output()
             
+    # Save the full game to file (see GameModel.saveGame) and optionally download it as a pretty-printed text file
+    def saveGame(self, game_file=None, downloadGame=False, pretty=False):
+        txt = super().saveGame(game_file, pretty=pretty, text=downloadGame)
             
+        if txt is not None:
+            download.output.clear_output()
+            with download.output:
+                download.downloadText(txt, fileName=GameFile.gameName(self.game_file) + '.txt')
+            download.output.clear_output()
             
             
     ###########################################################################################################################################################################
@@ -574,25 +325,6 @@ class Game():
                                           fullscreen=False, content=[bw], output=self.board.output)
 
     
-    # Remove players that cannot be on the field
-    def removeUnavailablePlayers(self):
-        for player_name in self.game_data['unavailable_players']:
-
-            #if player_name in self.players_info:
-            #    del self.players_info[player_name]
-            
-            # Players sorted alphabetically by name
-            if player_name in self.players_by_name:
-                index = self.players_by_name.index(player_name)
-                del self.players_by_name[index]
-
-            # Players sorted by number
-            if player_name in self.players_by_number:
-                index = self.players_by_number.index(player_name)
-                del self.players_by_number[index]
-                del self.players_numbers[index]
-        
-        
     # Edit the players of the team that are unavailable for the current game and add temporary players
     def editGamePlayers(self, output):
         sel = selectMultiple.selectMultiple('Unavailable players:', sorted(self.players_info.keys()), selected=self.game_data['unavailable_players'], width=450)
@@ -722,28 +454,6 @@ class Game():
                 return widgets.VBox([widgets.HBox(players_widgets[:nfirstline]), spacerV, widgets.HBox(players_widgets[nfirstline+1:])]), players_card
 
 
-    # Add points to an opponent player
-    def opponentAddPoints(self, opponent_name, points):
-        if opponent_name in self.opponents_info:
-            self.opponents_info[opponent_name]['points'] += points
-
-    # Remove points to an opponent player
-    def opponentRemovePoints(self, opponent_name, points):
-        if opponent_name in self.opponents_info:
-            self.opponents_info[opponent_name]['points'] -= points
-
-
-    # Add a foul to an opponent player
-    def opponentAddFoul(self, opponent_name):
-        if opponent_name in self.opponents_info:
-            self.opponents_info[opponent_name]['fouls'] += 1
-
-    # Remove a foul to an opponent player
-    def opponentRemoveFoul(self, opponent_name):
-        if opponent_name in self.opponents_info:
-            self.opponents_info[opponent_name]['fouls'] -= 1
-
-
     # Selection of one of the opponents
     def selectOpponent(self, onselect, opponents_list=None):
         
@@ -770,25 +480,3 @@ class Game():
                                               fullscreen=False, content=[bw], output=self.board.output)
         else:
             onselect('')
-    
-    ###########################################################################################################################################################################
-    # Properties
-    ###########################################################################################################################################################################
-        
-    @property
-    def opponents(self):
-        return [self.opponents_info[p] for p in self.opponents_by_number]
-
-    @opponents.setter
-    def opponents(self, items):    # List of dicts items edited with the Opponents.Opponents dialog-box
-        
-        # Update the opponents_info member
-        self.opponents_info = { x['name']: x for x in items }
-                               
-        # Opponents sorted alphabetically by name
-        self.opponents_by_name = sorted(self.opponents_info.keys())
-
-        # Opponents sorted by number
-        self.opponents_by_number = [x[0] for x in sorted([[x[1]['name'],x[1]['number']] for x in self.opponents_info.items()], key=lambda x: int(x[1]))]
-    
-    
\ No newline at end of file
@@ -0,0 +1,473 @@
+"""Saving and loading of the game files"""
+# Author(s): Davide.De-Marchi@ec.europa.eu
+# Copyright © European Union 2024-2025
+# 
+# Licensed under the EUPL, Version 1.2 or as soon they will be approved by 
+# the European Commission subsequent versions of the EUPL (the "Licence");
+# 
+# You may not use this work except in compliance with the Licence.
+# 
+# You may obtain a copy of the Licence at:
+# https://joinup.ec.europa.eu/collection/eupl/eupl-text-eupl-12
+
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the Licence is distributed on an "AS IS"
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either
+# express or implied.
+# 
+# See the Licence for the specific language governing permissions and
+# limitations under the Licence.
+import json
+import os
+import glob
+import gzip
+import threading
+import numpy as np
+import pandas as pd
+
+# Optional fast JSON backend
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Optional zstandard compression of the .game.zst files
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# local imports
+import EventStore
+
+
+# Extensions of the game files: plain JSON, JSON compressed with gzip or with zstandard (the format is chosen by the extension, for reading and writing)
+GAME_EXTENSIONS = ['.game', '.game.gz', '.game.zst']
+
+# Extension of the journal file written next to the .game file
+JOURNAL_EXTENSION = '.journal'
+
+# Seconds the background writer waits after a request to coalesce the following ones
+WRITER_DELAY = 0.5
+
+# Version of the encoding of the events in the .game files:
+#   1: list of dicts with all the columns of the events DataFrame (legacy)
+#   2: compact positional encoding: dict with the version, the list of the columns, the lists of the teams and of the players and a list of rows, each
+#      containing the team and player codes, the event id, quarter, seconds, x, y and the time as an integer timestamp (event_name and event_description
+#      are derived from the event id)
+EVENTS_VERSION = 2
+
+# Columns of the rows of the compact encoding of the events
+EVENTS_COLUMNS = EventStore.STORED
+
+# Format of the time of the events in the events DataFrame (the compact encoding stores it as seconds from the epoch, without conversion of the time zone)
+TIME_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+
+# Returns the path of the journal file of a game file
+def journalFile(game_file):
+    return game_file + JOURNAL_EXTENSION
+
+
+# Returns mtime and size of a file
+def fileStat(file):
+    st = os.stat(file)
+    return [st.st_mtime, st.st_size]
+
+
+# Returns the fingerprint of a game file: mtime and size of the file and of its journal (if present)
+def fingerprint(file):
+    fp = fileStat(file)
+    journal_file = journalFile(file)
+    if os.path.isfile(journal_file):
+        fp += fileStat(journal_file)
+    return fp
+
+
+# Returns True if the file name has one of the extensions of the game files
+def isGameFile(file):
+    return any([file.endswith(ext) for ext in GAME_EXTENSIONS])
+
+
+# Returns the name of a game file without folder and extension (i.e. '1.a-Andata-OPPONENTS')
+def gameName(file):
+    name = os.path.basename(file)
+    for ext in sorted(GAME_EXTENSIONS, key=len, reverse=True):
+        if name.endswith(ext):
+            return name[:-len(ext)]
+    return name
+
+
+# Returns the list of the game files of a folder, in any of the formats. If a game is present in more than one format, the most recently modified file is returned
+def gameFiles(folder='./data'):
+    files = {}
+    for ext in GAME_EXTENSIONS:
+        for file in glob.glob('%s/*%s'%(folder,ext)):
+            name = gameName(file)
+            if name not in files or os.path.getmtime(file) > os.path.getmtime(files[name]):
+                files[name] = file
+    return sorted(files.values())
+
+
+# Returns the bytes to write in a game file, compressed according to its extension
+def compress(data, file):
+    if file.endswith('.gz'):
+        return gzip.compress(data, compresslevel=6, mtime=0)
+    if file.endswith('.zst'):
+        if zstandard is None:
+            raise ImportError('The zstandard package is needed to write the file %s'%file)
+        return zstandard.ZstdCompressor(level=9).compress(data)
+    return data
+
+
+# Returns the bytes read from a game file, decompressed according to its extension
+def decompress(data, file):
+    if file.endswith('.gz'):
+        return gzip.decompress(data)
+    if file.endswith('.zst'):
+        if zstandard is None:
+            raise ImportError('The zstandard package is needed to read the file %s'%file)
+        return zstandard.ZstdDecompressor().decompressobj().decompress(data)
+    return data
+
+
+# Returns the game_data dictionary from the bytes of a game file
+def loads(data, file):
+    return json.loads(decompress(data, file).decode('utf-8'))
+
+
+# Returns the game_data dictionary read from a game file in any of the formats
+def readGame(file):
+    with open(file, 'rb') as f:
+        return loads(f.read(), file)
+
+
+# Utility: conversion of numpy scalars for json.dumps
+def _tojson(x):
+    if isinstance(x, np.generic):
+        return x.item()
+    raise TypeError('Object of type %s is not JSON serializable'%type(x).__name__)
+
+
+# Returns the list of the events as dicts built directly from the columns of the events DataFrame
+def eventsRecords(events_df):
+    columns = list(events_df.columns)
+    values  = [events_df[c].tolist() for c in columns]
+    return [dict(zip(columns, row)) for row in zip(*values)]
+
+
+# Returns the compact encoding (version 2) of the events DataFrame
+def eventsCompact(events_df):
+    n = events_df.shape[0]
+    codes = {}
+    lists = {}
+    for c in EventStore.CATEGORICAL:
+        codes[c], uniques = pd.factorize(events_df[c])
+        lists[c] = [str(x) for x in uniques]
+
+    t = pd.to_datetime(events_df['time'], format=TIME_FORMAT, errors='coerce')
+    epoch = (t.to_numpy(dtype='datetime64[s]', na_value=np.datetime64('NaT')).astype(np.int64)).tolist()
+    epoch = [None if x else e for x, e in zip(t.isna().tolist(), epoch)]
+
+    values = [codes['team'].tolist(),
+              codes['player'].tolist(),
+              events_df['event'].astype(np.int64).tolist(),
+              events_df['quarter'].astype(np.int64).tolist(),
+              events_df['seconds'].astype(np.float64).tolist(),
+              events_df['x'].astype(np.float64).tolist(),
+              events_df['y'].astype(np.float64).tolist(),
+              epoch]
+
+    return { 'version': EVENTS_VERSION,
+             'columns': EVENTS_COLUMNS,
+             'teams':   lists['team'],
+             'players': lists['player'],
+             'rows':    [list(row) for row in zip(*values)] if n > 0 else [] }
+
+
+# Returns the events DataFrame from the events read from a .game file (in any of the versions of the encoding)
+def eventsDataFrame(events):
+    # Legacy list of dicts
+    if events is None or isinstance(events, list):
+        events_df = pd.DataFrame.from_records(events if events is not None else [])
+        if len(events_df.columns) == 0:
+            events_df = pd.DataFrame(columns=EventStore.COLUMNS)
+        return events_df
+
+    if events.get('version', 0) > EVENTS_VERSION:
+        raise ValueError('Version %s of the events encoding is not supported'%str(events['version']))
+
+    rows = events['rows']
+    columns = { c: [row[i] for row in rows] for i, c in enumerate(events['columns']) }
+    data = {}
+    data['team']    = pd.Categorical.from_codes(np.array(columns['team'],   dtype=np.int32), categories=events['teams'])
+    data['player']  = pd.Categorical.from_codes(np.array(columns['player'], dtype=np.int32), categories=events['players'])
+    data['event']   = np.array(columns['event'],   dtype=np.int64)
+    data['quarter'] = np.array(columns['quarter'], dtype=np.int64)
+    data['seconds'] = np.array(columns['seconds'], dtype=np.float64)
+    data['x']       = np.array(columns['x'],       dtype=np.float64)
+    data['y']       = np.array(columns['y'],       dtype=np.float64)
+    t = pd.to_datetime(pd.Series(columns['time'], dtype='float64'), unit='s')
+    data['time']    = t.dt.strftime(TIME_FORMAT).fillna('').to_numpy(dtype=object)
+    return pd.DataFrame(data)
+
+
+# Serialize an object to JSON text: compact (with orjson, if installed) or pretty-printed with an indentation of 4 spaces
+def dumps(obj, pretty=False):
+    if pretty:
+        return json.dumps(obj, indent=4, sort_keys=False, ensure_ascii=False, default=_tojson)
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_SERIALIZE_NUMPY).decode('utf-8')
+    return json.dumps(obj, separators=(',', ':'), ensure_ascii=False, default=_tojson)
+
+
+# Returns the text of a .game file given the game_data dictionary and the events DataFrame. The events are written in the compact encoding, or in the list
+# of dicts (version 1) if requested or by default when the text is pretty-printed (a readable export that can still be loaded)
+def gameText(game_data, events_df, pretty=False, version=None):
+    if version is None:
+        version = 1 if pretty else EVENTS_VERSION
+
+    if events_df is not None:
+        if version == 1: game_data['events'] = eventsRecords(events_df)
+        else:            game_data['events'] = eventsCompact(events_df)
+    elif 'events' in game_data:
+        del game_data['events']
+
+    return dumps(game_data, pretty=pretty)
+
+
+# Write a text file atomically: the text is written to a temporary file in the same folder that is then renamed. Game files are compressed according to their extension
+def writeAtomic(file, txt):
+    data = compress(txt.encode('utf-8'), file)
+    tmp = file + '.tmp'
+    with open(tmp, 'wb') as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, file)
+
+
+# Append lines to a text file
+def appendLines(file, lines):
+    with open(file, 'a') as f:
+        f.write(''.join(lines))
+
+
+# Exception raised in the caller thread for the writes of the background writer that failed
+class WriteError(Exception):
+
+    def __init__(self, errors):   # List of (path of the file, exception raised by its write)
+        self.errors = errors
+        super().__init__('%d writes failed: %s'%(len(errors), '; '.join(['%s: %s'%(file, str(e)) for file, e in errors])))
+
+
+###########################################################################################################################################################################
+# Writer: single background thread that writes the game files and the journals, so that the UI callbacks and the timer thread never block on disk I/O.
+# Requests issued within WRITER_DELAY seconds are coalesced: only the last snapshot of each .game file is written and the journal lines that precede it
+# are dropped (the snapshot contains them and truncates the journal). Call flush() to wait until all the requests are written. A failed write does not stop
+# the following ones: the errors are collected and raised as a WriteError in the caller thread by the next request or flush()
+###########################################################################################################################################################################
+class Writer():
+
+    def __init__(self, delay=WRITER_DELAY):   # Seconds to wait after a request to coalesce the following ones
+        self.delay     = delay
+        self.cond      = threading.Condition()
+        self.pending   = []       # List of requests: ('save', file, build, journal_file) or ('append', file, line)
+        self.requested = 0        # Number of requests received
+        self.written   = 0        # Number of requests processed
+        self.flushing  = 0        # Number of threads waiting in flush()
+        self.errors    = []       # List of (file, exception) of the writes failed since the last request or flush
+        self.thread    = None
+
+
+    # Request the write of a .game file. build is called by the writer thread and returns the text of the file. If journal_file is not None, the journal is truncated
+    def save(self, file, build, journal_file=None):
+        self._request(('save', file, build, journal_file))
+
+
+    # Request the append of a line to a text file
+    def append(self, file, line):
+        self._request(('append', file, line))
+
+
+    # Wait until all the requests are written. Raises a WriteError if any write failed
+    def flush(self):
+        with self.cond:
+            target = self.requested
+            self.flushing += 1
+            self.cond.notify_all()
+            self.cond.wait_for(lambda: self.written >= target)
+            self.flushing -= 1
+            errors, self.errors = self.errors, []
+        if len(errors) > 0:
+            raise WriteError(errors)
+
+
+    # Add a request and start the writer thread if needed. Raises a WriteError if any write failed since the last request (the request is added anyway)
+    def _request(self, request):
+        with self.cond:
+            self.pending.append(request)
+            self.requested += 1
+            if self.thread is None:
+                self.thread = threading.Thread(target=self._run, daemon=True)
+                self.thread.start()
+            self.cond.notify_all()
+            errors, self.errors = self.errors, []
+        if len(errors) > 0:
+            raise WriteError(errors)
+
+
+    # Writer thread function
+    def _run(self):
+        while True:
+            with self.cond:
+                self.cond.wait_for(lambda: len(self.pending) > 0)
+                
+                # Wait for other requests to coalesce (unless a flush is requested)
+                self.cond.wait_for(lambda: self.flushing > 0, timeout=self.delay)
+                batch, self.pending = self.pending, []
+
+            errors = self._write(batch)
+
+            with self.cond:
+                self.errors += errors
+                self.written += len(batch)
+                self.cond.notify_all()
+
+
+    # Write a batch of requests. Each request is written even if the previous ones failed. Returns the list of (file, exception) of the failed writes
+    def _write(self, batch):
+        
+        # Index of the last snapshot of each file and of the journals it truncates
+        last = {}
+        for i, request in enumerate(batch):
+            if request[0] == 'save':
+                last[request[1]] = i
+                if request[3] is not None:
+                    last[request[3]] = i
+                    
+        # Journal file --> lines contained in the following snapshot (written only if the snapshot fails, so that no change is lost)
+        deferred = {}
+        
+        errors = []
+        for i, request in enumerate(batch):
+            try:
+                if request[0] == 'save':
+                    op, file, build, journal_file = request
+                    if last[file] == i:
+                        try:
+                            writeAtomic(file, build())
+                        except Exception:
+                            if journal_file in deferred:
+                                appendLines(journal_file, deferred.pop(journal_file))
+                            raise
+                        deferred.pop(journal_file, None)
+                        if journal_file is not None and os.path.exists(journal_file):
+                            os.remove(journal_file)
+                else:
+                    op, file, line = request
+                    if last.get(file, -1) > i:
+                        deferred.setdefault(file, []).append(line)
+                    else:
+                        appendLines(file, [line])
+            except Exception as e:
+                errors.append((request[1], e))
+        return errors
+
+
+# Single instance of the background writer
+writer = Writer()
+
+
+###########################################################################################################################################################################
+# Journal: append-only log of the changes of a game written next to the .game file, one JSON record per line. Each record has a sequence number and an 'op':
+#   'add':        an event was stored (values of the EventStore.STORED columns)
+#   'removelast': the last event of a team/player/event_id was removed
+#   'remove':     the event with index 'id' was removed
+#   'state':      status, players and opponents info (all the keys of game_data except the events)
+# The .game file snapshot stores the sequence number of the last record it contains ('journal_seq'), so loading a game replays only the following records
+###########################################################################################################################################################################
+class Journal():
+
+    def __init__(self,
+                 game_file,     # Path of the .game file
+                 seq=0):        # Sequence number of the last record written
+        self.game_file = game_file
+        self.file      = journalFile(game_file)
+        self.seq       = seq
+        self.lock      = threading.Lock()
+
+
+    # Append a record to the journal (written by the background writer)
+    def append(self, record):
+        with self.lock:
+            self.seq += 1
+            record['seq'] = self.seq
+            writer.append(self.file, json.dumps(record, default=_tojson) + '\n')
+
+
+    # Save a snapshot of the game: build is called by the background writer with the sequence number of the last record contained in the snapshot and
+    # returns the text of the .game file. The journal is truncated after the snapshot is written
+    def snapshot(self, build):
+        with self.lock:
+            seq = self.seq
+            writer.save(self.game_file, lambda: build(seq), journal_file=self.file)
+
+
+    # An event was stored
+    def add(self, values):       # List of values of the EventStore.STORED columns
+        record = { 'op': 'add' }
+        record.update(zip(EventStore.STORED, values))
+        self.append(record)
+
+
+    # The last event for a team/player/event_id was removed
+    def removeLast(self, team, player_name, event_id):
+        self.append({ 'op': 'removelast', 'team': team, 'player': player_name, 'event': event_id })
+
+
+    # The event with index evid was removed
+    def remove(self, evid):
+        self.append({ 'op': 'remove', 'id': evid })
+
+
+    # Status, players and opponents info of the game
+    def state(self, game_data):
+        self.append({ 'op': 'state', 'game_data': { k: v for k, v in game_data.items() if k != 'events' } })
+
+
+    # Read the records having sequence number greater than seq (a last line truncated by a crash is ignored)
+    def read(self, seq=0):
+        records = []
+        if os.path.exists(self.file):
+            with open(self.file) as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        break
+                    if record['seq'] > seq:
+                        records.append(record)
+                    self.seq = max(self.seq, record['seq'])
+        return records
+
+
+    # Replay the 'state' records on game_data
+    @staticmethod
+    def replayState(records, game_data):
+        for record in records:
+            if record['op'] == 'state':
+                game_data.update(record['game_data'])
+
+
+    # Replay the events records on an EventStore
+    @staticmethod
+    def replayEvents(records, event_store):
+        for record in records:
+            if record['op'] == 'add':
+                event_store.append([record[c] for c in EventStore.STORED])
+            elif record['op'] == 'removelast':
+                event_store.removeLast(record['team'], record['player'], record['event'])
+            elif record['op'] == 'remove':
+                event_store.remove(record['id'])
+
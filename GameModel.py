@@ -0,0 +1,447 @@
+"""Data of a game without widgets"""
+# Author(s): Davide.De-Marchi@ec.europa.eu
+# Copyright © European Union 2024-2025
+# 
+# Licensed under the EUPL, Version 1.2 or as soon they will be approved by 
+# the European Commission subsequent versions of the EUPL (the "Licence");
+# 
+# You may not use this work except in compliance with the Licence.
+# 
+# You may obtain a copy of the Licence at:
+# https://joinup.ec.europa.eu/collection/eupl/eupl-text-eupl-12
+
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the Licence is distributed on an "AS IS"
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either
+# express or implied.
+# 
+# See the Licence for the specific language governing permissions and
+# limitations under the Licence.
+import json
+import datetime
+import copy
+
+# local imports
+import Config
+import Stats
+import EventStore
+import GameFile
+
+
+###########################################################################################################################################################################
+# GameModel class: data of a game (team roster, events, status, opponents and players_info) with the loading and saving of the game files. It does not use
+# widgets, so it can be used by batch jobs without a running kernel; the Game class adds the widgets of the overall board
+###########################################################################################################################################################################
+class GameModel():
+    
+    def __init__(self,
+                 team_file,         # Path of the input Team file
+                 game_file=None):   # Path of the input Game file
+        
+        self.event_store = EventStore.EventStore()   # Columnar store of the events (self.events_df is a pandas DataFrame view on it)
+        self.counters  = None  # Running counters of the events (instance of Stats.Counters)
+        self.journal   = None  # Journal of the changes of the game (instance of GameFile.Journal)
+        
+        # Read team data
+        with open(team_file) as f:
+            self.team_data = json.load(f)
+            self.players_info = self.team_data['players']
+
+            # Add 'time_on_field' to all players (if not already present)
+            for name,player in self.players_info.items():
+                if 'time_on_field' not in player:
+                    player['time_on_field'] = 0.0
+            
+            # Add 'plusminus' to all players (if not already present)
+            for name,player in self.players_info.items():
+                if 'plusminus' not in player:
+                    player['plusminus'] = 0
+                    
+            # Players sorted alphabetically by name
+            self.players_by_name = sorted(self.players_info.keys())
+
+            # Players sorted by number
+            self.players_by_number = [x[0] for x in sorted([[x[1]['name'],x[1]['number']] for x in self.players_info.items()], key=lambda x: int(x[1]))]
+            self.players_numbers   = [x[1] for x in sorted([[x[1]['name'],x[1]['number']] for x in self.players_info.items()], key=lambda x: int(x[1]))]
+
+        # Logo of the team (PIL image opened by the classes that display it: Game and SiteRender)
+        self.team_logo_img = None
+
+        # Load the game from the game_file
+        self.loadGame(game_file)
+        
+
+    # Load a game from file
+    def loadGame(self, game_file):
+        
+        # Wait for the pending writes of the current game
+        self.flush()
+        
+        # Read game data
+        self.game_data = {}
+        self.game_file = game_file
+        self.journal   = None
+        journal_records = []
+        if self.game_file is None:
+            self.game_data = {
+                                "date": datetime.datetime.today().strftime('%d/%m/%Y'),
+                                "time": "18:00",
+                                "season": "",
+                                "championship": "",
+                                "phase": "",
+                                "round": 1,
+                                "home": True,
+                                "opponents": "",
+                                "abbreviation": "",
+                                "referee1": "",
+                                "referee2": "",
+                                "location": "",
+                                "trainer": "",
+                                "opponents_info": {},
+                                "unavailable_players": [],
+                                "status": {
+                                    "quarter": 1,
+                                    "seconds": 600.0,
+                                    "gameover": True,
+                                    "points1": 0,
+                                    "points2": 0,
+                                    "fouls1": 0,
+                                    "fouls2": 0,
+                                    "timeouts1": 0,
+                                    "timeouts2": 0
+                                },
+                                "events": []
+                            }
+        else:
+            self.game_data = GameFile.readGame(self.game_file)
+                
+            # Replay the state records of the journal written after the last snapshot of the game
+            if Config.JOURNAL:
+                seq = self.game_data.get('journal_seq', 0)
+                self.journal = GameFile.Journal(self.game_file, seq)
+                journal_records = self.journal.read(seq)
+                GameFile.Journal.replayState(journal_records, self.game_data)
+                
+            # Fill missing info
+            if "opponents_info" not in self.game_data:
+                self.game_data["opponents_info"] = {}
+                
+            if "players_info" not in self.game_data:
+                self.game_data["players_info"] = self.team_data['players']
+
+            if "status" not in self.game_data:
+                self.game_data["status"] = {
+                    "quarter": 1,
+                    "seconds": 600.0,
+                    "gameover": False,
+                    "points1": 0,
+                    "points2": 0,
+                    "fouls1": 0,
+                    "fouls2": 0,
+                    "timeouts1": 0,
+                    "timeouts2": 0
+                }
+                
+            if "events" not in self.game_data:
+                self.game_data["events"] = []
+                
+            # Remove unavailable players
+            if 'unavailable_players' not in self.game_data:
+                self.game_data['unavailable_players'] = []
+
+        self.opponents_info = self.game_data['opponents_info']
+
+        # Add players_info to game_data (if not already present)
+        if 'players_info' in self.game_data:
+            self.players_info = self.game_data['players_info']
+        else:
+            self.game_data['players_info'] = self.players_info
+
+        # Players sorted alphabetically by name
+        self.players_by_name = sorted(self.players_info.keys())
+
+        # Players sorted by number
+        self.players_by_number = [x[0] for x in sorted([[x[1]['name'],x[1]['number']] for x in self.players_info.items()], key=lambda x: int(x[1]))]
+        self.players_numbers   = [x[1] for x in sorted([[x[1]['name'],x[1]['number']] for x in self.players_info.items()], key=lambda x: int(x[1]))]
+        self.removeUnavailablePlayers()
+
+        # Add 'fouls' and 'points' to opponents players (if not already present)
+        for name,player in self.opponents_info.items():
+            if 'fouls' not in player:
+                player['fouls'] = 0
+            if 'points' not in player:
+                player['points'] = 0
+
+        # Opponents sorted alphabetically by name
+        self.opponents_by_name = sorted(self.opponents_info.keys())
+
+        # Opponents sorted by number
+        self.opponents_by_number = [x[0] for x in sorted([[x[1]['name'],x[1]['number']] for x in self.opponents_info.items()], key=lambda x: int(x[1]))]
+
+        # Read events from the game (legacy list of dicts or compact encoding)
+        self.events_df = GameFile.eventsDataFrame(self.game_data.get('events'))
+            
+        # Replay the events records of the journal
+        GameFile.Journal.replayEvents(journal_records, self.event_store)
+            
+        # Running counters of the events, updated by addEvent, removeLastEvent and removeEvent
+        self.counters = Stats.Counters(self.events_df)
+                
+        # Home/guest and players on the field
+        if 'home' not in self.game_data:
+            self.game_data['home'] = True
+            
+        if 'on_field' in self.game_data:
+            self.on_field = self.game_data['on_field']
+        else:
+            self.on_field = ['']*5
+            self.game_data['on_field'] = self.on_field
+            
+    
+    # Returns the names and abbreviations of the home and guest teams (team1_name, team1_abbr, team2_name, team2_abbr)
+    def teams(self):
+        if self.game_data['home']:
+            return self.team_data['name'], self.team_data['abbreviation'], self.game_data['opponents'], self.game_data['abbreviation']
+        else:
+            return self.game_data['opponents'], self.game_data['abbreviation'], self.team_data['name'], self.team_data['abbreviation']
+        
+        
+    ###########################################################################################################################################################################
+    # Display info on top of throwmap background: points per quarter. Returns an array of strings
+    ###########################################################################################################################################################################
+    def pointsPerQuarter(self, showTotals=False):
+        
+        quarters = self.counters.quarters()
+        
+        def qpoints(quarter):
+            if quarter <= 4: name = 'Q%d'%quarter
+            else:            name = 'S%d'%(quarter-4)
+        
+            pTeam = self.counters.quarterPoints(quarter, Config.TEAM)
+            pOppo = self.counters.quarterPoints(quarter, Config.OPPO)
+            
+            if showTotals and quarter > 1:
+                pTeamTotal = sum([self.counters.quarterPoints(q, Config.TEAM) for q in quarters if q <= quarter])
+                pOppoTotal = sum([self.counters.quarterPoints(q, Config.OPPO) for q in quarters if q <= quarter])
+                
+                if self.game_data['home']:
+                    return '%s: %d - %d (%d - %d)'%(name,pTeam,pOppo,pTeamTotal,pOppoTotal)
+                else:
+                    return '%s: %d - %d (%d - %d)'%(name,pOppo,pTeam,pOppoTotal,pTeamTotal)
+            else:
+                if self.game_data['home']:
+                    return '%s: %d - %d'%(name,pTeam,pOppo)
+                else:
+                    return '%s: %d - %d'%(name,pOppo,pTeam)
+                    
+        return [qpoints(x) for x in quarters]
+        
+        
+    ###########################################################################################################################################################################
+    # Strings of the info on a player
+    ###########################################################################################################################################################################
+
+    # Returns a string displaying the field time of the player
+    def playerFieldTime(self, player_name):
+        if player_name in self.players_info:
+            seconds = self.players_info[player_name]['time_on_field']
+            return '  T: %d\'%02d"'%(seconds//60, int(seconds%60))
+        else:
+            return '  T: 0\'0"'
+        
+    # Returns a string displaying the points scored by a player
+    def playerPointScored(self, player_name):
+        return '  P: %d'%Stats.points(self.counters, player_name)
+        
+    # Returns a string displaying the evaluation of a player
+    def playerValue(self, player_name):
+        return '  VAL: %d'%Stats.value(self.counters, player_name)
+    
+    # Returns a string displaying the OER of a player
+    def playerOER(self, player_name):
+        return '  OER: %.2f'%Stats.oer(self.counters, player_name)
+    
+    # Returns a string displaying the VIR of a player
+    def playerVIR(self, player_name):
+        return '  VIR: %.2f'%Stats.vir(self.counters, player_name, self.players_info)
+    
+    # Returns a string displaying the plusminus of a player
+    def playerPlusMinus(self, player_name):
+        return '  +/-: %d'%Stats.plusminus(player_name, self.players_info)
+    
+    # Returns a string displaying the True Shooting Percentage of a player
+    def playerTrueShooting(self, player_name):
+        return '  TS: %.0f%%'%Stats.trueshooting(self.counters, player_name)
+    
+    ###########################################################################################################################################################################
+    # Add and remove events (the store of events, the running counters and the journal are updated)
+    ###########################################################################################################################################################################
+    
+    # Add an event given the list of values of the EventStore.STORED columns. Returns the index of the event
+    def addEvent(self, values):
+        evid = self.event_store.append(values)
+        self.counters.add(values[0], values[1], values[2], values[3])
+        if self.journal is not None:
+            self.journal.add(values)
+        return evid
+    
+    # Remove the last event for a team/player/event_id. Returns the dict of the values of the event removed (or None)
+    def removeLastEvent(self, team, player_name, event_id):
+        row = self.event_store.removeLast(team, player_name, event_id)
+        if row is not None:
+            self.counters.remove(team, player_name, event_id, row['quarter'])
+            if self.journal is not None:
+                self.journal.removeLast(team, player_name, event_id)
+        return row
+    
+    # Remove an event given its index. Returns the dict of the values of the event removed (or None)
+    def removeEvent(self, evid):
+        row = self.event_store.remove(evid)
+        if row is not None:
+            self.counters.remove(row['team'], row['player'], row['event'], row['quarter'])
+            if self.journal is not None:
+                self.journal.remove(evid)
+        return row
+    
+    
+    ###########################################################################################################################################################################
+    # Save game to file
+    ###########################################################################################################################################################################
+    
+    # Update the game status (quarter, seconds, gameover, points1, points2, fouls1, fouls2, timeouts1, timeouts2)
+    def updateStatus(self, status=None):
+        if status is not None:
+            self.game_data['status'] = status
+
+        # Save opponents_info
+        self.game_data['opponents_info'] = self.opponents_info
+        
+        
+    # Save the state of the game appending it to the journal (or saving the full game if the journal is not active)
+    def saveState(self):
+        if self.journal is None:
+            self.saveGame()
+        else:
+            self.updateStatus()
+            self.journal.state(self.game_data)
+            
+            
+    # Save the full game to file (snapshot). The game data and the events are copied here and the file is written by the background writer: the journal is
+    # truncated after the snapshot is written, since all its changes are contained in the snapshot. The file is written in compact JSON unless pretty is True.
+    # If text is True, returns the pretty-printed text of the game (for the download)
+    def saveGame(self, game_file=None, pretty=False, text=False):
+        
+        if isinstance(game_file, str):
+            self.game_file = game_file
+            
+        txt = None
+        if isinstance(self.game_file, str):
+            
+            if Config.JOURNAL and (self.journal is None or self.journal.game_file != self.game_file):
+                self.journal = GameFile.Journal(self.game_file)
+            
+            # Save game status
+            self.updateStatus()
+            
+            # Copy of the game data keeping the order of the keys (the DataFrame of the events is not modified by the following changes of the events)
+            game_data = copy.deepcopy({ k: (None if k == 'events' else v) for k, v in self.game_data.items() })
+            events_df = self.events_df
+            
+            def build(seq=None):
+                if seq is not None:
+                    game_data['journal_seq'] = seq     # Sequence number of the last record of the journal contained in the snapshot
+                return GameFile.gameText(game_data, events_df, pretty=pretty)
+            
+            if text:
+                txt = GameFile.gameText(dict(game_data), events_df, pretty=True)
+            
+            if self.journal is not None:
+                self.journal.snapshot(build)
+                
+                # Renumber the events as they will be when the snapshot is loaded
+                self.event_store.renumber()
+            else:
+                GameFile.writer.save(self.game_file, build)
+                
+        return txt
+            
+            
+    # Wait until the background writer has written all the changes of the game to disk
+    def flush(self):
+        GameFile.writer.flush()
+            
+            
+    ###########################################################################################################################################################################
+    # Management of players and opponents
+    ###########################################################################################################################################################################
+
+    # Remove players that cannot be on the field
+    def removeUnavailablePlayers(self):
+        for player_name in self.game_data['unavailable_players']:
+
+            #if player_name in self.players_info:
+            #    del self.players_info[player_name]
+            
+            # Players sorted alphabetically by name
+            if player_name in self.players_by_name:
+                index = self.players_by_name.index(player_name)
+                del self.players_by_name[index]
+
+            # Players sorted by number
+            if player_name in self.players_by_number:
+                index = self.players_by_number.index(player_name)
+                del self.players_by_number[index]
+                del self.players_numbers[index]
+        
+        
+    # Add points to an opponent player
+    def opponentAddPoints(self, opponent_name, points):
+        if opponent_name in self.opponents_info:
+            self.opponents_info[opponent_name]['points'] += points
+
+    # Remove points to an opponent player
+    def opponentRemovePoints(self, opponent_name, points):
+        if opponent_name in self.opponents_info:
+            self.opponents_info[opponent_name]['points'] -= points
+
+
+    # Add a foul to an opponent player
+    def opponentAddFoul(self, opponent_name):
+        if opponent_name in self.opponents_info:
+            self.opponents_info[opponent_name]['fouls'] += 1
+
+    # Remove a foul to an opponent player
+    def opponentRemoveFoul(self, opponent_name):
+        if opponent_name in self.opponents_info:
+            self.opponents_info[opponent_name]['fouls'] -= 1
+
+            
+    ###########################################################################################################################################################################
+    # Properties
+    ###########################################################################################################################################################################
+        
+    @property
+    def opponents(self):
+        return [self.opponents_info[p] for p in self.opponents_by_number]
+
+    @opponents.setter
+    def opponents(self, items):    # List of dicts items edited with the Opponents.Opponents dialog-box
+        
+        # Update the opponents_info member
+        self.opponents_info = { x['name']: x for x in items }
+                               
+        # Opponents sorted alphabetically by name
+        self.opponents_by_name = sorted(self.opponents_info.keys())
+
+        # Opponents sorted by number
+        self.opponents_by_number = [x[0] for x in sorted([[x[1]['name'],x[1]['number']] for x in self.opponents_info.items()], key=lambda x: int(x[1]))]
+    
+    
+
+    @property
+    def events_df(self):
+        return self.event_store.df
+
+    @events_df.setter
+    def events_df(self, df):       # Pandas DataFrame storing the events (None to remove all the events)
+        self.event_store.load(df)
@@ -0,0 +1,107 @@
+"""Manifest of the artifacts of the HTML site"""
+# Author(s): Davide.De-Marchi@ec.europa.eu
+# Copyright © European Union 2024-2025
+# 
+# Licensed under the EUPL, Version 1.2 or as soon they will be approved by 
+# the European Commission subsequent versions of the EUPL (the "Licence");
+# 
+# You may not use this work except in compliance with the Licence.
+# 
+# You may obtain a copy of the Licence at:
+# https://joinup.ec.europa.eu/collection/eupl/eupl-text-eupl-12
+
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the Licence is distributed on an "AS IS"
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either
+# express or implied.
+# 
+# See the Licence for the specific language governing permissions and
+# limitations under the Licence.
+import hashlib
+import json
+import os
+import plotly
+
+# local imports
+import GameFile
+
+
+# Source files of the modules that read the games and render the artifacts of the site: a change in any of them invalidates all the artifacts
+RENDER_SOURCES = ['BoxScore.py', 'ThrowMap.py', 'Stats.py', 'Config.py', 'SiteRender.py', 'htmlsite.py', 'Analytics.py',
+                  'GameModel.py', 'GameFile.py', 'EventStore.py', 'SeasonLoader.py', 'Catalog.py']
+
+
+# Returns the hex digest of the SHA-1 of a list of strings and bytes
+def hashParts(*parts):
+    h = hashlib.sha1()
+    for part in parts:
+        if isinstance(part, str):
+            part = part.encode('utf-8')
+        h.update(part)
+        h.update(b'\0')
+    return h.hexdigest()
+
+
+# Returns the hex digest of the SHA-1 of the content of a file (empty string if the file does not exist)
+def hashFile(path):
+    if not os.path.isfile(path):
+        return ''
+    h = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1<<16), b''):
+            h.update(block)
+    return h.hexdigest()
+
+
+# Returns the hash of the sources of the rendering modules and of the version of plotly (the charts refer to the plotly.js bundle of the installed version)
+def renderHash():
+    return hashParts(*([hashFile(x) for x in RENDER_SOURCES] + [plotly.__version__]))
+
+
+# Returns the hash of the inputs of a game: content of the game file and of its journal, team file and rendering modules
+def gameHash(game_file, team_file, render_hash=None):
+    if render_hash is None: render_hash = renderHash()
+    return hashParts(hashFile(game_file), hashFile(GameFile.journalFile(game_file)), hashFile(team_file), render_hash)
+
+
+###########################################################################################################################################################################
+# Manifest: for each artifact of the site (path of a file in the web folder) it stores the hash of the inputs used to build it, so that an artifact is rebuilt
+# and uploaded only if its inputs changed since the last build. The manifest is saved in web/manifest.json
+###########################################################################################################################################################################
+class Manifest():
+
+    def __init__(self, file='web/manifest.json'):   # Path of the manifest file
+        self.file    = file
+        self.entries = {}                              # Path of the artifact --> hash of its inputs
+        
+        if os.path.isfile(self.file):
+            try:
+                with open(self.file, encoding='utf-8') as f:
+                    self.entries = json.load(f)
+            except:
+                self.entries = {}
+                
+                
+    # Returns True if the artifact does not exist or was built from different inputs
+    def isChanged(self, path, key):
+        return self.entries.get(path) != key or not os.path.isfile(path)
+    
+    
+    # Returns True if any of the artifacts does not exist or was built from different inputs
+    def anyChanged(self, paths, key):
+        return any([self.isChanged(path, key) for path in paths])
+    
+    
+    # Record the hash of the inputs of an artifact
+    def update(self, path, key):
+        self.entries[path] = key
+        
+        
+    # Forget the inputs of all the artifacts (so that they are all rebuilt)
+    def clear(self):
+        self.entries = {}
+        
+        
+    # Write the manifest file
+    def save(self):
+        GameFile.writeAtomic(self.file, json.dumps(self.entries, indent=4, sort_keys=True))
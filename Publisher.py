@@ -0,0 +1,239 @@
+"""Upload of the files of the HTML site to the FTP server"""
+# Author(s): Davide.De-Marchi@ec.europa.eu
+# Copyright © European Union 2024-2025
+# 
+# Licensed under the EUPL, Version 1.2 or as soon they will be approved by 
+# the European Commission subsequent versions of the EUPL (the "Licence");
+# 
+# You may not use this work except in compliance with the Licence.
+# 
+# You may obtain a copy of the Licence at:
+# https://joinup.ec.europa.eu/collection/eupl/eupl-text-eupl-12
+
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the Licence is distributed on an "AS IS"
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either
+# express or implied.
+# 
+# See the Licence for the specific language governing permissions and
+# limitations under the Licence.
+import concurrent.futures
+import ftplib
+import hashlib
+import io
+import json
+import os
+import queue
+import shutil
+import time
+
+
+# Name of the remote manifest: for each file of the site (path relative to the web folder) it stores the size and the hash of the file on the server
+REMOTE_MANIFEST = 'publish.json'
+
+# Size of the blocks sent to the FTP server
+BLOCK_SIZE = 1<<16
+
+
+# Returns the [size, SHA-1 hex digest] of a local file
+def fileSignature(path):
+    h = hashlib.sha1()
+    size = 0
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(BLOCK_SIZE), b''):
+            h.update(block)
+            size += len(block)
+    return [size, h.hexdigest()]
+
+
+###########################################################################################################################################################################
+# FolderServer: stand-in for an FTP connection that stores the files in a local folder (the remote paths are relative to the folder). It implements the methods
+# of ftplib.FTP used by the Publisher, so that the publishing can be tested without an FTP server
+###########################################################################################################################################################################
+class FolderServer():
+
+    def __init__(self, folder):   # Local folder that plays the role of the FTP server
+        self.folder = folder
+        
+        
+    # Returns the local path of a remote path
+    def _path(self, cmd):
+        return os.path.join(self.folder, cmd.split(' ', 1)[1])
+    
+    
+    # Store a file (cmd is 'STOR <remote path>')
+    def storbinary(self, cmd, fp, blocksize=8192):
+        path = self._path(cmd)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'wb') as f:
+            shutil.copyfileobj(fp, f, blocksize)
+            
+            
+    # Read a file (cmd is 'RETR <remote path>'), raising ftplib.error_perm if it does not exist
+    def retrbinary(self, cmd, callback, blocksize=8192):
+        path = self._path(cmd)
+        if not os.path.isfile(path):
+            raise ftplib.error_perm('550 %s: No such file'%cmd.split(' ', 1)[1])
+        with open(path, 'rb') as f:
+            for block in iter(lambda: f.read(blocksize), b''):
+                callback(block)
+                
+                
+    def quit(self):
+        pass
+    
+    
+    def close(self):
+        pass
+    
+    
+###########################################################################################################################################################################
+# Publisher: uploads the files of the web folder to the FTP server on a small pool of connections working in parallel. The size and hash of the files on the
+# server are read from a remote manifest, so that only the files that differ from the ones on the server are sent. A failed upload is retried on a new
+# connection (if the Publisher can open connections) after a short delay
+###########################################################################################################################################################################
+class Publisher():
+
+    def __init__(self,
+                 server,                                # Function that returns a new connection (ftplib.FTP or FolderServer), or a single open connection
+                 remote_folder='daigio.it/pybasket/',   # Remote folder of the site on the FTP server
+                 local_folder='web/',                   # Local folder of the site
+                 connections=4,                         # Maximum number of connections opened in parallel
+                 retries=3,                             # Number of retries of a failed upload
+                 delay=1.0):                            # Delay in seconds before the first retry (doubled at each retry)
+        
+        # A single connection is used as it is (it cannot be reopened)
+        if callable(server):
+            self.connect     = server
+            self.connections = max(1, connections)
+        else:
+            self.connect     = None
+            self.connections = 1
+            
+        self.remote_folder = remote_folder
+        self.local_folder  = local_folder
+        self.retries       = retries
+        self.delay         = delay
+        
+        self.pool   = queue.Queue()   # Idle connections
+        self.opened = []              # All the connections opened by the Publisher
+        if self.connect is None:
+            self.pool.put(server)
+        
+        self.manifest = self.readManifest()
+        
+        
+    # Returns the remote path of a local file
+    def remotePath(self, path):
+        return self.remote_folder + os.path.relpath(path, self.local_folder).replace(os.sep, '/')
+    
+    
+    # Take an idle connection from the pool (opening a new one if the pool is empty)
+    def acquire(self):
+        try:
+            return self.pool.get_nowait()
+        except queue.Empty:
+            if self.connect is None:
+                return self.pool.get()
+            conn = self.connect()
+            self.opened.append(conn)
+            return conn
+        
+        
+    # Give back a connection to the pool (a broken connection is closed and replaced by a new one at the next acquire)
+    def release(self, conn, broken=False):
+        if broken and self.connect is not None:
+            try:
+                conn.close()
+            except:
+                pass
+        else:
+            self.pool.put(conn)
+            
+            
+    # Read the remote manifest (empty if not present on the server)
+    def readManifest(self):
+        buffer = io.BytesIO()
+        conn = self.acquire()
+        try:
+            conn.retrbinary('RETR %s'%(self.remote_folder + REMOTE_MANIFEST), buffer.write)
+            manifest = json.loads(buffer.getvalue().decode('utf-8'))
+        except ftplib.error_perm:
+            manifest = {}
+        except (ValueError, UnicodeDecodeError):
+            manifest = {}
+        finally:
+            self.release(conn)
+        return manifest
+    
+    
+    # Write the remote manifest on the server
+    def writeManifest(self):
+        data = json.dumps(self.manifest, indent=0, sort_keys=True).encode('utf-8')
+        self._upload(io.BytesIO(data), self.remote_folder + REMOTE_MANIFEST)
+        
+        
+    # Upload a file object to a remote path retrying on errors
+    def _upload(self, fp, remote_path):
+        delay = self.delay
+        for attempt in range(self.retries + 1):
+            conn = self.acquire()
+            try:
+                fp.seek(0)
+                conn.storbinary('STOR %s'%remote_path, fp, BLOCK_SIZE)
+                self.release(conn)
+                return
+            except ftplib.all_errors:
+                self.release(conn, broken=True)
+                if attempt == self.retries:
+                    raise
+                time.sleep(delay)
+                delay *= 2
+                
+                
+    # Upload a local file
+    def _uploadFile(self, path):
+        with open(path, 'rb') as fp:
+            self._upload(fp, self.remotePath(path))
+            
+            
+    # Upload the files that differ from the ones on the server and update the remote manifest. Returns the list of the files that could not be uploaded
+    def publish(self, paths, messages=None):
+        paths = list(dict.fromkeys(paths))
+        
+        signatures = { path: fileSignature(path) for path in paths if os.path.isfile(path) }
+        changed = [path for path in signatures if self.manifest.get(self.remotePath(path)) != signatures[path]]
+        
+        failed = []
+        sent   = 0
+        with concurrent.futures.ThreadPoolExecutor(max_workers=self.connections) as executor:
+            futures = { executor.submit(self._uploadFile, path): path for path in changed }
+            for future in concurrent.futures.as_completed(futures):
+                path = futures[future]
+                try:
+                    future.result()
+                    self.manifest[self.remotePath(path)] = signatures[path]
+                    sent += signatures[path][0]
+                except ftplib.all_errors as e:
+                    failed.append(path)
+                    if messages is not None:
+                        with messages:
+                            print('Upload of %s failed: %s'%(path, str(e)))
+                            
+        if len(changed) > len(failed):
+            self.writeManifest()
+            
+        if messages is not None:
+            with messages:
+                print('Published %d files (%.1f MB), %d unchanged, %d failed'%(len(changed)-len(failed), sent/1e6, len(signatures)-len(changed), len(failed)))
+        return failed
+    
+    
+    # Close the connections opened by the Publisher
+    def close(self):
+        for conn in self.opened:
+            try:
+                conn.quit()
+            except:
+                pass
+        self.opened = []
@@ -383,7 +383,7 @@ class ScoreBoard(widgets.VBox):
         self.timer_last_second_elapsed = 0.0
         self.timer_compensate()
         self.updateInfoOnPlayerImages()
-        self.game.saveGame()
+        self.game.saveState()
 
     
     # Called when timer reaches 0 seconds: perform end of quarter activities
@@ -396,6 +396,7 @@ class ScoreBoard(widgets.VBox):
             self.on_quarter_end()
         
         self.game.saveGame()
+        self.game.flush()
         
         # If the game continues
         if self.quarter < 4 or self.pb1.points == self.pb2.points:
@@ -851,7 +852,7 @@ class ScoreBoard(widgets.VBox):
             self.game.game_data['referee1']     = referee1.v_model
             self.game.game_data['referee2']     = referee2.v_model
             
-            game_file = './data/%d.a-%s-%s.game' % (self.game.game_data['round'], self.game.game_data['phase'], self.game.game_data['opponents'])
+            game_file = './data/%d.a-%s-%s%s' % (self.game.game_data['round'], self.game.game_data['phase'], self.game.game_data['opponents'], Config.GAME_EXTENSION)
             if game_file != self.game.game_file:   # New game created
                 self.game.game_data["status"] = {
                                                  "quarter": 1,
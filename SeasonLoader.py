@@ -0,0 +1,281 @@
+"""Parallel loading of the games of a season"""
+# Author(s): Davide.De-Marchi@ec.europa.eu
+# Copyright © European Union 2024-2025
+# 
+# Licensed under the EUPL, Version 1.2 or as soon they will be approved by 
+# the European Commission subsequent versions of the EUPL (the "Licence");
+# 
+# You may not use this work except in compliance with the Licence.
+# 
+# You may obtain a copy of the Licence at:
+# https://joinup.ec.europa.eu/collection/eupl/eupl-text-eupl-12
+
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the Licence is distributed on an "AS IS"
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either
+# express or implied.
+# 
+# See the Licence for the specific language governing permissions and
+# limitations under the Licence.
+import concurrent.futures
+import glob
+import os
+import json
+import copy
+import pandas as pd
+
+# Optional Parquet support for the cache of the season (the frames are pickled if pyarrow is not installed)
+try:
+    import pyarrow
+except ImportError:
+    pyarrow = None
+
+# local imports
+import Config
+import GameModel
+import GameFile
+import Catalog
+
+
+# Folder of the cache of the season (created inside the data folder)
+CACHE_FOLDER = 'season_cache'
+
+# Version of the cache of the season (the entries of a cache with a different version are discarded)
+CACHE_VERSION = 1
+
+
+# Model used by a worker process to load the games (created once for each process by _init)
+_model = None
+
+
+# Initialization of a worker process
+def _init(team_file):
+    global _model
+    _model = GameModel.GameModel(team_file)
+
+
+# Add the columns of the game (game_number, round, phase, opponents, home and win) to the events DataFrame of a game
+def gameColumns(df, file, progressive, game_data):
+    name = GameFile.gameName(file)
+    elems = name.split('-')
+    df['game_number'] = progressive
+    df['round'] = int(elems[0].replace('.a',''))
+    df['phase'] = elems[1]
+    df['opponents'] = elems[2]
+    df['home'] = game_data['home']
+    if game_data['home']:
+        df['win'] = game_data['status']['points1'] > game_data['status']['points2']
+    else:
+        df['win'] = game_data['status']['points2'] > game_data['status']['points1']
+
+
+# Add the players_info of a game to the players_info of the season (time_on_field, plusminus and number of games played are summed)
+def mergePlayersInfo(players_info, pi):
+    for player_name in pi:
+        if player_name in players_info:
+            players_info[player_name]['time_on_field'] += pi[player_name]['time_on_field']
+            players_info[player_name]['plusminus']     += pi[player_name]['plusminus']
+            if pi[player_name]['time_on_field'] > 0:
+                players_info[player_name]['games'] += 1
+        else:
+            players_info[player_name] = pi[player_name]
+            if pi[player_name]['time_on_field'] > 0:
+                players_info[player_name]['games'] = 1
+            else:
+                players_info[player_name]['games'] = 0
+
+
+# Load a game and add the columns of the game to its events (executed in a worker process). Returns the events DataFrame (or None if the game has no events)
+# and the players_info of the game
+def _load(task):
+    file, progressive = task
+    _model.loadGame(file)
+    g = _model.game_data
+    
+    df = _model.events_df
+    if df.shape[0] > 0:
+        gameColumns(df, file, progressive, g)
+    else:
+        df = None
+        
+    return df, g['players_info']
+
+
+# Returns the team file and the list of the game files of a season in the order of the phases and of the rounds (or None, None if no .team file is found)
+def seasonFiles(folder='./data',    # Folder containing the .team file and the game files
+                catalog=None):      # Catalog of the folder (opened here if None)
+    teamfiles = glob.glob('%s/*.team'%folder)
+    if len(teamfiles) == 0:
+        print('No .team file found in %s folder'%folder)
+        return None, None
+    
+    team_file = teamfiles[0]
+    with open(team_file) as f:
+        team_data = json.load(f)
+        
+    if catalog is None:
+        catalog = Catalog.Catalog(folder)
+    phases = team_data.get('phases', [])
+    if len(phases) == 0:
+        phases = catalog.phases()
+        
+    files = []
+    for phase in phases:
+        files.extend(catalog.files(phase))
+    return team_file, files
+
+
+###########################################################################################################################################################################
+# SeasonCache: cache on disk of the games of a season as loaded by loadSeason. For each game file, the index (season.json) stores the fingerprint of the file and
+# its players_info, while the events DataFrame is stored in a separate Parquet file (or pickle file if pyarrow is not installed). An entry is used only if
+# the fingerprint of the game file is unchanged, so only the games modified since the last run are loaded again. The index also stores mtime and size of the
+# .team file: the games load their missing players_info from the roster, so all the entries are discarded when the .team file changes
+###########################################################################################################################################################################
+class SeasonCache():
+
+    def __init__(self,
+                 folder='./data',     # Folder containing the game files
+                 team_file=None):     # Path of the .team file of the season
+        self.folder  = os.path.join(folder, CACHE_FOLDER)
+        self.file    = os.path.join(self.folder, 'season.json')
+        self.ext     = '.parquet' if pyarrow is not None else '.pkl'
+        self.team    = GameFile.fileStat(team_file) if team_file is not None else None
+        self.entries = {}                     # Name of the game file (without folder) --> { 'fingerprint', 'frame', 'players_info' }
+        self.changed = False
+        
+        if os.path.isfile(self.file):
+            try:
+                with open(self.file, encoding='utf-8') as f:
+                    data = json.load(f)
+                if data.get('version') == CACHE_VERSION and data.get('team') == self.team:
+                    self.entries = data['games']
+            except:
+                self.entries = {}
+                
+                
+    # Returns the (events DataFrame, players_info) of a game file if present in the cache with the same fingerprint, otherwise None
+    def get(self, file):
+        entry = self.entries.get(os.path.basename(file))
+        if entry is None or entry['fingerprint'] != GameFile.fingerprint(file):
+            return None
+        
+        df = None
+        if entry['frame'] is not None:
+            try:
+                path = os.path.join(self.folder, entry['frame'])
+                if path.endswith('.parquet'): df = pd.read_parquet(path)
+                else:                         df = pd.read_pickle(path)
+            except:
+                return None
+        return df, copy.deepcopy(entry['players_info'])
+    
+    
+    # Store in the cache the events DataFrame (or None) and the players_info of a game file
+    def put(self, file, df, players_info):
+        name = os.path.basename(file)
+        frame = None
+        if df is not None:
+            os.makedirs(self.folder, exist_ok=True)
+            frame = GameFile.gameName(file) + self.ext
+            path = os.path.join(self.folder, frame)
+            if self.ext == '.parquet': df.to_parquet(path)
+            else:                      df.to_pickle(path)
+            
+        self.entries[name] = { 'fingerprint': GameFile.fingerprint(file), 'frame': frame, 'players_info': copy.deepcopy(players_info) }
+        self.changed = True
+        
+        
+    # Remove the entries of the game files not in the list
+    def prune(self, files):
+        names = set([os.path.basename(file) for file in files])
+        for name in list(self.entries.keys()):
+            if name not in names:
+                entry = self.entries.pop(name)
+                if entry['frame'] is not None:
+                    path = os.path.join(self.folder, entry['frame'])
+                    if os.path.isfile(path):
+                        os.remove(path)
+                self.changed = True
+                
+                
+    # Write the index of the cache (if changed)
+    def save(self):
+        if self.changed:
+            os.makedirs(self.folder, exist_ok=True)
+            GameFile.writeAtomic(self.file, GameFile.dumps({ 'version': CACHE_VERSION, 'team': self.team, 'games': self.entries }))
+            self.changed = False
+            
+            
+# Load a list of games given as (file, progressive) tuples in worker processes. Returns the list of the (events DataFrame, players_info) in the order of the tasks
+def loadGames(team_file, tasks, processes=None):
+    if processes is None:
+        processes = os.cpu_count() or 1
+    processes = min(processes, len(tasks))
+    
+    if processes <= 1:
+        _init(team_file)
+        return [_load(task) for task in tasks]
+    
+    # The pending writes are completed before the worker processes are started
+    GameFile.writer.flush()
+        
+    with concurrent.futures.ProcessPoolExecutor(max_workers=processes, initializer=_init, initargs=(team_file,)) as executor:
+        return list(executor.map(_load, tasks, chunksize=max(1, len(tasks)//(4*processes))))
+        
+        
+###########################################################################################################################################################################
+# Load all the games of a season in parallel worker processes. Returns the list of the events DataFrames of the games with events (each with the columns
+# game_number, round, phase, opponents, home and win added) and the players_info of the season (time_on_field, plusminus and number of games summed on all the
+# games). The order of the games and their progressive number do not depend on the number of processes. The games without events according to the Catalog
+# are not loaded. If cache is True, the games not modified since the last call are read from the SeasonCache and only the others are loaded
+###########################################################################################################################################################################
+def loadSeason(folder='./data',     # Folder containing the .team file and the game files
+               processes=None,      # Number of worker processes (None for the number of CPUs, 1 to load the games in the current process)
+               cache=True):         # If True the SeasonCache of the folder is used and updated
+    
+    catalog = Catalog.Catalog(folder)
+    team_file, files = seasonFiles(folder, catalog)
+    if team_file is None:
+        return None, None
+    
+    tasks = [(file, progressive) for progressive, file in enumerate(files, 1)]
+    
+    # Games not played yet (they keep their progressive number, but add no events and no time on field to the season)
+    results = [None]*len(tasks)
+    for i, (file, progressive) in enumerate(tasks):
+        if catalog.entry(file).get('events', 1) == 0:
+            results[i] = (None, {})
+    
+    # Games read from the cache (the progressive number is updated, since games may have been added or removed)
+    if cache:
+        season_cache = SeasonCache(folder, team_file)
+        for i, (file, progressive) in enumerate(tasks):
+            if results[i] is not None:
+                continue
+            result = season_cache.get(file)
+            if result is not None:
+                if result[0] is not None:
+                    result[0]['game_number'] = progressive
+                results[i] = result
+                
+    stale = [i for i, result in enumerate(results) if result is None]
+    if len(stale) > 0:
+        loaded = loadGames(team_file, [tasks[i] for i in stale], processes)
+        for i, result in zip(stale, loaded):
+            results[i] = result
+            if cache:
+                season_cache.put(tasks[i][0], result[0], result[1])
+            
+    if cache:
+        season_cache.prune(files)
+        season_cache.save()
+
+    # Merge the players_info of the games in the order of the games
+    allevents = []
+    players_info = {}
+    for df, pi in results:
+        mergePlayersInfo(players_info, pi)
+        if df is not None:
+            allevents.append(df)
+            
+    return allevents, players_info
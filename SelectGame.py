@@ -26,6 +26,22 @@ import json
 # vois imports
 from vois.vuetify import dialogGeneric, selectSingle, tabs
 
+# local imports
+import Catalog
+
+
+# Returns the label of a game in the lists of the games: name of the file, date and score (the score only if the game was started)
+def gameLabel(entry):
+    label = entry['name']
+    if 'date' in entry:
+        label += '   %s'%entry['date']
+    status = entry.get('status')
+    if status is not None and entry.get('events', 0) > 0:
+        label += '   %d-%d'%(status.get('points1', 0), status.get('points2', 0))
+        if not status.get('gameover', False):
+            label += ' (in corso)'
+    return label
+
 
 ###########################################################################################################################################################################
 # SelectGame class
@@ -36,16 +52,9 @@ class SelectGame():
         self.output = output
         self.on_ok  = on_ok
         
-        # Conversion to int without errors
-        def toint(x):
-            try:
-                return int(x)
-            except:
-                return 999999
-            
         spacer = v.Html(tag='div', style_='width: 20px; height: 50px;', children=[''])
         
-        allfiles = glob.glob('%s/*.game'%folder)
+        catalog = Catalog.Catalog(folder)
         
         # Try to read phases from the team file
         teamfiles = glob.glob('%s/*.team'%folder)
@@ -58,22 +67,24 @@ class SelectGame():
                     self.phases = team_data['phases']
         
         if len(self.phases) == 0:
-            self.phases = sorted(list(set([os.path.basename(x).split('-')[1] for x in allfiles if '-' in x and '.a-' in x])))
+            self.phases = catalog.phases()
         
         self.cards = []
         self.sels  = []
+        self.files = {}     # Label of a game --> path of the game file
         for phase in self.phases:
 
-            # File of the phase
-            files = [x for x in allfiles if phase in x and os.path.basename(x).split('-')[1] == phase]
-
-            # Sort on increasing phase + round
-            rounds = [toint(os.path.basename(x).split('.')[0]) for x in files]
-            files  = [file for r, file in sorted(zip(rounds, files))]
+            # Games of the phase sorted on increasing round, described by the metadata stored in the catalog
+            labels = []
+            for name, entry in catalog.games(phase):
+                label = gameLabel(entry)
+                self.files[label] = catalog.path(name)
+                labels.append(label)
 
             sel = selectSingle.selectSingle('Select the game to load (%s):'%phase,
-                                            files,
+                                            labels,
                                             selection='',
+                                            mapping=lambda label: self.files.get(label, label),
                                             width=700,
                                             onchange=self.onselect)
             c = v.Card(flat=True, children=[sel.draw(), spacer], class_='pa-0 ma-0 mt-5')
@@ -0,0 +1,163 @@
+"""
+Index of the throws of the season by player, phase, home/away, quarter and zone of the court
+"""
+# Author(s): Davide.De-Marchi@ec.europa.eu
+# Copyright © European Union 2024-2025
+# 
+# Licensed under the EUPL, Version 1.2 or as soon they will be approved by 
+# the European Commission subsequent versions of the EUPL (the "Licence");
+# 
+# You may not use this work except in compliance with the Licence.
+# 
+# You may obtain a copy of the Licence at:
+# https://joinup.ec.europa.eu/collection/eupl/eupl-text-eupl-12
+
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the Licence is distributed on an "AS IS"
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either
+# express or implied.
+# 
+# See the Licence for the specific language governing permissions and
+# limitations under the Licence.
+import pandas as pd
+import numpy as np
+
+# local imports
+import ShotZones
+
+
+# Dimensions of the cube of the counts of the throws
+DIMENSIONS = ['player', 'phase', 'home', 'quarter', 'zone', 'event']
+
+# Throw events (T2ok, T2err, T3ok, T3err)
+THROW_EVENTS = [2, 3, 4, 5]
+
+
+###########################################################################################################################################################################
+# Index of the throws of a season: counts of the throws for each player, phase, home/away, quarter, zone of the court and event, and throws sorted by cell of the index
+###########################################################################################################################################################################
+class ShotIndex:
+    
+    def __init__(self, df):         # Pandas DataFrame of the events of the season (from Analytics.seasonEvents or Analytics.teamEvents)
+        
+        # Throws of the team in the order of the events
+        self.df = ShotZones.throws(df).reset_index(drop=True)
+        
+        # Values of each dimension
+        self.values = {'player':  sorted(self.df['player'].astype(str).unique()),
+                       'phase':   sorted(self.df['phase'].astype(str).unique()),
+                       'home':    [False, True],
+                       'quarter': sorted([int(q) for q in self.df['quarter'].unique()]),
+                       'zone':    list(ShotZones.ZONES),
+                       'event':   THROW_EVENTS}
+        self.shape = tuple([len(self.values[d]) for d in DIMENSIONS])
+        
+        # Cell of the cube of each throw
+        zones = ShotZones.zoneIndex(self.df['x'].to_numpy(), self.df['y'].to_numpy(), self.df['event'].isin([4,5]).to_numpy())
+        coords = [pd.Index(self.values['player']).get_indexer(self.df['player'].astype(str)),
+                  pd.Index(self.values['phase']).get_indexer(self.df['phase'].astype(str)),
+                  self.df['home'].to_numpy().astype(int),
+                  pd.Index(self.values['quarter']).get_indexer(self.df['quarter'].astype(int)),
+                  zones,
+                  self.df['event'].to_numpy().astype(int) - 2]
+        cells = np.ravel_multi_index(coords, self.shape) if self.df.shape[0] > 0 else np.zeros(0, dtype=int)
+        
+        # Counts of the throws for each cell
+        self.cube = np.bincount(cells, minlength=int(np.prod(self.shape))).reshape(self.shape)
+        
+        # Positions of the throws sorted by cell, and offset of the first throw of each cell in the sorted positions
+        self.order   = np.argsort(cells, kind='stable')
+        self.offsets = np.concatenate([[0], np.cumsum(self.cube.ravel())])
+        
+        
+    # Returns the indices selected in a dimension by a filter (None to select all the values, a single value or a list of values)
+    def indices(self, dimension, value):
+        values = self.values[dimension]
+        if value is None:
+            return np.arange(len(values))
+        if not isinstance(value, (list, tuple, set)):
+            value = [value]
+        if dimension == 'zone':
+            value = [values[v] if isinstance(v, (int, np.integer)) else v for v in value]
+        return np.array([i for i, v in enumerate(values) if v in value], dtype=int)
+        
+        
+    # Returns the indices selected in each dimension by the filters
+    def selection(self,
+                  player=None,      # Name of the player (or list of names)
+                  phase=None,       # Phase of the championship (or list of phases)
+                  home=None,        # True for home games, False for away games
+                  quarter=None,     # Quarter (or list of quarters)
+                  zone=None,        # Name or index of the zone in ShotZones.ZONES (or list of zones)
+                  points=None,      # 2 or 3 for the 2 or 3 points throws
+                  scored=None):     # True for the scored throws, False for the missed throws
+        
+        events = THROW_EVENTS
+        if points is not None:
+            events = [e for e in events if (e in [4,5]) == (points == 3)]
+        if scored is not None:
+            events = [e for e in events if (e in [2,4]) == scored]
+        
+        filters = {'player': player, 'phase': phase, 'home': home, 'quarter': quarter, 'zone': zone, 'event': events}
+        return [self.indices(d, filters[d]) for d in DIMENSIONS]
+    
+    
+    # Returns the indices selected in each dimension by the filters, restricted to the scored throws (events with even codes: T2ok, T3ok)
+    def scoredSelection(self, **filters):
+        sel = self.selection(**filters)
+        sel[-1] = np.array([i for i in sel[-1] if THROW_EVENTS[i] in [2,4]], dtype=int)
+        return sel
+    
+    
+    # Returns the sub-cube of the counts selected by the filters
+    def counts(self, **filters):
+        return self.cube[np.ix_(*self.selection(**filters))]
+    
+    
+    # Returns the number of throws selected by the filters
+    def count(self, **filters):
+        return int(self.counts(**filters).sum())
+    
+    
+    # Returns made, attempted and percentage of the throws selected by the filters
+    def stats(self, **filters):
+        made      = int(self.cube[np.ix_(*self.scoredSelection(**filters))].sum())
+        attempted = self.count(**filters)
+        if attempted == 0:
+            return made, attempted, 0.0
+        return made, attempted, 100.0*made/attempted
+    
+    
+    # Returns a Pandas DataFrame indexed by the values of a dimension with made, attempted and percentage of the throws selected by the filters
+    def table(self, dimension, **filters):
+        axes = tuple([i for i, d in enumerate(DIMENSIONS) if d != dimension])
+        attempted = self.counts(**filters).sum(axis=axes)
+        made = self.cube[np.ix_(*self.scoredSelection(**filters))].sum(axis=axes)
+        
+        percentage = np.where(attempted > 0, 100.0*made/np.maximum(attempted,1), 0.0)
+        index = [self.values[dimension][i] for i in self.selection(**filters)[DIMENSIONS.index(dimension)]]
+        return pd.DataFrame({'made': made, 'attempted': attempted, 'percentage': percentage}, index=index)
+    
+    
+    # Returns a Pandas DataFrame indexed by the name of the zones with made, attempted and percentage of the throws selected by the filters
+    def zoneStats(self, **filters):
+        return self.table('zone', **filters)
+    
+    
+    # Returns a Pandas DataFrame indexed by the name of the players with made, attempted and percentage of the throws selected by the filters
+    def playerStats(self, **filters):
+        return self.table('player', **filters)
+    
+    
+    # Returns the Pandas DataFrame of the throws selected by the filters, in the order of the events (to display them with ThrowMap.renderThrows or ShotZones.renderZones)
+    def events(self, **filters):
+        sel = self.selection(**filters)
+        cells = np.ravel_multi_index(np.meshgrid(*sel, indexing='ij'), self.shape).ravel()
+        
+        # Positions of the throws of all the cells selected, read from the offsets of the cells
+        starts = self.offsets[cells]
+        sizes  = self.offsets[cells+1] - starts
+        n = int(sizes.sum())
+        positions = np.repeat(starts - np.cumsum(sizes) + sizes, sizes) + np.arange(n)
+        
+        return self.df.iloc[np.sort(self.order[positions])]
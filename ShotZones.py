@@ -0,0 +1,250 @@
+"""
+Aggregation of the throws in zones of the court and in hexagonal cells
+"""
+# Author(s): Davide.De-Marchi@ec.europa.eu
+# Copyright © European Union 2024-2025
+# 
+# Licensed under the EUPL, Version 1.2 or as soon they will be approved by 
+# the European Commission subsequent versions of the EUPL (the "Licence");
+# 
+# You may not use this work except in compliance with the Licence.
+# 
+# You may obtain a copy of the Licence at:
+# https://joinup.ec.europa.eu/collection/eupl/eupl-text-eupl-12
+
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the Licence is distributed on an "AS IS"
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either
+# express or implied.
+# 
+# See the Licence for the specific language governing permissions and
+# limitations under the Licence.
+import pandas as pd
+import math
+import numpy as np
+from PIL import Image, ImageDraw, ImageFont
+
+# local imports
+import Config
+import ThrowMap
+
+
+# Position of the basket in percentage of the image of the field (basket on the left, as the x,y coordinates of the throws are stored)
+BASKET_X = 14.6
+BASKET_Y = 50.1
+
+# Dimensions of the court in pixels of the full resolution image of the field (ThrowMap.IMAGE_WIDTH_PIXELS x ThrowMap.IMAGE_HEIGHT_PIXELS)
+THREE_RADIUS   = 437.0     # Radius of the 3 points line
+CORNER_LENGTH  = 170.0     # Length from the baseline of the straight part of the 3 points line (corners)
+KEY_LENGTH     = 390.0     # Length from the baseline of the painted area
+KEY_HALF_WIDTH = 163.0     # Half of the width of the painted area
+CENTER_ANGLE   = 30.0      # Angle in degrees from the axis of the court that separates the central zones from the lateral ones
+
+# Radius in pixels of the full resolution image of the hexagonal cells
+HEX_RADIUS = 40.0
+
+# Zones of the court (left and right from the point of view of the shooter facing the basket)
+ZONES = ['Paint', 'Mid-range left', 'Mid-range center', 'Mid-range right',
+         'Corner 3 left', 'Wing 3 left', 'Top 3', 'Wing 3 right', 'Corner 3 right']
+
+
+###########################################################################################################################################################################
+# Classification of the positions in zones of the court
+###########################################################################################################################################################################
+
+# Returns the distances in pixels from the basket of positions given in percentage of the image of the field
+def basketDistance(x, y):
+    dx = (np.asarray(x, dtype=float) - BASKET_X)*ThrowMap.IMAGE_WIDTH_PIXELS/100.0
+    dy = (np.asarray(y, dtype=float) - BASKET_Y)*ThrowMap.IMAGE_HEIGHT_PIXELS/100.0
+    return dx, dy
+
+
+# Returns a boolean array that is True for the positions outside of the 3 points line
+def isThree(x, y):
+    dx, dy = basketDistance(x, y)
+    px = np.asarray(x, dtype=float)*ThrowMap.IMAGE_WIDTH_PIXELS/100.0
+    corner = px < CORNER_LENGTH
+    return np.where(corner, np.abs(dy) >= THREE_RADIUS, np.hypot(dx, dy) >= THREE_RADIUS)
+
+
+# Returns the index in ZONES of each position (three is a boolean array that is True for the 3 points throws)
+def zoneIndex(x, y, three):
+    dx, dy = basketDistance(x, y)
+    px = np.asarray(x, dtype=float)*ThrowMap.IMAGE_WIDTH_PIXELS/100.0
+    three = np.asarray(three, dtype=bool)
+    
+    center = np.degrees(np.arctan2(np.abs(dy), dx)) < CENTER_ANGLE
+    left   = dy > 0
+    paint  = (px < KEY_LENGTH) & (np.abs(dy) < KEY_HALF_WIDTH)
+    corner = px < CORNER_LENGTH
+    
+    two   = np.where(paint, 0, np.where(center, 2, np.where(left, 1, 3)))
+    three = np.where(center, 6, np.where(left, np.where(corner, 4, 5), np.where(corner, 8, 7))) * three
+    return np.where(three > 0, three, two)
+
+
+###########################################################################################################################################################################
+# Aggregation of the throws
+###########################################################################################################################################################################
+
+# Returns the throws (events 2,3,4,5) of a player (or of the team if player_name is None) from a Pandas DataFrame of events
+def throws(df, player_name=None):
+    if player_name is None: tdf = df[(df['team']==Config.TEAM)]
+    else:                   tdf = df[(df['team']==Config.TEAM)&(df['player']==player_name)]
+    return tdf[tdf['event'].isin([2,3,4,5])]
+
+
+# Returns the scored, attempted and percentage for each bin from the array of the bin of each throw and the array of the scored flags
+def binStats(bins, scored, nbins):
+    attempted = np.bincount(bins, minlength=nbins)
+    made      = np.bincount(bins, weights=scored, minlength=nbins).astype(int)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        percentage = np.where(attempted > 0, 100.0*made/np.maximum(attempted,1), 0.0)
+    return made, attempted, percentage
+
+
+# Returns a Pandas DataFrame indexed by the name of the zones with the made, attempted and percentage of the throws of a player (or of the team)
+def zoneStats(df, player_name=None):
+    tdf = throws(df, player_name)
+    zones  = zoneIndex(tdf['x'].to_numpy(), tdf['y'].to_numpy(), tdf['event'].isin([4,5]).to_numpy())
+    scored = tdf['event'].isin([2,4]).to_numpy()
+    made, attempted, percentage = binStats(zones, scored, len(ZONES))
+    return pd.DataFrame({'made': made, 'attempted': attempted, 'percentage': percentage}, index=ZONES)
+
+
+# Returns the number of columns and rows of each of the two rectangular lattices of the centers of the hexagonal cells
+def hexGrid(radius=HEX_RADIUS):
+    sx = math.sqrt(3.0)*radius
+    sy = 3.0*radius
+    nx = int(math.ceil(ThrowMap.IMAGE_WIDTH_PIXELS/sx))  + 1
+    ny = int(math.ceil(ThrowMap.IMAGE_HEIGHT_PIXELS/sy)) + 1
+    return sx, sy, nx, ny
+
+
+# Returns the center in pixels of the full resolution image of all the hexagonal cells
+def hexCenters(radius=HEX_RADIUS):
+    sx, sy, nx, ny = hexGrid(radius)
+    i, j = np.meshgrid(np.arange(nx), np.arange(ny))
+    cx = np.concatenate([i.ravel()*sx, (i.ravel()+0.5)*sx])
+    cy = np.concatenate([j.ravel()*sy, (j.ravel()+0.5)*sy])
+    return cx, cy
+
+
+# Returns the index of the hexagonal cell of each position (the nearest center of the two rectangular lattices that together form the hexagonal one)
+def hexIndex(x, y, radius=HEX_RADIUS):
+    sx, sy, nx, ny = hexGrid(radius)
+    px = np.asarray(x, dtype=float)*ThrowMap.IMAGE_WIDTH_PIXELS/100.0/sx
+    py = np.asarray(y, dtype=float)*ThrowMap.IMAGE_HEIGHT_PIXELS/100.0/sy
+    
+    i1 = np.clip(np.rint(px), 0, nx-1)
+    j1 = np.clip(np.rint(py), 0, ny-1)
+    i2 = np.clip(np.floor(px), 0, nx-1)
+    j2 = np.clip(np.floor(py), 0, ny-1)
+    d1 = ((px-i1)*sx)**2     + ((py-j1)*sy)**2
+    d2 = ((px-i2-0.5)*sx)**2 + ((py-j2-0.5)*sy)**2
+    
+    return np.where(d1 <= d2, j1*nx + i1, nx*ny + j2*nx + i2).astype(int)
+
+
+# Returns a Pandas DataFrame of the hexagonal cells containing throws of a player (or of the team) with their center in percentage of the image, made, attempted and percentage
+def hexStats(df, player_name=None, radius=HEX_RADIUS):
+    tdf = throws(df, player_name)
+    cells  = hexIndex(tdf['x'].to_numpy(), tdf['y'].to_numpy(), radius)
+    scored = tdf['event'].isin([2,4]).to_numpy()
+    cx, cy = hexCenters(radius)
+    made, attempted, percentage = binStats(cells, scored, len(cx))
+    
+    hdf = pd.DataFrame({'x': 100.0*cx/ThrowMap.IMAGE_WIDTH_PIXELS, 'y': 100.0*cy/ThrowMap.IMAGE_HEIGHT_PIXELS,
+                        'made': made, 'attempted': attempted, 'percentage': percentage})
+    return hdf[hdf['attempted'] > 0]
+
+
+###########################################################################################################################################################################
+# Rendering of the zones and of the hexagonal cells as a shaded overlay on the image of the field
+###########################################################################################################################################################################
+
+# Returns the RGBA color of a percentage of throws scored (from red for 0% to green for 100%) with the given opacity
+def percentageColor(percentage, alpha):
+    t = np.clip(np.asarray(percentage, dtype=float)/100.0, 0.0, 1.0)
+    r = np.where(t < 0.5, 220, 220 - 340*(t-0.5)).astype(int)
+    g = np.where(t < 0.5, 60 + 320*t, 220).astype(int)
+    b = np.full(t.shape, 60)
+    return np.stack([r, g, b, np.asarray(alpha, dtype=int)*np.ones(t.shape, dtype=int)], axis=-1)
+
+
+# Labels of the zones of the pixels of images of the field: (width, height, field_left) --> array of the index of the zone of each pixel
+_zonemaps = {}
+
+# Returns the array of the index in ZONES of each pixel of an image of the field of the given size
+def zoneMap(size, field_left=True):
+    key = (size[0], size[1], field_left)
+    if key not in _zonemaps:
+        w,h = size
+        x, y = np.meshgrid(100.0*(np.arange(w) + 0.5)/w, 100.0*(np.arange(h) + 0.5)/h)
+        if not field_left: x = 100.0 - x
+        _zonemaps[key] = zoneIndex(x, y, isThree(x, y))
+    return _zonemaps[key]
+
+
+# Write the made/attempted and the percentage of a bin centered in (x,y) pixels
+def drawLabel(draw, x, y, made, attempted, percentage, font):
+    for dy, text in [(-9, '%d/%d'%(made, attempted)), (9, '%.0f%%'%percentage)]:
+        draw.text((x, y+dy), text, 'black', font=font, anchor='mm')
+
+
+# Returns the PIL image of the field with the throws of a player (or of the team if player_name is None) aggregated in zones or in hexagonal cells
+def renderZones(df,                   # Pandas DataFrame of the events (a single game or the season from Analytics.seasonEvents)
+                player_name=None,     # Name of the player (None for the team)
+                kind='zones',         # 'zones' for the zones of the court, 'hex' for the hexagonal cells
+                field_left=True,      # Basket is on the left of the image
+                radius=HEX_RADIUS,    # Radius of the hexagonal cells in pixels of the full resolution image
+                labels=True):         # If True the made/attempted and the percentage of each bin are written
+    
+    image = ThrowMap.fieldImage(1, field_left).convert('RGBA')
+    w,h = image.size
+    font = ImageFont.truetype('fonts/Roboto-Bold.ttf', 13)
+    
+    if kind == 'hex':
+        hdf = hexStats(df, player_name, radius)
+        overlay = Image.new('RGBA', image.size, (0,0,0,0))
+        draw = ImageDraw.Draw(overlay)
+        if hdf.shape[0] > 0:
+            # Cells more transparent when they contain less throws
+            alpha = 90 + 130*hdf['attempted'].to_numpy()/hdf['attempted'].max()
+            rgba = percentageColor(hdf['percentage'].to_numpy(), alpha)
+            r = radius*w/ThrowMap.IMAGE_WIDTH_PIXELS
+            corners = [(r*math.cos(math.radians(a)), r*math.sin(math.radians(a))) for a in range(30, 390, 60)]
+            for (x, y), color in zip(zip(hdf['x'].tolist(), hdf['y'].tolist()), rgba.tolist()):
+                if not field_left: x = 100.0 - x
+                cx = w*x/100.0
+                cy = h*y/100.0
+                draw.polygon([(cx+dx, cy+dy) for dx,dy in corners], fill=tuple(color), outline=(255,255,255,160))
+        image = Image.alpha_composite(image, overlay)
+        if labels and hdf.shape[0] > 0:
+            draw = ImageDraw.Draw(image)
+            small = ImageFont.truetype('fonts/Roboto-Bold.ttf', 9)
+            for x, y, attempted in zip(hdf['x'].tolist(), hdf['y'].tolist(), hdf['attempted'].tolist()):
+                if not field_left: x = 100.0 - x
+                draw.text((w*x/100.0, h*y/100.0), '%d'%attempted, 'black', font=small, anchor='mm')
+    else:
+        zdf = zoneStats(df, player_name)
+        zones = zoneMap(image.size, field_left)
+        
+        # Color of each zone (transparent if no throws) applied to all the pixels with a single lookup
+        alpha = np.where(zdf['attempted'].to_numpy() > 0, 150, 0)
+        lut = percentageColor(zdf['percentage'].to_numpy(), alpha).astype(np.uint8)
+        overlay = Image.fromarray(lut[zones], 'RGBA')
+        image = Image.alpha_composite(image, overlay)
+        
+        if labels:
+            # Label of each zone at the center of its pixels
+            draw = ImageDraw.Draw(image)
+            counts = np.bincount(zones.ravel(), minlength=len(ZONES))
+            ys, xs = np.indices(zones.shape)
+            mx = np.bincount(zones.ravel(), weights=xs.ravel(), minlength=len(ZONES))/np.maximum(counts,1)
+            my = np.bincount(zones.ravel(), weights=ys.ravel(), minlength=len(ZONES))/np.maximum(counts,1)
+            for i, row in enumerate(zdf.itertuples()):
+                if row.attempted > 0:
+                    drawLabel(draw, mx[i], my[i], row.made, row.attempted, row.percentage, font)
+    
+    return image.convert('RGB')
@@ -0,0 +1,320 @@
+"""Loading and rendering of the games of the HTML site in worker processes"""
+# Author(s): Davide.De-Marchi@ec.europa.eu
+# Copyright © European Union 2024-2025
+# 
+# Licensed under the EUPL, Version 1.2 or as soon they will be approved by 
+# the European Commission subsequent versions of the EUPL (the "Licence");
+# 
+# You may not use this work except in compliance with the Licence.
+# 
+# You may obtain a copy of the Licence at:
+# https://joinup.ec.europa.eu/collection/eupl/eupl-text-eupl-12
+
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the Licence is distributed on an "AS IS"
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either
+# express or implied.
+# 
+# See the Licence for the specific language governing permissions and
+# limitations under the Licence.
+import concurrent.futures
+import os
+import time
+from PIL import Image
+import plotly
+
+# local imports
+import GameModel
+import GameFile
+import BoxScore
+import ThrowMap
+import SeasonLoader
+
+
+# Name of the plotly.js bundle shared by all the charts of the site (the chart pages refer to it instead of embedding the library)
+PLOTLY_BUNDLE = 'plotly.min.js'
+
+# Page shared by all the charts of the site: it loads the plotly.js bundle and the script of the chart named in the hash of its URL (i.e. plot.html#charts/1.js)
+CHART_PAGE = 'plot.html'
+
+# Text of the chart page. Each chart is a script that calls plotChart with the compact JSON of the figure (a script, not a fetch of a JSON file, so that the
+# site can be browsed also from the local web folder). Only the scripts of the web folder are accepted
+CHART_PAGE_HTML = '''<!DOCTYPE html>
+<html>
+<head>
+    <meta charset="utf-8" />
+    <script src="%s"></script>
+    <style>
+        html, body { margin: 0; height: 100%%; }
+        #chart { width: 100%%; height: 100%%; }
+    </style>
+</head>
+<body>
+    <div id="chart"></div>
+    <script>
+        function plotChart(fig) {
+            Plotly.newPlot('chart', fig.data, fig.layout, {responsive: true});
+        }
+        var file = decodeURIComponent(window.location.hash.substring(1));
+        if (/^(charts\\/)?[\\w-]+\\.js$/.test(file)) {
+            var script = document.createElement('script');
+            script.src = file;
+            document.body.appendChild(script);
+        }
+    </script>
+</body>
+</html>
+'''%PLOTLY_BUNDLE
+
+# Image of the field shared by all the throw maps of the site (the maps are transparent SVG files displayed over it)
+COURT_IMAGE = 'maps/court.png'
+
+
+# Model used by a worker process to load the games (created once for each process by _init)
+_model = None
+
+
+# Initialization of a worker process
+def _init(team_file):
+    global _model
+    _model = GameModel.GameModel(team_file)
+    _model.team_logo_img = teamLogo(_model.team_data)
+
+
+# Returns the PIL image of the logo of the team (or None if the team has no logo)
+def teamLogo(team_data):
+    if 'logo' in team_data:
+        return Image.open('./images/%s'%team_data['logo'])
+    return None
+
+
+# Write the plotly.js bundle in the web folder (only if missing or different from the library installed). Returns the path of the bundle
+def writePlotlyBundle(folder='web'):
+    path = os.path.join(folder, PLOTLY_BUNDLE)
+    txt = plotly.offline.get_plotlyjs()
+    if os.path.isfile(path):
+        with open(path, encoding='utf-8') as f:
+            if f.read() == txt:
+                return path
+    GameFile.writeAtomic(path, txt)
+    return path
+
+
+# Write the page shared by all the charts in the web folder (only if missing or different). Returns the path of the page
+def writeChartPage(folder='web'):
+    path = os.path.join(folder, CHART_PAGE)
+    if os.path.isfile(path):
+        with open(path, encoding='utf-8') as f:
+            if f.read() == CHART_PAGE_HTML:
+                return path
+    GameFile.writeAtomic(path, CHART_PAGE_HTML)
+    return path
+
+
+# Write the image of the field of the throw maps in the web folder (only if missing or different). Returns the path of the image
+def writeCourt(folder='web'):
+    path = os.path.join(folder, COURT_IMAGE)
+    with open(ThrowMap.fieldFile(1, True), 'rb') as f:
+        data = f.read()
+    if os.path.isfile(path):
+        with open(path, 'rb') as f:
+            if f.read() == data:
+                return path
+    with open(path, 'wb') as f:
+        f.write(data)
+    return path
+
+
+# Save a plotly Figure as a script with the compact JSON of the figure, displayed by the shared chart page
+def writeChart(fig, path):
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write('plotChart(%s);\n'%fig.to_json())
+
+
+# Returns the list of the artifacts of a game (paths of the files in the web folder) given the game (instance of GameModel or Game) and its progressive number
+def gameArtifacts(game, progressive):
+    g = game.game_data
+    quarters = []
+    if g['status']['gameover']:
+        quarters = list(range(1,g['status']['quarter']+1))
+        
+    artifacts  = ['web/sheets/%d.svg'%progressive] + ['web/sheets/%d_%d.svg'%(progressive,quarter) for quarter in quarters]
+    artifacts += ['web/charts/%d.js'%progressive, 'web/playbyplay/%d.html'%progressive, 'web/maps/%d.svg'%progressive]
+    artifacts += ['web/maps/%d_%s.svg'%(progressive,player_name) for player_name in game.players_by_name]
+    return artifacts
+
+
+# Add the seconds elapsed since start and the size of the files written to the timings of a type of artifact (timings is a dict: type --> [seconds, bytes, files])
+def addTiming(timings, kind, start, paths):
+    if timings is None:
+        return
+    t = timings.setdefault(kind, [0.0, 0, 0])
+    t[0] += time.perf_counter() - start
+    t[1] += sum([os.path.getsize(path) for path in paths])
+    t[2] += len(paths)
+
+
+# Write the artifacts of a game already loaded in an instance of GameModel (or Game). Returns the list of the paths of the files written. If timings is a dict,
+# the time and the size of each type of artifact (svg, quarters, chart, playbyplay, maps) are added to it
+def renderGame(game, progressive, timings=None):
+    g  = game.game_data
+    df = game.events_df
+    
+    # Save Box Score in SVG format
+    start = time.perf_counter()
+    svg = BoxScore.svg(df, game=game, width=65.0)
+    with open('web/sheets/%d.svg'%progressive, 'w') as outfile:
+        outfile.write(svg)
+    addTiming(timings, 'svg', start, ['web/sheets/%d.svg'%progressive])
+
+    # Save Box Score for every quarter (only if the game is terminated)
+    if g['status']['gameover']:
+        start = time.perf_counter()
+        paths = []
+        for quarter in range(1,g['status']['quarter']+1):
+            svg = BoxScore.svg(df.copy(), game=game, width=65.0, quarter=quarter)
+            with open('web/sheets/%d_%d.svg'%(progressive,quarter), 'w') as outfile:
+                outfile.write(svg)
+            paths.append('web/sheets/%d_%d.svg'%(progressive,quarter))
+        addTiming(timings, 'quarters', start, paths)
+
+    # Save Points Chart in HTML format (the lines of all the quarters are displayed, as in the board of the site)
+    start = time.perf_counter()
+    fig = BoxScore.pointsChart(df, game=game, height_in_pixels=1000, template='plotly_white', gameover=True)
+    writeChart(fig, 'web/charts/%d.js'%progressive)
+    addTiming(timings, 'chart', start, ['web/charts/%d.js'%progressive])
+
+    # Save Play-By-Play directly in the HTML
+    start = time.perf_counter()
+    pbp = BoxScore.play_by_play(df, game=game)
+    pbphtml = '<div style="max-width: 100%%; overflow: hidden; background-color: #ffffff;">%s</div>'%(pbp)
+    with open('web/playbyplay/%d.html'%progressive, 'w') as pbpfile:
+        pbpfile.write(pbphtml)
+    addTiming(timings, 'playbyplay', start, ['web/playbyplay/%d.html'%progressive])
+
+    # Mappe di tiro of the team and of each player (SVG files displayed over the shared image of the field)
+    start = time.perf_counter()
+    paths = []
+    for player_name, path in [(None, 'web/maps/%d.svg'%progressive)] + [(p, 'web/maps/%d_%s.svg'%(progressive,p)) for p in game.players_by_name]:
+        with open(path, 'w') as outfile:
+            outfile.write(ThrowMap.svgThrows(game, df, player_name=player_name, field_left=True))
+        paths.append(path)
+    addTiming(timings, 'maps', start, paths)
+        
+    return gameArtifacts(game, progressive)
+
+
+# Load a game, write its artifacts if they are changed in the manifest and return the data of the game used to build the index, the totals and the season charts
+# (executed in a worker process). The task is a tuple (game file, progressive number, hash of the inputs of the game, instance of Manifest.Manifest)
+def _build(task):
+    file, progressive, key, manifest = task
+    start = time.perf_counter()
+    _model.loadGame(file)
+    g  = _model.game_data
+    df = _model.events_df
+    timings = { 'load': [time.perf_counter() - start, 0, 0] }
+    
+    artifacts = gameArtifacts(_model, progressive)
+    render = manifest.anyChanged(artifacts, key)
+    if render:
+        renderGame(_model, progressive, timings)
+        
+    game = {
+        'game_data':           { k: v for k, v in g.items() if k != 'events' },
+        'players_info':        _model.players_info,
+        'players_by_name':     _model.players_by_name,
+        'players_by_number':   _model.players_by_number,
+        'opponents_by_number': _model.opponents_by_number,
+        'summary':             BoxScore.summary(df, game=_model),
+        'artifacts':           artifacts,
+        'render':              render,
+        'timings':             timings
+    }
+    
+    if df.shape[0] > 0:
+        SeasonLoader.gameColumns(df, file, progressive, g)
+    game['events'] = df
+    return game
+
+
+###########################################################################################################################################################################
+# Build the games of the site in worker processes: each game is loaded only once, its artifacts are written if changed and the data needed to build the index,
+# the totals and the season charts are returned to the caller. It is a generator that yields the (task, dict of the data of the game) in the order of the tasks,
+# as soon as each game is built, so that the caller can assemble the index and display the progress while the other games are built
+###########################################################################################################################################################################
+def buildGames(team_file,          # Path of the .team file
+               tasks,              # List of (game file, progressive number, hash of the inputs of the game, instance of Manifest.Manifest)
+               processes=None):    # Number of worker processes (None for the number of CPUs, 1 to build the games in the current process)
+    
+    if processes is None:
+        processes = os.cpu_count() or 1
+    processes = min(processes, len(tasks))
+    
+    if processes <= 1:
+        _init(team_file)
+        for task in tasks:
+            yield task, _build(task)
+        return
+    
+    # The pending writes are completed before the worker processes are started
+    GameFile.writer.flush()
+    
+    with concurrent.futures.ProcessPoolExecutor(max_workers=processes, initializer=_init, initargs=(team_file,)) as executor:
+        for task, game in zip(tasks, executor.map(_build, tasks)):
+            yield task, game
+            
+            
+###########################################################################################################################################################################
+# BuildReport: time and size of the artifacts of the site for each game and for each type of artifact, printed at the end of a build to profile the pipeline,
+# and the files that could not be published
+###########################################################################################################################################################################
+class BuildReport():
+
+    def __init__(self):
+        self.games  = []   # List of (name of the game, dict of the timings of its artifacts)
+        self.season = {}   # Timings of the artifacts of the whole season (season charts, totals, players images, index)
+        self.failed = []   # Files whose upload failed
+        self.start  = time.perf_counter()
+        
+        
+    # Add the timings of a game
+    def addGame(self, name, timings):
+        self.games.append((name, timings))
+        
+        
+    # Returns the timings summed on all the games and on the season artifacts
+    def totals(self):
+        totals = {}
+        for timings in [x[1] for x in self.games] + [self.season]:
+            for kind, t in timings.items():
+                s = totals.setdefault(kind, [0.0, 0, 0])
+                for i in range(3):
+                    s[i] += t[i]
+        return totals
+    
+    
+    # Returns the text of the report
+    def text(self):
+        kinds = []
+        for name, timings in self.games:
+            kinds += [x for x in timings if x not in kinds]
+            
+        lines = ['%-40s'%'Game (seconds)' + ''.join(['%11s'%x for x in kinds]) + '%11s'%'total']
+        for name, timings in self.games:
+            values = [timings[x][0] if x in timings else 0.0 for x in kinds]
+            lines.append('%-40s'%name[:40] + ''.join(['%11.3f'%x for x in values]) + '%11.3f'%sum(values))
+            
+        lines.append('')
+        lines.append('%-40s%11s%11s%11s%11s'%('Artifact', 'files', 'MB', 'seconds', 's/game'))
+        ngames = max(1, len(self.games))
+        for kind, t in self.totals().items():
+            lines.append('%-40s%11d%11.2f%11.3f%11.3f'%(kind, t[2], t[1]/1e6, t[0], t[0]/ngames))
+            
+        if len(self.failed) > 0:
+            lines.append('')
+            lines.append('Upload failed (%d files, the index was not published):'%len(self.failed))
+            lines += ['    %s'%x for x in self.failed]
+            
+        lines.append('')
+        lines.append('Elapsed: %.1f seconds'%(time.perf_counter() - self.start))
+        return '\n'.join(lines)
@@ -17,133 +17,312 @@
 # 
 # See the Licence for the specific language governing permissions and
 # limitations under the Licence.
+import weakref
 import pandas as pd
+import numpy as np
 
 # local imports
 import Config
 
 
+# Name of the player used in the stats table for the rows containing the totals of a team
+TOTAL = '*'
+
 
 # Utility: returns the number of rows for an event in a DataFrame
 def count(df, event_name):
     return df[df['event_name']==event_name].shape[0]
 
 
-# Utility: returns the number of rows for an event in a DataFrame for a player
+# Utility: returns the number of rows for an event in a DataFrame (or in a stats table or Counters) for a player
 def countforplayer(df, player_name, event_name):
-    return df[(df['team']==Config.TEAM)&(df['player']==player_name)&(df['event_name']==event_name)].shape[0]
+    row = lookup(df, player_name)
+    if row is None: return 0
+    return int(row[event_name])
 
-# Utility: returns the number of rows for an event in a DataFrame for the Team
+# Utility: returns the number of rows for an event in a DataFrame (or in a stats table or Counters) for the Team
 def countforteam(df, event_name):
-    return df[(df['team']==Config.TEAM)&(df['event_name']==event_name)].shape[0]
+    row = lookup(df)
+    if row is None: return 0
+    return int(row[event_name])
+
+
+###########################################################################################################################################################################
+# Stats table: a single groupby on (team, player, event) that returns a DataFrame having one row for each player (plus one row for the totals of each team) and
+# one column for each event type (counts) and for each derived metric (P, VAL, OER, TS and VIR if players_info is passed)
+###########################################################################################################################################################################
+def table(events_df,           # Events DataFrame
+          players_info=None):  # game.player_info (to read the 'time_on_field' of each player, needed for the VIR column)
+
+    names = [Config.EVENT_NAME[x] for x in sorted(Config.EVENT_NAME.keys())]
+
+    if events_df is None or events_df.shape[0] == 0:
+        counts = pd.DataFrame(columns=names, index=pd.MultiIndex.from_tuples([], names=['team','player']), dtype=np.int64)
+    else:
+        counts = events_df.groupby([events_df['team'], events_df['player'], events_df['event'].astype(int)], observed=True).size().unstack('event', fill_value=0)
+        counts = counts.reindex(columns=sorted(Config.EVENT_NAME.keys()), fill_value=0)
+        counts.columns = names
+        counts.index.names = ['team','player']
+
+    # Add the totals of each team
+    totals = counts.groupby(level='team', observed=True).sum()
+    totals.index = pd.MultiIndex.from_arrays([list(totals.index), [TOTAL]*totals.shape[0]], names=['team','player'])
+    t = pd.concat([counts, totals]).astype(np.int64)
+
+    # Derived metrics
+    T1 = t['T1ok'] + t['T1err']
+    T2 = t['T2ok'] + t['T2err']
+    T3 = t['T3ok'] + t['T3err']
+
+    t['P']   = t['T1ok'] + 2*t['T2ok'] + 3*t['T3ok']
+    t['VAL'] = t['T1ok'] - t['T1err'] + 2*t['T2ok'] - t['T2err'] + 3*t['T3ok'] - t['T3err'] + \
+               t['PRec'] - t['PPer'] + t['ROff'] + t['RDif'] + t['Ass'] - t['FCom'] + t['FSub'] + t['SDat'] - t['SSub']
+
+    possessions = T2 + T3 + 0.5*T1 + t['PPer']
+    t['OER'] = (t['P'] / possessions.where(possessions > 0)).fillna(0.0)
+
+    throws = T2 + T3 + 0.44*T1
+    t['TS'] = (100.0 * (0.5*t['P'] / throws.where(throws > 0))).fillna(-1.0)
+
+    if players_info is not None:
+        player_minutes = {name: info['time_on_field'] / 60.0 for name, info in players_info.items()}
+        player_minutes[TOTAL] = _minutes(None, players_info)
+        minutes = np.array([player_minutes.get(x, 0.0) for x in t.index.get_level_values('player')])
+        columns = dict(zip(t.columns, t.to_numpy(dtype=float).T))
+        valid = (minutes > 0.0) & (t.index.get_level_values('team') == Config.TEAM)
+        t['VIR'] = np.divide(_virSum(columns), minutes, out=np.zeros(t.shape[0]), where=valid)
+
+    return t
+
+
+# Returns True if the DataFrame is a stats table returned by the table() function
+def istable(df):
+    return list(df.index.names) == ['team','player']
+
+
+# Returns the row of the stats table for a player (or for the team totals if player_name is None). Returns None if no events are present
+def lookup(df,                 # Events DataFrame, stats table or Counters instance
+           player_name=None,   # Name of the player (or None for team totals)
+           team=Config.TEAM):  # TEAM or OPPO
+
+    if df is None: return None
+
+    if isinstance(df, Counters):
+        return df.row(player_name, team)
+
+    if not istable(df):
+        df = _table(df)
+
+    if player_name is None: key = (team, TOTAL)
+    else:                   key = (team, player_name)
+
+    if key in df.index:
+        return df.loc[key]
+    return None
+
+
+# Stats tables of the Events DataFrames passed to lookup(), so that the metrics read from the same DataFrame group its events only once. The entries are keyed by
+# the id of the DataFrame and removed when the DataFrame is deleted (the DataFrames must not be modified in place: EventStore returns a new one at every change)
+_tables = {}
+
+# Utility: returns the stats table of an Events DataFrame, calculated at the first call for the DataFrame
+def _table(df):
+    key = id(df)
+    entry = _tables.get(key)
+    if entry is None or entry[0]() is not df:
+        entry = (weakref.ref(df, lambda ref, key=key: _tables.pop(key, None)), table(df))
+        _tables[key] = entry
+    return entry[1]
+
+
+# Utility: returns the minutes on the field of a player (or of all the players if player_name is None or TOTAL)
+def _minutes(player_name, players_info):
+    if player_name is None or player_name == TOTAL:
+        minutes = 0.0
+        for name in players_info.keys():
+            minutes += players_info[name]['time_on_field'] / 60.0
+        return minutes
+    elif player_name in players_info:
+        return players_info[player_name]['time_on_field'] / 60.0
+    return 0.0
+
+
+# Utility: calculates the VIR from a row of the stats table and the minutes on the field
+def _vir(row, minutes):
+    if minutes <= 0.0: return 0.0
+    return _virSum(row) / minutes
+
+
+# Utility: returns the numerator of the VIR from a row of the stats table (or from a dict of the columns of the stats table, giving an array)
+def _virSum(row):
+    return row['P'] + 1.5*row['Ass'] + row['PRec'] + 0.75*row['SDat'] + 1.25*row['ROff'] + 0.75*row['RDif'] + 0.5*row['T3ok'] + 0.5*row['FSub'] + 0.5*row['FCom'] + \
+           0.75*(row['T3err'] + row['T2err']) - row['PPer'] - 0.5*row['T1err']
+
+
+###########################################################################################################################################################################
+# Counters: running counts of the events keyed by (team, player, event_id) that are updated in constant time when an event is added or removed during the live
+# scoring. The row of a player (counts and derived metrics, same columns of the stats table) is cached and recalculated only when one of its counters changes
+###########################################################################################################################################################################
+class Counters():
+
+    def __init__(self, events_df=None):   # Events DataFrame to initialize the counters from
+        self.reset(events_df)
+
+
+    # Initialize all the counters from an events DataFrame
+    def reset(self, events_df=None):
+        self.counts         = {}   # (team, player, event_id) --> number of events (player==TOTAL for the totals of the team)
+        self.events         = {}   # (team, player) --> number of events of any type
+        self.quarter_events = {}   # quarter --> number of events
+        self.quarter_points = {}   # (team, quarter) --> points scored
+        self.cache          = {}   # (team, player) --> cached row
+
+        if events_df is not None and events_df.shape[0] > 0:
+            groups = events_df.groupby([events_df['team'], events_df['player'], events_df['event'].astype(int), events_df['quarter']], sort=False, observed=True).size()
+            for (team, player_name, event_id, quarter), n in groups.items():
+                self.add(team, player_name, event_id, quarter, n)
+
+
+    # Add n events
+    def add(self, team, player_name, event_id, quarter, n=1):
+        event_id = int(event_id)
+        for key in [(team, player_name), (team, TOTAL)]:
+            self._inc(self.counts, key + (event_id,), n)
+            self._inc(self.events, key, n)
+            self.cache.pop(key, None)
+
+        self._inc(self.quarter_events, quarter, n)
+        if event_id in [0, 2, 4]:
+            self._inc(self.quarter_points, (team, quarter), n*Config.EVENT_VALUE[event_id])
+
+
+    # Remove n events
+    def remove(self, team, player_name, event_id, quarter, n=1):
+        self.add(team, player_name, event_id, quarter, -n)
+
+
+    # Returns the number of events of a type for a player (or for the team totals if player_name is None)
+    def count(self, event_id, player_name=None, team=Config.TEAM):
+        if player_name is None: player_name = TOTAL
+        return self.counts.get((team, player_name, int(event_id)), 0)
+
+
+    # Returns the list of players of a team having at least one event of a type (in order of first event)
+    def players(self, event_id, team=Config.OPPO):
+        return [key[1] for key in self.counts.keys() if key[0] == team and key[2] == event_id and key[1] != TOTAL]
+
+
+    # Returns the sorted list of quarters having at least one event
+    def quarters(self):
+        return sorted(self.quarter_events.keys())
+
+
+    # Returns the points scored by a team in a quarter
+    def quarterPoints(self, quarter, team=Config.TEAM):
+        return self.quarter_points.get((team, quarter), 0)
+
+
+    # Returns the row for a player (or for the team totals if player_name is None) as a dict having the same keys of the columns of the stats table (VIR excluded)
+    def row(self, player_name=None, team=Config.TEAM):
+        if player_name is None: player_name = TOTAL
+        key = (team, player_name)
+        if self.events.get(key, 0) <= 0: return None
+
+        if key not in self.cache:
+            r = { Config.EVENT_NAME[x]: self.counts.get(key + (x,), 0) for x in sorted(Config.EVENT_NAME.keys()) }
+
+            T1 = r['T1ok'] + r['T1err']
+            T2 = r['T2ok'] + r['T2err']
+            T3 = r['T3ok'] + r['T3err']
+
+            r['P']   = r['T1ok'] + 2*r['T2ok'] + 3*r['T3ok']
+            r['VAL'] = r['T1ok'] - r['T1err'] + 2*r['T2ok'] - r['T2err'] + 3*r['T3ok'] - r['T3err'] + \
+                       r['PRec'] - r['PPer'] + r['ROff'] + r['RDif'] + r['Ass'] - r['FCom'] + r['FSub'] + r['SDat'] - r['SSub']
+
+            possessions = T2 + T3 + 0.5*T1 + r['PPer']
+            if possessions > 0: r['OER'] = r['P'] / possessions
+            else:               r['OER'] = 0.0
+
+            throws = T2 + T3 + 0.44*T1
+            if throws > 0: r['TS'] = 100.0 * (0.5*r['P'] / throws)
+            else:          r['TS'] = -1.0
+
+            self.cache[key] = r
+
+        return self.cache[key]
+
+
+    # Utility: increment a counter in a dict removing the key when it reaches zero
+    @staticmethod
+    def _inc(d, key, n):
+        value = d.get(key, 0) + n
+        if value != 0: d[key] = value
+        else:          d.pop(key, None)
 
 
 ###########################################################################################################################################################################
 # Number of points scored by a player or by a team
 ###########################################################################################################################################################################
-def points(events_df,          # Events DataFrame
+def points(events_df,          # Events DataFrame (or stats table)
            player_name=None,   # Name of the player (or None for team totals)
            team=Config.TEAM):  # TEAM or OPPO
-    
-    if events_df is None: return 0
 
-    if player_name is None: df = events_df[(events_df['team']==team)]
-    else:                   df = events_df[(events_df['team']==team)&(events_df['player']==player_name)]
-    
-    T1ok = count(df,'T1ok')
-    T2ok = count(df,'T2ok')
-    T3ok = count(df,'T3ok')
-    return T1ok + T2ok*2 + T3ok*3
-    
+    row = lookup(events_df, player_name, team)
+    if row is None: return 0
+    return int(row['P'])
+
 
 ###########################################################################################################################################################################
 # Number of fouls committed by a player
 ###########################################################################################################################################################################
-def fouls(events_df,           # Events DataFrame
+def fouls(events_df,           # Events DataFrame (or stats table)
            player_name=None,   # Name of the player (or None for team totals)
            team=Config.TEAM):  # TEAM or OPPO
-    
-    if events_df is None: return 0
 
-    if player_name is None: df = events_df[(events_df['team']==team)]
-    else:                   df = events_df[(events_df['team']==team)&(events_df['player']==player_name)]
-    
-    return count(df,'FCom')
-    
-    
+    row = lookup(events_df, player_name, team)
+    if row is None: return 0
+    return int(row['FCom'])
+
+
 ###########################################################################################################################################################################
 # Evaluation of a player: (TL+) - (TL-) + [(T2+) x 2 - (T2-)] + [(T3+) x 3) - (T3-)] + PR - PP + RO + RD + AS - FF + FS + SD - SS
 ###########################################################################################################################################################################
-def value(events_df,           # Events DataFrame
+def value(events_df,           # Events DataFrame (or stats table)
           player_name=None):   # Name of the Team player (or None for Team totals)
-    
-    if events_df is None: return 0
 
-    if player_name is None: df = events_df[(events_df['team']==Config.TEAM)]
-    else:                   df = events_df[(events_df['team']==Config.TEAM)&(events_df['player']==player_name)]
-    
-    return count(df,'T1ok') - count(df,'T1err') + 2*count(df,'T2ok') - count(df,'T2err') + 3*count(df,'T3ok') - count(df,'T3err') + \
-           count(df,'PRec') - count(df,'PPer') + count(df,'ROff') + count(df,'RDif') + count(df,'Ass') - count(df,'FCom') + count(df,'FSub') + count(df,'SDat') - count(df,'SSub')
+    row = lookup(events_df, player_name)
+    if row is None: return 0
+    return int(row['VAL'])
+
 
-    
 ###########################################################################################################################################################################
 # OER of a player: Offensive Efficency Rating  = Points scored / Possessions      with Possessions = T2 + T3 + (T1/2) + PP
 ###########################################################################################################################################################################
-def oer(events_df,           # Events DataFrame
+def oer(events_df,           # Events DataFrame (or stats table)
         player_name=None):   # Name of the Team player (or None for Team totals)
-    
-    if events_df is None: return 0.0
 
-    if player_name is None: df = events_df[(events_df['team']==Config.TEAM)]
-    else:                   df = events_df[(events_df['team']==Config.TEAM)&(events_df['player']==player_name)]
-    
-    T1ok  = count(df,'T1ok')
-    T1err = count(df,'T1err')
-    T2ok  = count(df,'T2ok')
-    T2err = count(df,'T2err')
-    T3ok  = count(df,'T3ok')
-    T3err = count(df,'T3err')
-    T1 = T1ok + T1err
-    T2 = T2ok + T2err
-    T3 = T3ok + T3err
-    PP = count(df,'PPer')
-    if T1+T2+T3+PP == 0: return 0.0
-    return (count(df,'T1ok') + 2*count(df,'T2ok') + 3*count(df,'T3ok')) / (T2 + T3 + 0.5*T1 + PP)
-    
-    
+    row = lookup(events_df, player_name)
+    if row is None: return 0.0
+    return float(row['OER'])
+
+
 ###########################################################################################################################################################################
 # VIR of a player: Value Index Rating = [(Punti fatti + AS x 1,5 + PR + SD x 0,75 + RO x 1,25 + RD x 0,75 + T3+/2 + FS/2 - FF/2 - ((T3-) + (T2-)) x 0,75 - PP - (TL-)/2) / Minuti giocati]
 ###########################################################################################################################################################################
-def vir(events_df,           # Events DataFrame
+def vir(events_df,           # Events DataFrame (or stats table)
         player_name=None,    # Name of the Team player (or None for Team totals)
         players_info=None):  # game.player_info (to read the 'time_on_field' of each player)
-    
+
     if events_df is None: return 0.0
 
-    if player_name is None:
-        minutes = 0.0
-        for player_name in players_info.keys():
-            minutes += players_info[player_name]['time_on_field'] / 60.0
-        df = events_df[(events_df['team']==Config.TEAM)]
-    else:
-        minutes = players_info[player_name]['time_on_field'] / 60.0
-        df = events_df[(events_df['team']==Config.TEAM)&(events_df['player']==player_name)]
-        
-    if minutes <= 0.0: return 0.0
-    T1ok  = count(df,'T1ok')
-    T1err = count(df,'T1err')
-    T2ok  = count(df,'T2ok')
-    T2err = count(df,'T2err')
-    T3ok  = count(df,'T3ok')
-    T3err = count(df,'T3err')
-    T1 = T1ok + T1err
-    T2 = T2ok + T2err
-    T3 = T3ok + T3err
-    P = T1ok + 2*T2ok + 3*T3ok
-    return (P + 1.5*count(df,'Ass') + count(df,'PRec') + 0.75*count(df,'SDat') + 1.25*count(df,'ROff') + 0.75*count(df,'RDif') + 0.5*T3ok + 0.5*count(df,'FSub') + 0.5*count(df,'FCom') + \
-            0.75*(T3err + T2err) - count(df,'PPer') - 0.5*T1err) / minutes
-    
-    
+    if player_name is None: minutes = _minutes(None, players_info)
+    else:                   minutes = players_info[player_name]['time_on_field'] / 60.0
+
+    row = lookup(events_df, player_name)
+    if row is None or minutes <= 0.0: return 0.0
+    return float(_vir(row, minutes))
+
+
 ###########################################################################################################################################################################
 # PlusMinus of a player: + Punti segnati dalla squadra - Punti segnati dagli avversari quando il giocatore e' in campo
 ###########################################################################################################################################################################
@@ -163,31 +342,14 @@ def plusminus(player_name=None,   # Name of the Team player (or None for Team to
 ###########################################################################################################################################################################
 # True Shooting Percentage of a player: (see: https://en.wikipedia.org/wiki/True_shooting_percentage): Points / 2*(T2 + T3 + 0.44*T1)
 ###########################################################################################################################################################################
-def trueshooting(events_df,           # Events DataFrame
+def trueshooting(events_df,           # Events DataFrame (or stats table)
                  player_name=None):   # Name of the Team player (or None for Team totals)
-    
-    if events_df is None: return -1.0
 
-    if player_name is None: df = events_df[(events_df['team']==Config.TEAM)]
-    else:                   df = events_df[(events_df['team']==Config.TEAM)&(events_df['player']==player_name)]
-    
-    T1ok  = count(df,'T1ok')
-    T1err = count(df,'T1err')
-    T2ok  = count(df,'T2ok')
-    T2err = count(df,'T2err')
-    T3ok  = count(df,'T3ok')
-    T3err = count(df,'T3err')
-    T1 = T1ok + T1err
-    T2 = T2ok + T2err
-    T3 = T3ok + T3err
-    if T1+T2+T3 == 0: return -1.0
-    P = T1ok + 2*T2ok + 3*T3ok
-    if T1 + T2 + T3 == 0:
-        return -1.0
-    else:
-        return 100.0 * (0.5*P / (T2 + T3 + 0.44*T1))
-    
-    
+    row = lookup(events_df, player_name)
+    if row is None: return -1.0
+    return float(row['TS'])
+
+
 ###########################################################################################################################################################################
 # Utility functions for the BoxScore 
 ###########################################################################################################################################################################
@@ -195,28 +357,23 @@ def trueshooting(events_df,           # Events DataFrame
 ###########################################################################################################################################################################
 # Throw stats + percentage. Returns two strings, f.i., '1/3' '33%'
 ###########################################################################################################################################################################
-def tperc(events_df,          # Events DataFrame
+def tperc(events_df,          # Events DataFrame (or stats table)
           player_name=None,   # Name of the Team player (or None for Team totals)
           throw=2):           # 0=2 or 3 points throw ,  1=free throws,  2=2 points throws,    3=3 points throws
 
-    if events_df is None: return '', ''
-    
-    if player_name is None: df = events_df[(events_df['team']==Config.TEAM)]
-    else:                   df = events_df[(events_df['team']==Config.TEAM)&(events_df['player']==player_name)]
-    
+    row = lookup(events_df, player_name)
+    if row is None: return '', ''
+
     if throw == 0:
-        ok  = count(df,'T2ok')
-        err = count(df,'T2err')
-        ok  += count(df,'T3ok')
-        err += count(df,'T3err')
+        ok  = row['T2ok']  + row['T3ok']
+        err = row['T2err'] + row['T3err']
     else:
-        ok  = count(df,'T%dok'%throw)
-        err = count(df,'T%derr'%throw)
-    
-    tot = ok+err 
-        
+        ok  = row['T%dok'%throw]
+        err = row['T%derr'%throw]
+
+    tot = ok+err
+
     if tot > 0:
         return '%d/%d'%(ok,tot), '%.0f%%'%(100.0*(ok/tot))
     else:
         return '', ''
-    
\ No newline at end of file
@@ -22,7 +22,11 @@ import ipyvuetify as v
 from PIL import Image, ImageDraw, ImageFont
 from ipyevents import Event
 import math
+import collections
+import base64
+import html
 import pandas as pd
+import numpy as np
 
 # vois imports
 from vois import colors
@@ -37,6 +41,282 @@ FORM_FACTOR         = 1.0
 IMAGE_HEIGHT_PIXELS = 1050
 IMAGE_WIDTH_PIXELS  = 856
 
+# Maximum number of rendered maps kept in the cache of a ThrowMap (the team and a full roster of players)
+CACHE_SIZE = 16
+
+
+###########################################################################################################################################################################
+# Rendering of the throw maps on PIL images (without widgets, so that the maps can be created by batch jobs and worker processes)
+###########################################################################################################################################################################
+
+# Returns the path of the image of the empty field (mode: 1=full field,  2=2 points area,  3=3 points area)
+def fieldFile(mode=1, field_left=True):
+    side = 'L' if field_left else 'R'
+    if mode in [2,3]:
+        return './resources/MappaTiro%s%d.png'%(side, mode)
+    return './resources/MappaTiro%s.png'%side
+
+
+# Returns the PIL image of the empty field (mode: 1=full field,  2=2 points area,  3=3 points area)
+def fieldImage(mode=1, field_left=True):
+    return Image.open(fieldFile(mode, field_left))
+
+
+# Returns the scored flags and the pixel coordinates of the centers of the throws of a Pandas Dataframe on an image of the given size (arrays in the order of the events)
+def throwPositions(size, tdf, field_left=True):
+    tdf = tdf[tdf['event'].isin([2,3,4,5])]
+    
+    # Pixel coordinates of all the throws computed in a single vectorized step
+    w,h = size
+    x = tdf['x'].to_numpy(dtype=float)
+    y = tdf['y'].to_numpy(dtype=float)
+    if not field_left: x = 100.0 - x
+    scored = tdf['event'].isin([2,4]).to_numpy()
+    return scored, w*x/100.0, h*y/100.0
+
+
+# Returns the markers of the throws of a Pandas Dataframe on an image of the given size: list of (scored, px, py) in the order of the events
+def throwMarkers(size, tdf, imgScored, imgMissed, field_left=True):
+    scored, x, y = throwPositions(size, tdf, field_left)
+    if scored.shape[0] == 0:
+        return []
+    
+    iw = np.where(scored, imgScored.size[0], imgMissed.size[0])
+    ih = np.where(scored, imgScored.size[1], imgMissed.size[1])
+    px = x.astype(int) - iw//2
+    py = y.astype(int) - ih//2
+    return list(zip(scored.tolist(), px.tolist(), py.tolist()))
+
+
+# Paste a list of markers on an image whose top-left corner is at offset, in the order of the list. The markers overlap and a later throw must cover the previous
+# ones, so each marker is blended by PIL in the order of the events (about 15 ms for the 1500 throws of a season): the live maps repaint only the changed
+# markers on the cached layers of ThrowMap.throwsLayer
+def pasteMarkers(image, markers, imgScored, imgMissed, offset=(0,0)):
+    # Transparency masks extracted only once
+    imgs  = (imgMissed, imgScored)
+    masks = (imgMissed.getchannel('A'), imgScored.getchannel('A'))
+    ox,oy = offset
+    for s, x, y in markers:
+        image.paste(imgs[s], (x-ox,y-oy), masks[s])
+
+
+# Returns the markers of old that are not in new, or None if new is not old with some markers removed
+def removedMarkers(old, new):
+    removed = []
+    i = 0
+    for m in old:
+        if i < len(new) and new[i] == m: i += 1
+        else:                            removed.append(m)
+    if i < len(new):
+        return None
+    return removed
+
+
+# Paste the icons of the throws of a Pandas Dataframe on an image
+def drawThrows(image, tdf, imgScored, imgMissed, field_left=True):
+    pasteMarkers(image, throwMarkers(image.size, tdf, imgScored, imgMissed, field_left), imgScored, imgMissed)
+
+
+# Returns the texts of the shooting stats of a player (or of the team if player_name is None) and of the points per quarter of a game on an image of the given size:
+# list of (x, y, text, bold) in pixels and size of the font. The stats are calculated from the events of df (None for the events of the game)
+def statsTexts(game, player_name, size, field_left=True, display_full_stats=True, df=None):
+    
+    def stat(ok, err):
+        s = '%d/%-d'%(ok,ok+err)
+        if ok+err ==0:
+            return s,''
+        else:
+            return s, '%d%%'%round(100.0*ok/(ok+err))
+
+    # The stats of the events of the game are read from its running counters, the stats of any other DataFrame (filtered events, season) from its stats table
+    if df is None or df is game.events_df: st = game.counters
+    else:                                  st = Stats.table(df)
+
+    T1ok  = Stats.countforplayer(st, player_name, 'T1ok')
+    T1err = Stats.countforplayer(st, player_name, 'T1err')
+    T2ok  = Stats.countforplayer(st, player_name, 'T2ok')
+    T2err = Stats.countforplayer(st, player_name, 'T2err')
+    T3ok  = Stats.countforplayer(st, player_name, 'T3ok')
+    T3err = Stats.countforplayer(st, player_name, 'T3err')
+
+    w,h = size
+    texts = []
+
+    if display_full_stats:
+        fontsize = 25
+        dy = 30
+    else:
+        fontsize = 15
+        dy = 18
+
+    name = 'Team'
+    if player_name is not None: name = player_name
+
+    if field_left:
+        x1 = (w*2)//3 - 26
+        x2 = x1 + 36
+        x3 = x2 + 74
+    else:
+        x1 = 10
+        x2 = x1 + 40
+        x3 = x2 + 74
+
+    y = 10
+    texts.append((x1, y, name, True))
+    y += 6
+
+    # Display scored and missed
+    s,p = stat(T1ok,T1err)
+    texts.append((x1, y+1*dy, 'T1', False))
+    texts.append((x2, y+1*dy, s, False))
+    texts.append((x3, y+1*dy, p, False))
+
+    s,p = stat(T2ok,T2err)
+    texts.append((x1, y+2*dy, 'T2', False))
+    texts.append((x2, y+2*dy, s, False))
+    texts.append((x3, y+2*dy, p, False))
+
+    s,p = stat(T3ok,T3err)
+    texts.append((x1, y+3*dy, 'T3', False))
+    texts.append((x2, y+3*dy, s, False))
+    texts.append((x3, y+3*dy, p, False))
+
+
+    if display_full_stats:
+        # Display additional stats for the current player
+        if not field_left:
+            x2 = x1
+            x3 = x1 + 60
+
+        y += 8
+        texts.append((x2, y+4*dy, 'P:', False))
+        texts.append((x3, y+4*dy, '%d'%Stats.points(st, player_name), False))
+
+        texts.append((x2, y+5*dy, 'VAL:', False))
+        texts.append((x3, y+5*dy, '%d'%Stats.value(st, player_name), False))
+
+        texts.append((x2, y+6*dy, 'OER:', False))
+        texts.append((x3, y+6*dy, '%.2f'%Stats.oer(st, player_name), False))
+
+        texts.append((x2, y+7*dy, 'VIR:', False))
+        texts.append((x3, y+7*dy, '%.2f'%Stats.vir(st, player_name, game.players_info), False))
+
+        texts.append((x2, y+8*dy, '+/-:', False))
+        texts.append((x3, y+8*dy, '%d'%Stats.plusminus(player_name, game.players_info), False))
+
+        texts.append((x2, y+9*dy, 'TS:', False))
+        texts.append((x3, y+9*dy, '%.0f%%'%Stats.trueshooting(st, player_name), False))
+
+        if player_name is not None and player_name in game.players_info:
+            texts.append((x2, y+10*dy, 'Min:', False))
+            seconds = game.players_info[player_name]['time_on_field']
+            texts.append((x3, y+10*dy, '%d\'%02d"'%(seconds//60, int(seconds%60)), False))
+
+
+    # Display points per quarters
+    if field_left: x2 -= 16
+    else:          x2 = x1
+    y = h - dy - 6
+    dy = 26
+    sq = game.pointsPerQuarter()
+    for s in sq[::-1]:
+        texts.append((x2, y, s, False))
+        y -= dy
+        
+    return texts, fontsize
+
+
+# Draw the shooting stats of a player (or of the team if player_name is None) and the points per quarter of a game on an image (stats calculated from the
+# events of df, or of the game if df is None)
+def drawStats(image, game, player_name, field_left=True, display_full_stats=True, df=None):
+    texts, fontsize = statsTexts(game, player_name, image.size, field_left, display_full_stats, df)
+    
+    fontBold   = ImageFont.truetype('fonts/Roboto-Bold.ttf',    fontsize)
+    fontNormal = ImageFont.truetype('fonts/Roboto-Regular.ttf', fontsize)
+    
+    draw = ImageDraw.Draw(image)
+    for x, y, text, bold in texts:
+        draw.text((x,y), text, 'black', font=fontBold if bold else fontNormal)
+
+
+# Returns the PIL image of the throw map of a player (or of the team if player_name is None) from the events of a game (instance of GameModel)
+def renderThrows(game,                      # Instance of GameModel (or Game)
+                 df,                        # Pandas DataFrame of the events
+                 player_name=None,          # Name of the player (None for the team, '' for no throws)
+                 field_left=True,           # Basket is on the left of the image
+                 display_full_stats=True,   # If True the additional stats of the player are displayed
+                 imgScored=None,            # Icon of the scored throws (None for the default icon)
+                 imgMissed=None):           # Icon of the missed throws (None for the default icon)
+    
+    if imgScored is None: imgScored = Image.open('./resources/scored.png')
+    if imgMissed is None: imgMissed = Image.open('./resources/missed.png')
+    
+    image = fieldImage(1, field_left)
+    if df is not None and 'team' in df.columns and player_name != '':
+        if player_name is None: tdf = df[(df['team']==Config.TEAM)]
+        else:                   tdf = df[(df['team']==Config.TEAM)&(df['player']==player_name)]
+        drawThrows(image, tdf, imgScored, imgMissed, field_left)
+        drawStats(image, game, player_name, field_left, display_full_stats, df)
+    return image
+
+
+###########################################################################################################################################################################
+# Rendering of the throw maps as SVG markup: the throws are small shapes and the stats are texts, while the image of the field is a shared static asset
+###########################################################################################################################################################################
+
+# Gradients of the markers of the scored and missed throws (similar to the icons scored.png and missed.png)
+SVG_MARKERS = '''<defs>
+<radialGradient id="gs" cx="40%%" cy="35%%" r="65%%"><stop offset="0" stop-color="#d8f0b0"/><stop offset="0.5" stop-color="#82d21a"/><stop offset="1" stop-color="#5a9e00"/></radialGradient>
+<radialGradient id="gm" cx="40%%" cy="35%%" r="65%%"><stop offset="0" stop-color="#f8c0cc"/><stop offset="0.5" stop-color="#e93c5e"/><stop offset="1" stop-color="#b0102e"/></radialGradient>
+<circle id="s" r="%.1f" fill="url(#gs)"/>
+<circle id="m" r="%.1f" fill="url(#gm)"/>
+</defs>'''
+
+
+# Returns the SVG markup of the throw map of a player (or of the team if player_name is None) from the events of a game (instance of GameModel).
+# The SVG has the same size in pixels of the image of the field and is transparent: it is displayed over the image of the field (see courtStyle), unless court_href is given
+def svgThrows(game,                      # Instance of GameModel (or Game)
+              df,                        # Pandas DataFrame of the events
+              player_name=None,          # Name of the player (None for the team, '' for no throws)
+              field_left=True,           # Basket is on the left of the image
+              display_full_stats=True,   # If True the additional stats of the player are displayed
+              marker_size=20,            # Diameter of the markers of the throws in pixels of the image of the field
+              court_href=None):          # URL of the image of the field to include in the SVG (None for a transparent SVG)
+    
+    w,h = fieldImage(1, field_left).size
+    svg = '<svg xmlns="http://www.w3.org/2000/svg" xmlns:xlink="http://www.w3.org/1999/xlink" viewBox="0 0 %d %d" preserveAspectRatio="xMidYMid meet">'%(w,h)
+    svg += SVG_MARKERS%(marker_size/2.0, marker_size/2.0)
+    if court_href is not None:
+        svg += '<image x="0" y="0" width="%d" height="%d" href="%s"/>'%(w, h, court_href)
+    
+    if df is not None and 'team' in df.columns and player_name != '':
+        if player_name is None: tdf = df[(df['team']==Config.TEAM)]
+        else:                   tdf = df[(df['team']==Config.TEAM)&(df['player']==player_name)]
+        
+        # Throws in the order of the events
+        scored, x, y = throwPositions((w,h), tdf, field_left)
+        svg += ''.join(['<use href="#%s" x="%.1f" y="%.1f"/>'%('s' if sc else 'm', px, py) for sc, px, py in zip(scored.tolist(), x.tolist(), y.tolist())])
+        
+        # Stats
+        texts, fontsize = statsTexts(game, player_name, (w,h), field_left, display_full_stats, df)
+        svg += '<g font-family="Roboto, Arial, sans-serif" font-size="%d" fill="black" dominant-baseline="text-before-edge">'%fontsize
+        for x, y, text, bold in texts:
+            svg += '<text x="%d" y="%d"%s>%s</text>'%(x, y, ' font-weight="700"' if bold else '', html.escape(text))
+        svg += '</g>'
+        
+    svg += '</svg>'
+    return svg
+
+
+# Returns the SVG markup as a data URL to use as the source of an image
+def svgSource(svg):
+    return 'data:image/svg+xml;base64,' + base64.b64encode(svg.encode('utf-8')).decode('ascii')
+
+
+# Returns the CSS style that displays an image of the field (given as URL) as the background of an element containing a throw map in SVG format
+def courtStyle(href):
+    return 'background-color: black; background-image: url(%s); background-size: contain; background-position: center; background-repeat: no-repeat;'%href
+
 
 ###########################################################################################################################################################################
 # ThrowMap class
@@ -50,6 +330,7 @@ class ThrowMap(widgets.VBox):
                  color_back='#000000',    # Background color
                  field_left=True,         # Basket is on the left of the screen
                  small_points=False,      # If true the icons for each shot are smaller
+                 vector=False,            # If True the throws are sent to the browser as SVG markup over the image of the field, instead of a PNG image
                  output=None):            # Output to display CSS and dialog
     
         super().__init__()
@@ -69,6 +350,7 @@ class ThrowMap(widgets.VBox):
         self.mode = 1       # 1=display full field,  2=display 2 points area,  3=display 3 points area
         
         self.output = output
+        self.vector = vector
         
         self.debug = widgets.Output()
         
@@ -81,6 +363,12 @@ class ThrowMap(widgets.VBox):
         # Current player ad throws displayed in the background map
         self.current_player = ''
         self.current_df     = None
+        
+        # Cache of the rendered maps: key --> (PIL image, base64 encoding of the image)
+        self.cache = collections.OrderedDict()
+        
+        # Layers of the field with the throws but without the stats: (player_name, mode, field_left) --> [empty field, layer, list of markers]
+        self.layers = {}
 
         # Images for scored and missed throws
         self.imgScored = Image.open('./resources/scored.png')
@@ -109,6 +397,8 @@ class ThrowMap(widgets.VBox):
         self.imgBackground = self.background_image(self.mode)
         self.img = v.Img(width='calc(%fvw - %dpx)'%(self._width, self.added_pixels_width), height='calc(%fvw - %dpx)' % (self._height,self.added_pixels_height),
                          contain=True, src=colors.image2Base64(self.imgBackground), style_='background-color: black;')
+        if self.vector:
+            self.reset()
         with self.outdraw:
             display(self.img)
             
@@ -123,22 +413,7 @@ class ThrowMap(widgets.VBox):
      
     # Returns the PIL image to show as background
     def background_image(self, mode):
-        if self.field_left:
-            if mode == 2:
-                img = Image.open('./resources/MappaTiroL2.png')
-            elif mode == 3:
-                img = Image.open('./resources/MappaTiroL3.png')
-            else:
-                img = Image.open('./resources/MappaTiroL.png')
-        else:
-            if mode == 2:
-                img = Image.open('./resources/MappaTiroR2.png')
-            elif mode == 3:
-                img = Image.open('./resources/MappaTiroR3.png')
-            else:
-                img = Image.open('./resources/MappaTiroR.png')
-                
-        return img
+        return fieldImage(mode, self.field_left)
     
     
     # Select a point
@@ -192,10 +467,14 @@ class ThrowMap(widgets.VBox):
                                                fullscreen=False, content=[self.outselect], output=self.output)
     
     
-    # Reset empty background image
+    # Reset empty background image (in vector mode the field is sent once as the background of the image and the source is an empty SVG)
     def reset(self):
         self.imgBackground = self.background_image(self.mode)
-        self.img.src = colors.image2Base64(self.imgBackground)
+        if self.vector:
+            self.img.style_ = courtStyle(colors.image2Base64(self.imgBackground))
+            self.img.src = svgSource(svgThrows(self.game, None, '', self.field_left))
+        else:
+            self.img.src = colors.image2Base64(self.imgBackground)
         
     
     # Display a list of throws from a Pandas Dataframe
@@ -205,154 +484,104 @@ class ThrowMap(widgets.VBox):
         else:
             back_image = self.imgSelectBackground
             
-        w,h = back_image.size
-        for index, row in tdf.iterrows():
-            if row['event'] in [2,3,4,5]:
-                if row['event'] in [2,4]: img = self.imgScored
-                else:                     img = self.imgMissed
-                iw,ih = img.size
-                x = row['x']
-                y = row['y']
-                if not self.field_left: x = 100.0 - x
-                px = int(w*x/100.0) - iw//2
-                py = int(h*y/100.0) - ih//2
-                back_image.paste(img, (px,py), img)
+        drawThrows(back_image, tdf, self.imgScored, self.imgMissed, self.field_left)
             
         # Display stats on top
-        if background:
-            if self.current_df is not None:
-                
-                def stat(ok, err):
-                    s = '%d/%-d'%(ok,ok+err)
-                    if ok+err ==0:
-                        return s,''
-                    else:
-                        return s, '%d%%'%round(100.0*ok/(ok+err))
-                
-                T1ok  = self.current_df[(self.current_df['team']==Config.TEAM)&(self.current_df['event_name']=='T1ok') ].shape[0]
-                T1err = self.current_df[(self.current_df['team']==Config.TEAM)&(self.current_df['event_name']=='T1err')].shape[0]
-                T2ok  = self.current_df[(self.current_df['team']==Config.TEAM)&(self.current_df['event_name']=='T2ok') ].shape[0]
-                T2err = self.current_df[(self.current_df['team']==Config.TEAM)&(self.current_df['event_name']=='T2err')].shape[0]
-                T3ok  = self.current_df[(self.current_df['team']==Config.TEAM)&(self.current_df['event_name']=='T3ok') ].shape[0]
-                T3err = self.current_df[(self.current_df['team']==Config.TEAM)&(self.current_df['event_name']=='T3err')].shape[0]
-                
-                w,h = back_image.size
-                draw = ImageDraw.Draw(back_image)
-
-                textcolor = "black"
-                if display_full_stats:
-                    fontsize = 25
-                    dy = 30
-                else:
-                    fontsize = 15
-                    dy = 18
-
-                fontBold   = ImageFont.truetype('fonts/Roboto-Bold.ttf',    fontsize)
-                fontNormal = ImageFont.truetype('fonts/Roboto-Regular.ttf', fontsize)
-
-                name = 'Team'
-                if self.current_player is not None: name = self.current_player
-
-                if self.field_left:
-                    x1 = (w*2)//3 - 26
-                    x2 = x1 + 36
-                    x3 = x2 + 74
-                else:
-                    x1 = 10
-                    x2 = x1 + 40
-                    x3 = x2 + 74
-                    
-                y = 10
-                draw.text((x1,y), name, textcolor, font=fontBold)
-                y += 6
-                
-                # Display scored and missed
-                s,p = stat(T1ok,T1err)
-                draw.text((x1,y+1*dy), 'T1', textcolor, font=fontNormal)
-                draw.text((x2,y+1*dy), s,    textcolor, font=fontNormal)
-                draw.text((x3,y+1*dy), p,    textcolor, font=fontNormal)
-                
-                s,p = stat(T2ok,T2err)
-                draw.text((x1,y+2*dy), 'T2', textcolor, font=fontNormal)
-                draw.text((x2,y+2*dy), s,    textcolor, font=fontNormal)
-                draw.text((x3,y+2*dy), p,    textcolor, font=fontNormal)
-
-                s,p = stat(T3ok,T3err)
-                draw.text((x1,y+3*dy), 'T3', textcolor, font=fontNormal)
-                draw.text((x2,y+3*dy), s,    textcolor, font=fontNormal)
-                draw.text((x3,y+3*dy), p,    textcolor, font=fontNormal)
-                
-                
-                if display_full_stats:
-                    # Display additional stats for the current player
-                    if not self.field_left:
-                        x2 = x1
-                        x3 = x1 + 60
-
-                    y += 8
-                    draw.text((x2,y+4*dy), 'P:', textcolor, font=fontNormal)
-                    draw.text((x3,y+4*dy), '%d'%Stats.points(self.current_df, self.current_player), textcolor, font=fontNormal)
-
-                    draw.text((x2,y+5*dy), 'VAL:', textcolor, font=fontNormal)
-                    draw.text((x3,y+5*dy), '%d'%Stats.value(self.current_df, self.current_player), textcolor, font=fontNormal)
-
-                    draw.text((x2,y+6*dy), 'OER:', textcolor, font=fontNormal)
-                    draw.text((x3,y+6*dy), '%.2f'%Stats.oer(self.current_df, self.current_player), textcolor, font=fontNormal)
-
-                    draw.text((x2,y+7*dy), 'VIR:', textcolor, font=fontNormal)
-                    draw.text((x3,y+7*dy), '%.2f'%Stats.vir(self.current_df, self.current_player, self.game.players_info), textcolor, font=fontNormal)
-
-                    draw.text((x2,y+8*dy), '+/-:', textcolor, font=fontNormal)
-                    draw.text((x3,y+8*dy), '%d'%Stats.plusminus(self.current_player, self.game.players_info), textcolor, font=fontNormal)
-
-                    draw.text((x2,y+9*dy), 'TS:', textcolor, font=fontNormal)
-                    draw.text((x3,y+9*dy), '%.0f%%'%Stats.trueshooting(self.current_df, self.current_player), textcolor, font=fontNormal)
-
-                    if self.current_player is not None and self.current_player in self.game.players_info:
-                        draw.text((x2,y+10*dy), 'Min:', textcolor, font=fontNormal)
-                        seconds = self.game.players_info[self.current_player]['time_on_field']
-                        draw.text((x3,y+10*dy), '%d\'%02d"'%(seconds//60, int(seconds%60)), textcolor, font=fontNormal)
-                    
+        if background and self.current_df is not None:
+            drawStats(back_image, self.game, self.current_player, self.field_left, display_full_stats, self.current_df)
+        
+        
+    # Returns the layer of the field with the throws of a player (or of the team if player_name is None), without the stats.
+    # The layer is updated by painting only the added throws and by repairing the area of the removed throws
+    def throwsLayer(self, tdf, player_name):
+        key = (player_name, self.mode, self.field_left)
+        if key not in self.layers:
+            field = self.background_image(self.mode)
+            field.load()
+            self.layers[key] = [field, field.copy(), []]
+        field, layer, old = self.layers[key]
+        
+        markers = throwMarkers(layer.size, tdf, self.imgScored, self.imgMissed, self.field_left)
+        if markers[:len(old)] == old:                                        # Throws added: only the new ones are painted
+            pasteMarkers(layer, markers[len(old):], self.imgScored, self.imgMissed)
+        else:
+            removed = removedMarkers(old, markers)
+            if removed is None:                                              # Different throws: the layer is painted again
+                layer = field.copy()
+                pasteMarkers(layer, markers, self.imgScored, self.imgMissed)
+            else:                                                            # Throws removed: their areas are painted again
+                sizes = (self.imgMissed.size, self.imgScored.size)
+                for s, x, y in removed:
+                    box = (x, y, x + sizes[s][0], y + sizes[s][1])
+                    overlapping = [m for m in markers if m[1] < box[2] and m[1] + sizes[m[0]][0] > box[0] and
+                                                         m[2] < box[3] and m[2] + sizes[m[0]][1] > box[1]]
+                    area = field.crop(box)
+                    pasteMarkers(area, overlapping, self.imgScored, self.imgMissed, offset=box[:2])
+                    layer.paste(area, box)
                     
-                # Display points per quarters
-                if self.field_left: x2 -= 16
-                else:               x2 = x1
-                y = h - dy - 6
-                dy = 26
-                sq = self.game.pointsPerQuarter()
-                for s in sq[::-1]:
-                    draw.text((x2,y), s, textcolor, font=fontNormal)
-                    y -= dy
-                
+        self.layers[key] = [field, layer, markers]
+        return layer
+        
         
+    # Returns the key of the cache of the rendered maps: the version of the events of the game and the values of players_info displayed in the stats
+    # (None if df is not the events DataFrame of the game, since other DataFrames are not versioned)
+    def cacheKey(self, df, player_name, display_full_stats):
+        if df is not self.game.events_df:
+            return None
         
+        info = self.game.players_info
+        if player_name is None:
+            stats = tuple(sorted([(name, x['time_on_field'], x['plusminus']) for name, x in info.items()]))
+        elif player_name in info:
+            stats = (info[player_name]['time_on_field'], info[player_name]['plusminus'])
+        else:
+            stats = None
+        return (player_name, self.mode, self.field_left, display_full_stats, self.game.event_store.version, stats)
+    
+    
     # Update of the throw map from the events stored in the Pandas Dataframe
     def updateThrows(self, df, player_name=None, background=True, display_full_stats=True):
         if df is not None and 'team' in df.columns:
             self.current_player = ''
             self.current_df     = None
 
-            if background: 
-                self.imgBackground = self.background_image(self.mode)
-
             if player_name is None:                   # No players selected --> Throws for the Team
                 tdf = df[(df['team']==Config.TEAM)]
-                if background:
-                    self.current_player = None
-                    self.current_df     = tdf.copy()
-                self.displayThrows(tdf, background=background, display_full_stats=display_full_stats)
             elif player_name == '':                   # Empty player selected --> no Throws displayed
-                pass
+                tdf = None
             else:                                     # Normal player selected --> player's trows displayed
                 tdf = df[(df['team']==Config.TEAM)&(df['player']==player_name)]
-                if background:
-                    self.current_player = player_name
-                    self.current_df     = tdf.copy()
-                self.displayThrows(tdf, background=background, display_full_stats=display_full_stats)
 
             if background:
-                self.img.src = colors.image2Base64(self.imgBackground)
+                if tdf is not None:
+                    self.current_player = player_name
+                    self.current_df     = tdf.copy()
+                
+                # The map is rendered only if not already in the cache
+                key = self.cacheKey(df, player_name, display_full_stats)
+                if key is not None and key in self.cache:
+                    self.cache.move_to_end(key)
+                    self.imgBackground, src = self.cache[key]
+                else:
+                    if self.vector:
+                        # Only the throws and the stats are sent: the field is already the background of the image
+                        src = svgSource(svgThrows(self.game, df, player_name, self.field_left, display_full_stats, self.imgScored.size[0]))
+                    else:
+                        if tdf is None:
+                            self.imgBackground = self.background_image(self.mode)
+                        else:
+                            self.imgBackground = self.throwsLayer(tdf, player_name).copy()
+                            drawStats(self.imgBackground, self.game, player_name, self.field_left, display_full_stats, df)
+                        src = colors.image2Base64(self.imgBackground)
+                    
+                    if key is not None:
+                        self.cache[key] = (self.imgBackground, src)
+                        if len(self.cache) > CACHE_SIZE:
+                            self.cache.popitem(last=False)
+                self.img.src = src
             else:
+                if tdf is not None:
+                    self.displayThrows(tdf, background=False, display_full_stats=display_full_stats)
                 self.imgSelect.src = colors.image2Base64(self.imgSelectBackground)
         
         
@@ -481,5 +710,8 @@ class ThrowMap(widgets.VBox):
         
         # Display the current throws
         if self.current_df is not None:
-            self.displayThrows(self.current_df, background=True)
-            self.img.src = colors.image2Base64(self.imgBackground)
+            if self.vector:
+                self.img.src = svgSource(svgThrows(self.game, self.current_df, self.current_player, self.field_left, marker_size=self.imgScored.size[0]))
+            else:
+                self.displayThrows(self.current_df, background=True)
+                self.img.src = colors.image2Base64(self.imgBackground)
@@ -21,8 +21,13 @@ Update the final site in HTML format
 # limitations under the Licence.
 import Config
 import Stats
-import Game
-import ScoreBoard
+import GameModel
+import GameFile
+import Catalog
+import Manifest
+import SiteRender
+import Publisher
+import SeasonLoader
 import BoxScore
 import ThrowMap
 import Analytics
@@ -30,8 +35,12 @@ import Analytics
 import importlib
 importlib.reload(Config)
 importlib.reload(Stats)
-importlib.reload(Game)
-importlib.reload(ScoreBoard)
+importlib.reload(GameModel)
+importlib.reload(Catalog)
+importlib.reload(Manifest)
+importlib.reload(SiteRender)
+importlib.reload(Publisher)
+importlib.reload(SeasonLoader)
 importlib.reload(BoxScore)
 importlib.reload(ThrowMap)
 importlib.reload(Analytics)
@@ -41,15 +50,82 @@ from ipywidgets import widgets, HTML
 import pandas as pd
 import glob
 import os
+import copy
+import time
 from datetime import datetime
 from PIL import Image
 import pathlib
 
 
 ###########################################################################################################################################################################
-# Update the HTML site
+# Analytics charts of the season saved as scripts of the shared chart page, given the events of the team players and the players_info of the season
 ###########################################################################################################################################################################
-def update(output, messages, ftp_server, dotest=False, test_file=None, players_to_remove_from_totals=[]):
+def seasonCharts(an_df, an_players_info):
+    
+    # Palle Perse vs Palle recuperate
+    staty = 'PRec'
+    descry = 'Media palle recuperate'
+
+    statx = 'PPer'
+    descrx = 'Media palle perse'
+
+    dfx = an_df[an_df['event_name']==statx]
+    dfy = an_df[an_df['event_name']==staty]
+
+    gx = dfx.groupby('player', observed=True).count()['event']
+    players = list(gx.index)
+    x = list(gx)
+    y = list(dfy.groupby('player', observed=True).count()['event'])
+
+    fig1 = Analytics.scatterChart(players, x, y, an_players_info, descrx, descry, size_on_time=True, show_bisector=True)
+    SiteRender.writeChart(fig1, 'web/chart1.js')
+    
+    
+    # All the season stats of the players calculated in a single pass on the events
+    an_st = Stats.table(an_df)
+    
+    # Punti realizzati per minuti in campo
+    descrx = 'Media punti realizzati'
+    players = sorted(an_df['player'].unique())
+    x = [Stats.points(an_st,p) for p in players]
+
+    descry = 'Media minuti in campo'
+    y = [an_players_info[x]['time_on_field']/60.0 for x in players]
+
+    fig2 = Analytics.scatterChart(players, x, y, an_players_info, descrx, descry, size_on_time=True, show_bisector=False)
+    SiteRender.writeChart(fig2, 'web/chart2.js')
+    
+    
+    # Valutazione Lega vs. True shooting
+    descrx = 'Valutazione di lega media'
+    players = sorted(an_df['player'].unique())
+    x = [Stats.value(an_st,p)/an_players_info[p]['games'] for p in players]
+
+    descry = 'True Shooting %'
+    y = [Stats.trueshooting(an_st,p) for p in players]
+
+    fig3 = Analytics.scatterChart(players, x, y, an_players_info, descrx, descry, size_on_time=True, show_bisector=False, do_average=False)
+    SiteRender.writeChart(fig3, 'web/chart3.js')
+    
+    
+    # Valutazione +/- vs. True shooting
+    descrx = 'Valutazione plus/minus media'
+    players = sorted(an_df['player'].unique())
+    x = [an_players_info[p]['plusminus']/an_players_info[p]['games'] for p in players]
+
+    descry = 'True Shooting %'
+    y = [Stats.trueshooting(an_st,p) for p in players]
+
+    fig4 = Analytics.scatterChart(players, x, y, an_players_info, descrx, descry, size_on_time=False, show_bisector=False, do_average=False)
+    SiteRender.writeChart(fig4, 'web/chart4.js')
+
+
+###########################################################################################################################################################################
+# Update the HTML site. If ftp_server is None the site is only built in the local web folder (nothing is published), force=True rebuilds all the artifacts
+# even if their inputs are unchanged, and report=True prints the time and size of the artifacts for each game and for each type of artifact. Returns the
+# SiteRender.BuildReport of the build
+###########################################################################################################################################################################
+def update(output, messages, ftp_server, dotest=False, test_file=None, players_to_remove_from_totals=[], processes=None, connections=4, force=False, report=False):
     
     with messages:
         print('Updating pybasket HTML site:')
@@ -62,36 +138,50 @@ def update(output, messages, ftp_server, dotest=False, test_file=None, players_t
     pathlib.Path('./web/playbyplay').mkdir(parents=True, exist_ok=True)
 
         
-    # Store a file to the FTP server
+    # Add a file to the files of the site to store to the FTP server (they are uploaded at the end, if different from the files on the server)
+    uploads = []
     def store(filepath):
-        file = open(filepath,'rb')
-        serverfilepath = filepath.replace('web/','daigio.it/pybasket/')
-        ftp_server.storbinary('STOR %s'%serverfilepath, file)
-        file.close()
-
-    # All events
-    an_df, an_players_info = Analytics.seasonEvents(output)
+        uploads.append(filepath)
+        
+    # Publisher of the files on a pool of FTP connections (ftp_server is an open connection or a function that opens a new one). It is created before the
+    # rendering, so that a connection error is reported immediately
+    publisher = None
+    if ftp_server is not None:
+        publisher = Publisher.Publisher(ftp_server, connections=connections)
+        
+    # Manifest of the artifacts: an artifact is built only if the hash of its inputs changed since the last update
+    manifest = Manifest.Manifest('web/manifest.json')
+    if force:
+        manifest.clear()
         
+    # Time and size of the artifacts
+    build_report = SiteRender.BuildReport()
+        
+    catalog = Catalog.Catalog('./data')
     if dotest and os.path.isfile(test_file):
         allfiles = [test_file]
     else:
-        allfiles = glob.glob('./data/*.game')
+        allfiles = catalog.files()
+        
+    # Hash of the inputs of each game and of the whole season. The hash of the season covers also the games loaded for this update and the test mode,
+    # so that the season artifacts (charts, totals) of a test build on a single game are never kept by the next normal build
+    team_file   = './data/Urbania.team'
+    render_hash = Manifest.renderHash()
+    game_hash   = { file: Manifest.gameHash(file, team_file, render_hash) for file in set(catalog.files() + allfiles) }
+    season_hash = Manifest.hashParts(*([game_hash[file] for file in catalog.files()] + [str(players_to_remove_from_totals), str(dotest)] +
+                                       [game_hash[file] for file in allfiles]))
 
     allevents = []
-    sb = ScoreBoard.ScoreBoard('./data/Urbania.team', scale=0.4, output=output)
+    
+    # Model of the team (the games are loaded by SiteRender.buildGames)
+    model = GameModel.GameModel(team_file)
+    model.team_logo_img = SiteRender.teamLogo(model.team_data)
 
-    if 'phases' in sb.game.team_data:
-        phases = sb.game.team_data['phases']
+    if 'phases' in model.team_data:
+        phases = model.team_data['phases']
     else:
-        phases = sorted(list(set([os.path.basename(x).split('-')[1] for x in allfiles if '-' in x and '.a-' in x])))
+        phases = catalog.phases()
         
-    
-    # Conversion to int without errors
-    def toint(x):
-        try:
-            return int(x)
-        except:
-            return 999999
 
     players_info = {}
 
@@ -242,13 +332,13 @@ def update(output, messages, ftp_server, dotest=False, test_file=None, players_t
             </div>
             
             <div id="Analisi" class="tabcontent">
-              <iframe src="chart1.html" seamless></iframe>
+              <iframe src="plot.html#chart1.js" seamless></iframe>
               <div class="line"></div>
-              <iframe src="chart2.html" seamless></iframe>
+              <iframe src="plot.html#chart2.js" seamless></iframe>
               <div class="line"></div>
-              <iframe src="chart3.html" seamless></iframe>
+              <iframe src="plot.html#chart3.js" seamless></iframe>
               <div class="line"></div>
-              <iframe src="chart4.html" seamless></iframe>
+              <iframe src="plot.html#chart4.js" seamless></iframe>
             </div>
     '''
 
@@ -287,7 +377,7 @@ def update(output, messages, ftp_server, dotest=False, test_file=None, players_t
     html_mappe_playerA = '''                    <button class="vtabmap%d" style="width: 150px; height: 44px; padding: 4px 8px;" onclick="openContent(event, '%s', 'vtabcontmap%d', 'vtabmap%d', '%s')">%s</button>'''
     html_mappe_playerB = '''
                   <div id="%s" class="vtabcontmap%d">
-                    <img src="maps/%d_%s.png" height="400px" style="margin-left: 10px; vertical-align: top;">
+                    <img src="maps/%d_%s.svg" height="400px" style="margin-left: 10px; vertical-align: top; background: url(maps/court.png) center / contain no-repeat;">
                     <img src="players/%s.png" height="400px" style="margin-left: 10px; vertical-align: top;">
                   </div>'''
 
@@ -298,7 +388,7 @@ def update(output, messages, ftp_server, dotest=False, test_file=None, players_t
                   </div>
 
                   <div id="Squadra%d" class="vtabcontmap%d">
-                     <img src="maps/%d.png" height="400px" style="margin-left: 10px; vertical-align: top;">
+                     <img src="maps/%d.svg" height="400px" style="margin-left: 10px; vertical-align: top; background: url(maps/court.png) center / contain no-repeat;">
                      <img src="players/Team.png" height="300px" style="margin-left: 10px; vertical-align: top;">
                   </div>
 %s
@@ -330,7 +420,7 @@ def update(output, messages, ftp_server, dotest=False, test_file=None, players_t
                 </div>
 
                 <div id="Grafico%d" class="vtabcontent%d">
-                    <embed style="border: none;" src="./charts/%d.html" dpi="300" width="100%%" height="1020px" />
+                    <embed style="border: none;" src="./plot.html#charts/%d.js" dpi="300" width="100%%" height="1020px" />
                 </div>
 
                 <div id="Sintesi%d" class="vtabcontent%d">
@@ -441,8 +531,8 @@ def update(output, messages, ftp_server, dotest=False, test_file=None, players_t
         fff += html_function%(i,i,i)
 
 
-    championship_name = sb.game.team_data['championship'] + ' - ' + sb.game.team_data['season']
-    htmlfile.write(html_head%(sb.game.team_data['season'], sb.game.team_data['name'], sss, sb.game.team_data['name'], championship_name, championship_name, championship_name, championship_name, championship_name))
+    championship_name = model.team_data['championship'] + ' - ' + model.team_data['season']
+    htmlfile.write(html_head%(model.team_data['season'], model.team_data['name'], sss, model.team_data['name'], championship_name, championship_name, championship_name, championship_name, championship_name))
 
     partite = ''
 
@@ -453,311 +543,221 @@ def update(output, messages, ftp_server, dotest=False, test_file=None, players_t
     store('web/images/bg.gif')
     store('web/images/redbg.gif')
     store('web/images/logo.png')
-
-
     
-    # Analytics charts saved in HTML format
+    # Shared plotly.js bundle and page of the charts and shared image of the field of the throw maps
+    store(SiteRender.writePlotlyBundle('web'))
+    store(SiteRender.writeChartPage('web'))
+    store(SiteRender.writeCourt('web'))
 
-    # Palle Perse vs Palle recuperate
-    staty = 'PRec'
-    descry = 'Media palle recuperate'
-
-    statx = 'PPer'
-    descrx = 'Media palle perse'
 
-    dfx = an_df[an_df['event_name']==statx]
-    dfy = an_df[an_df['event_name']==staty]
-
-    gx = dfx.groupby('player').count()['event']
-    players = list(gx.index)
-    x = list(gx)
-    y = list(dfy.groupby('player').count()['event'])
-
-    fig1 = Analytics.scatterChart(players, x, y, an_players_info, descrx, descry, size_on_time=True, show_bisector=True)
-    fig1.write_html("web/chart1.html")
-    store('web/chart1.html')
-    
-    
-    # Punti realizzati per minuti in campo
-    descrx = 'Media punti realizzati'
-    players = sorted(an_df['player'].unique())
-    x = [Stats.points(an_df,p) for p in players]
-
-    descry = 'Media minuti in campo'
-    y = [an_players_info[x]['time_on_field']/60.0 for x in players]
-
-    fig2 = Analytics.scatterChart(players, x, y, an_players_info, descrx, descry, size_on_time=True, show_bisector=False)
-    fig2.write_html("web/chart2.html")
-    store('web/chart2.html')
-    
-    
-    # Valutazione Lega vs. True shooting
-    descrx = 'Valutazione di lega media'
-    players = sorted(an_df['player'].unique())
-    x = [Stats.value(an_df,p)/an_players_info[p]['games'] for p in players]
-
-    descry = 'True Shooting %'
-    y = [Stats.trueshooting(an_df,p) for p in players]
-
-    fig3 = Analytics.scatterChart(players, x, y, an_players_info, descrx, descry, size_on_time=True, show_bisector=False, do_average=False)
-    fig3.write_html("web/chart3.html")
-    store('web/chart3.html')
     
-    
-    # Valutazione +/- vs. True shooting
-    descrx = 'Valutazione plus/minus media'
-    players = sorted(an_df['player'].unique())
-    x = [an_players_info[p]['plusminus']/an_players_info[p]['games'] for p in players]
-
-    descry = 'True Shooting %'
-    y = [Stats.trueshooting(an_df,p) for p in players]
-
-    fig4 = Analytics.scatterChart(players, x, y, an_players_info, descrx, descry, size_on_time=False, show_bisector=False, do_average=False)
-    fig4.write_html("web/chart4.html")
-    store('web/chart4.html')
-
-
-
     # Save players images
-    for player_name in ['Team', 'Unknown'] + list(sb.game.team_data['players'].keys()):
-        try:
-            img = Image.open('./images/%s.jpg'%player_name)
-        except:
-            img = Image.open('./images/Unknown.jpg')
-        iw,ih = img.size
-        img = img.resize((round(iw*(520.0/ih)), 520))
-        img.save('web/players/%s.png'%player_name, format='png')
+    for player_name in ['Team', 'Unknown'] + list(model.team_data['players'].keys()):
+        image_file = './images/%s.jpg'%player_name
+        if not os.path.isfile(image_file):
+            image_file = './images/Unknown.jpg'
+        if manifest.isChanged('web/players/%s.png'%player_name, Manifest.hashFile(image_file)):
+            start = time.perf_counter()
+            img = Image.open(image_file)
+            iw,ih = img.size
+            img = img.resize((round(iw*(520.0/ih)), 520))
+            img.save('web/players/%s.png'%player_name, format='png')
+            manifest.update('web/players/%s.png'%player_name, Manifest.hashFile(image_file))
+            SiteRender.addTiming(build_report.season, 'players', start, ['web/players/%s.png'%player_name])
         store('web/players/%s.png'%player_name)
+    manifest.save()
 
 
-    # Cycle on all games
-    progressive = 1
+    # All the games in the order of the phases and of the rounds, as (file, progressive, hash of the inputs of the game, manifest) tasks: the artifacts of a game
+    # are rendered only if the game (or its progressive number) changed since the last update
+    tasks = []
+    names = [os.path.basename(x) for x in allfiles]
     for phase in phases:
+        for file in catalog.files(phase):
+            if os.path.basename(file) in names:
+                progressive = len(tasks) + 1
+                tasks.append((file, progressive, Manifest.hashParts(game_hash[file], str(progressive)), manifest))
+    
+    # Cycle on all games: each game is loaded only once (in the worker processes) and its data are used for the index, the totals and the season charts
+    for (file, progressive, key, _), game in SiteRender.buildGames(team_file, tasks, processes):
+        g = game['game_data']
+        events_df = game['events']
+
+        points_team = Stats.points(events_df)
+        points_oppo = Stats.points(events_df, team=Config.OPPO)
+        if g['home']:
+            game_name = model.team_data['name'] + ' - ' + g['opponents'] + '  ' + str(points_team) + '-' + str(points_oppo)
+        else:
+            game_name = g['opponents'] + ' - ' + model.team_data['name'] + '  ' + str(points_oppo) + '-' + str(points_team)
+
+        # Artifacts of the game
+        for artifact in game['artifacts']:
+            store(artifact)
+        if game['render']:
+            for artifact in game['artifacts']:
+                manifest.update(artifact, key)
+            manifest.save()
+
+        with messages:
+            print('%2d.a'%(int(g['round'])), '%-7s'%(str(g['phase'])), game_name, '' if game['render'] else '(unchanged)')
+        build_report.addGame('%2d %s'%(progressive, GameFile.gameName(file)), game['timings'])
+
+
+        # Tabs of the Box Score for every quarter (only if the game is terminated)
+        quartersA = []
+        quartersB = []
+        if g['status']['gameover']:
+            for quarter in range(1,g['status']['quarter']+1):
+                qlabel = 'Q%d%d'%(progressive,quarter)
+                if quarter < 5:
+                    qname = 'Q%d'%quarter
+                else:
+                    qname = 'S%d'%(quarter-4)
 
-        # File of the phase
-        files = [x for x in allfiles if phase in x and os.path.basename(x).split('-')[1] == phase]
-
-        # Sort on increasing phase + round
-        rounds = [toint(os.path.basename(x).split('.')[0]) for x in files]
-        files  = [file for r, file in sorted(zip(rounds, files))]
-
-        for file in files:
-            sb.game.loadGame(file)
-            g = sb.game.game_data
-
-            points_team = Stats.points(sb.game.events_df)
-            points_oppo = Stats.points(sb.game.events_df, team=Config.OPPO)
-            if g['home']:
-                game_name = sb.game.team_data['name'] + ' - ' + g['opponents'] + '  ' + str(points_team) + '-' + str(points_oppo)
-            else:
-                game_name = g['opponents'] + ' - ' + sb.game.team_data['name'] + '  ' + str(points_oppo) + '-' + str(points_team)
-
-            with messages:
-                print('%2d.a'%(int(g['round'])), '%-7s'%(str(g['phase'])), game_name)
-
-
-            # Save Box Score in SVG format
-            svg = BoxScore.svg(sb.game.events_df, game=sb.game, width=65.0)
-            with open('web/sheets/%d.svg'%progressive, 'w') as outfile:
-                outfile.write(svg)
-            store('web/sheets/%d.svg'%progressive)
-
-            # Save Box Score for every quarter (only if the game is terminated)
-            quartersA = []
-            quartersB = []
-            if g['status']['gameover']:
-                for quarter in range(1,g['status']['quarter']+1):
-                    df = sb.game.events_df.copy()
-                    svg = BoxScore.svg(df, game=sb.game, width=65.0, quarter=quarter)
-                    with open('web/sheets/%d_%d.svg'%(progressive,quarter), 'w') as outfile:
-                        outfile.write(svg)
-                    store('web/sheets/%d_%d.svg'%(progressive,quarter))
-
-                    qlabel = 'Q%d%d'%(progressive,quarter)
-                    if quarter < 5:
-                        qname = 'Q%d'%quarter
-                    else:
-                        qname = 'S%d'%(quarter-4)
-
-                    quartersA.append(html_sheet_quarterA%(progressive, qlabel, progressive, progressive, '', qname))
-                    quartersB.append(html_sheet_quarterB%(qlabel, progressive, progressive, quarter))
+                quartersA.append(html_sheet_quarterA%(progressive, qlabel, progressive, progressive, '', qname))
+                quartersB.append(html_sheet_quarterB%(qlabel, progressive, progressive, quarter))
 
-            game_sheet = html_sheet%(progressive,progressive,progressive,progressive, '', progressive, '\n'.join(quartersA), progressive, progressive, progressive, '\n'.join(quartersB) )
+        game_sheet = html_sheet%(progressive,progressive,progressive,progressive, '', progressive, '\n'.join(quartersA), progressive, progressive, progressive, '\n'.join(quartersB) )
 
 
-            # Create points chart
-            fig = BoxScore.pointsChart(sb.game.events_df, game=sb.game, height_in_pixels=1000, template='plotly_white')
+        playerA = []
+        playerB = []
+        for player_name in game['players_by_name']:
+            plabel = 'P%d%s'%(progressive,player_name)
+            playerA.append(html_mappe_playerA%(progressive, plabel, progressive, progressive, '', player_name))
             
-            # Save Points Chart in PNG
-            #bbb = fig.to_image('png', width=2000, height=1000)
-            #with open('web/charts/%d.png'%progressive, 'wb') as pngfile:
-            #    pngfile.write(bbb)
-            #store('web/charts/%d.png'%progressive)
-            
-            # Save Points Chart in HTML format
-            fig.write_html('web/charts/%d.html'%progressive)
-            store('web/charts/%d.html'%progressive)
+            image_name = player_name
+            if player_name not in model.team_data['players']:
+                image_name = 'Unknown'
+            playerB.append(html_mappe_playerB%(plabel, progressive, progressive, player_name, image_name))
 
-            
-            # Save Play-By-Play directly in the HTML
-            pbp = BoxScore.play_by_play(sb.game.events_df, game=sb.game)
-            pbphtml = '<div style="max-width: 100%%; overflow: hidden; background-color: #ffffff;">%s</div>'%(pbp)
-            with open('web/playbyplay/%d.html'%progressive, 'w') as pbpfile:
-                pbpfile.write(pbphtml)
-            store('web/playbyplay/%d.html'%progressive)
-
-
-            # Mappe di tiro
-            m = ThrowMap.ThrowMap(board=sb, scale=0.85, field_left=True, output=output)
-            m.updateThrows(sb.game.events_df, player_name=None, background=True)
-            m.imgBackground.save('web/maps/%d.png'%progressive, format='png')
-            store('web/maps/%d.png'%progressive)
-
-            playerA = []
-            playerB = []
-            for player_name in sb.game.players_by_name:
-                m.updateThrows(sb.game.events_df, player_name=player_name, background=True)
-                m.imgBackground.save('web/maps/%d_%s.png'%(progressive,player_name), format='png')
-                store('web/maps/%d_%s.png'%(progressive,player_name))
-
-                plabel = 'P%d%s'%(progressive,player_name)
-                playerA.append(html_mappe_playerA%(progressive, plabel, progressive, progressive, '', player_name))
-                
-                image_name = player_name
-                if player_name not in sb.game.team_data['players']:
-                    image_name = 'Unknown'
-                playerB.append(html_mappe_playerB%(plabel, progressive, progressive, player_name, image_name))
-
-            game_mappe = html_mappe%(progressive,progressive,progressive,progressive, '', progressive, '\n'.join(playerA), progressive, progressive, progressive, '\n'.join(playerB) )
-
-
-            # Game summary
-            summary = '''                    <p style="font-size: 1.4em; font-weight: 600; margin-left: 30px; color: black;">
-                    %s
-                    </p>''' % (BoxScore.summary(sb.game.events_df, game=sb.game).replace('\n','</br>'))
+        game_mappe = html_mappe%(progressive,progressive,progressive,progressive, '', progressive, '\n'.join(playerA), progressive, progressive, progressive, '\n'.join(playerB) )
 
 
-            # Video file name
-            ddd = datetime.strptime(g['date'], '%d/%m/%Y').strftime('%Y_%m_%d')
-            if g['home']:
-                t1 = 'URBANIA'
-                t2 = g['abbreviation']
-            else:
-                t1 = g['abbreviation']
-                t2 = 'URBANIA'
-            videofile = 'https://www.daigio.it/videos/' + ddd + '_' + t1 + '-' + t2 + '.mp4'
-
-
-            htmlfile.write(html_singlegame%(progressive,
-                                            progressive,
-                                            progressive,progressive,progressive,progressive,'',progressive,
-                                            progressive,progressive,progressive,progressive,'',
-                                            progressive,progressive,progressive,progressive,'',
-                                            progressive,progressive,progressive,progressive,'',
-                                            progressive,progressive,progressive,progressive,'',
-                                            progressive,progressive,progressive,progressive,'',
-                                            progressive,progressive,
-                                            game_sheet,
-                                            progressive,progressive,
-                                            '                    <iframe src="playbyplay/%d.html" width="100%%" height="900px" style="margin-left: 16px; border:none;"></iframe>'%progressive,
-                                            progressive,progressive,
-                                            game_mappe,
-                                            progressive,progressive,progressive,
-                                            progressive,progressive,
-                                            summary,
-                                            progressive,progressive,progressive, videofile))
-
-            # Accumulate minutes and plusminus
-            for player in sb.game.players_info.keys():
-                pi = sb.game.players_info[player]
-                if player in players_info:
-                    players_info[player]['time_on_field'] += pi['time_on_field']
-                    players_info[player]['plusminus']     += pi['plusminus']
-                else:
-                    players_info[player] = pi
-
-            # Append all events
-            df = sb.game.events_df
-            if df.shape[0] > 0:
-                name = file.replace('./data/','').replace('.game','')
-                elems = name.split('-')
-                ro = int(elems[0].replace('.a',''))
-                ph = elems[1]
-                op = elems[2]
-                df['game_number'] = progressive
-                df['round'] = ro
-                df['phase'] = ph
-                df['opponents'] = op
-                df['home'] = sb.game.game_data['home']
-                allevents.append(df)
-
-            # Generate text for html
-            pt = []
-            po = []
-            for player_name in sb.game.players_by_number:
-                points = Stats.points(df, player_name)
-                if sb.game.players_info[player_name]['time_on_field'] <= 0.0:
-                    pt.append('%s ne'%player_name)
-                else:
-                    if points > 0: pt.append('%s %d'%(player_name, points))
-                    else:          pt.append(player_name)
-
-            for player_name in sb.game.opponents_by_number:
-                points = Stats.points(df, player_name, team=Config.OPPO)
-                
-                # Recover opponent points from the game if greater than the numbers calculated from the events
-                if player_name in sb.game.game_data['opponents_info']:
-                    p = sb.game.game_data['opponents_info'][player_name]['points']
-                    if p > points: points = p
-                
-                if points > 0: po.append('%s %d'%(player_name,points))
-                else:          po.append(player_name)
-
-            fint = Stats.points(df)
-            fino = Stats.points(df, team=Config.OPPO)
-            if g['home']:
-                t1 = sb.game.team_data['name']
-                t2 = g['opponents']
-                r1 = t1 + ' - ' + t2
-                r2 = str(fint) + '-' + str(fino)
-                p1 = ', '.join(pt)
-                p2 = ', '.join(po)
-            else:
-                t1 = g['opponents']
-                t2 = sb.game.team_data['name']
-                r1 = t1 + ' - ' + t2
-                r2 = str(fino) + '-' + str(fint)
-                p1 = ', '.join(po)
-                p2 = ', '.join(pt)
-
-            showpoints = True
-            if fint > fino:
-                col = colWin
-            elif fint < fino:
-                col = colLost
+        # Game summary
+        summary = '''                    <p style="font-size: 1.4em; font-weight: 600; margin-left: 30px; color: black;">
+                    %s
+                    </p>''' % (game['summary'].replace('\n','</br>'))
+
+
+        # Video file name
+        ddd = datetime.strptime(g['date'], '%d/%m/%Y').strftime('%Y_%m_%d')
+        if g['home']:
+            t1 = 'URBANIA'
+            t2 = g['abbreviation']
+        else:
+            t1 = g['abbreviation']
+            t2 = 'URBANIA'
+        videofile = 'https://www.daigio.it/videos/' + ddd + '_' + t1 + '-' + t2 + '.mp4'
+
+
+        htmlfile.write(html_singlegame%(progressive,
+                                        progressive,
+                                        progressive,progressive,progressive,progressive,'',progressive,
+                                        progressive,progressive,progressive,progressive,'',
+                                        progressive,progressive,progressive,progressive,'',
+                                        progressive,progressive,progressive,progressive,'',
+                                        progressive,progressive,progressive,progressive,'',
+                                        progressive,progressive,progressive,progressive,'',
+                                        progressive,progressive,
+                                        game_sheet,
+                                        progressive,progressive,
+                                        '                    <iframe src="playbyplay/%d.html" width="100%%" height="900px" style="margin-left: 16px; border:none;"></iframe>'%progressive,
+                                        progressive,progressive,
+                                        game_mappe,
+                                        progressive,progressive,progressive,
+                                        progressive,progressive,
+                                        summary,
+                                        progressive,progressive,progressive, videofile))
+
+        # Accumulate minutes, plusminus and games played
+        SeasonLoader.mergePlayersInfo(players_info, game['players_info'])
+
+        # Append all events (the columns of the game are already added)
+        df = events_df
+        if df.shape[0] > 0:
+            allevents.append(df)
+
+        # Generate text for html
+        pt = []
+        po = []
+        st = Stats.table(df)
+        for player_name in game['players_by_number']:
+            points = Stats.points(st, player_name)
+            if game['players_info'][player_name]['time_on_field'] <= 0.0:
+                pt.append('%s ne'%player_name)
             else:
-                col = colNone
-                showpoints = False
-                r2 = ''
-
-            d = datetime.strptime(g['date'], "%d/%m/%Y")
-            day = ['Lunedì', 'Martedì', 'Mercoledì', 'Giovedì', 'Venerdì', 'Sabato', 'Domenica'][d.weekday()]
-            partite += html_game1%(progressive, game_name, g['round'], g['phase'], day, g['date'], g['time'], col, r1, col, r2)
+                if points > 0: pt.append('%s %d'%(player_name, points))
+                else:          pt.append(player_name)
 
-            if showpoints:
-                partite += html_game2%(progressive, game_name, t1, p1, progressive, game_name, t2, p2)
-
-            progressive += 1
+        for player_name in game['opponents_by_number']:
+            points = Stats.points(st, player_name, team=Config.OPPO)
+            
+            # Recover opponent points from the game if greater than the numbers calculated from the events
+            if player_name in g['opponents_info']:
+                p = g['opponents_info'][player_name]['points']
+                if p > points: points = p
+            
+            if points > 0: po.append('%s %d'%(player_name,points))
+            else:          po.append(player_name)
+
+        fint = Stats.points(st)
+        fino = Stats.points(st, team=Config.OPPO)
+        if g['home']:
+            t1 = model.team_data['name']
+            t2 = g['opponents']
+            r1 = t1 + ' - ' + t2
+            r2 = str(fint) + '-' + str(fino)
+            p1 = ', '.join(pt)
+            p2 = ', '.join(po)
+        else:
+            t1 = g['opponents']
+            t2 = model.team_data['name']
+            r1 = t1 + ' - ' + t2
+            r2 = str(fino) + '-' + str(fint)
+            p1 = ', '.join(po)
+            p2 = ', '.join(pt)
+
+        showpoints = True
+        if fint > fino:
+            col = colWin
+        elif fint < fino:
+            col = colLost
+        else:
+            col = colNone
+            showpoints = False
+            r2 = ''
+
+        d = datetime.strptime(g['date'], "%d/%m/%Y")
+        day = ['Lunedì', 'Martedì', 'Mercoledì', 'Giovedì', 'Venerdì', 'Sabato', 'Domenica'][d.weekday()]
+        partite += html_game1%(progressive, game_name, g['round'], g['phase'], day, g['date'], g['time'], col, r1, col, r2)
+
+        if showpoints:
+            partite += html_game2%(progressive, game_name, t1, p1, progressive, game_name, t2, p2)
 
 
     htmlfile.write(html_games)
     htmlfile.write(partite)
-    htmlfile.write(html_tail%(progressive, fff))
+    htmlfile.write(html_tail%(len(tasks)+1, fff))
     htmlfile.close()
 
-    store('web/index.html')
-
-    df = pd.concat(allevents)
+    # Analytics charts saved as scripts of the chart page (only if any game of the season changed). They are computed from the games loaded for the index, unless
+    # the site is built for a single test game
+    charts = ['web/chart1.js', 'web/chart2.js', 'web/chart3.js', 'web/chart4.js']
+    if manifest.anyChanged(charts, season_hash):
+        start = time.perf_counter()
+        if len(allfiles) == len(catalog.files()):
+            seasonCharts(Analytics.teamEvents(allevents), copy.deepcopy(players_info))
+        else:
+            seasonCharts(*Analytics.seasonEvents(output))
+        SiteRender.addTiming(build_report.season, 'season charts', start, charts)
+        for chart in charts:
+            manifest.update(chart, season_hash)
+        manifest.save()
+    for chart in charts:
+        store(chart)
+    
+    df = Analytics.concatEvents(allevents)
     df.reset_index(drop=True, inplace=True)
 
     # Remove players that do not need to be displayed
@@ -765,18 +765,52 @@ def update(output, messages, ftp_server, dotest=False, test_file=None, players_t
         if p in players_info:
             del players_info[p]
     
-    # Totali e medie
-    svg = BoxScore.totalsvg(df, game=sb.game, average=False, players_info=players_info, width=55.0)
-    with open('web/sheets/totali.svg', 'w') as file:
-        file.write(svg)
-    store('web/sheets/totali.svg')
-
-    svg = BoxScore.totalsvg(df, game=sb.game, average=True, players_info=players_info, width=55.0)
-    with open('web/sheets/medie.svg', 'w') as file:
-        file.write(svg)
-    store('web/sheets/medie.svg')
+    # Totali e medie (only if any game of the season changed). The heading reports the season and the championship of the last game
+    totals = ['web/sheets/totali.svg', 'web/sheets/medie.svg']
+    if manifest.anyChanged(totals, season_hash):
+        start = time.perf_counter()
+        if len(tasks) > 0:
+            model.game_data = g
+        svg = BoxScore.totalsvg(df, game=model, average=False, players_info=players_info, width=55.0)
+        with open('web/sheets/totali.svg', 'w') as file:
+            file.write(svg)
+
+        svg = BoxScore.totalsvg(df, game=model, average=True, players_info=players_info, width=55.0)
+        with open('web/sheets/medie.svg', 'w') as file:
+            file.write(svg)
+        SiteRender.addTiming(build_report.season, 'totals', start, totals)
+        
+        for total in totals:
+            manifest.update(total, season_hash)
+    manifest.save()
+    for total in totals:
+        store(total)
+    
+    
+    # Upload the files that differ from the ones on the server. The index is uploaded last, when all the files it refers to are already on the server: if any
+    # upload failed the index is not published (the server keeps the previous one) and the failed files are sent again by the next update
+    if publisher is None:
+        with messages:
+            print('Local build: %d files in the web folder, nothing published'%(len(uploads)+1))
+    else:
+        with messages:
+            print('Publishing %d files...'%len(uploads))
+        try:
+            build_report.failed = publisher.publish(uploads, messages)
+            if len(build_report.failed) > 0:
+                with messages:
+                    print('%d files not published: the index is not updated'%len(build_report.failed))
+            else:
+                build_report.failed = publisher.publish(['web/index.html'], messages)
+        finally:
+            publisher.close()
     
     
     with messages:
+        if report:
+            print(build_report.text())
         print('Done!')
-        display(HTML('<a href="https://www.daigio.it/pybasket/" target="_blank">Visit pybasket site!</a>'))
+        if publisher is not None:
+            display(HTML('<a href="https://www.daigio.it/pybasket/" target="_blank">Visit pybasket site!</a>'))
+            
+    return build_report